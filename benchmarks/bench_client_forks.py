@@ -0,0 +1,139 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+"""
+Startup benchmark for the client (counts spawned processes).
+
+Runs what "cybld cmd0" and "cybld -s" do in the client process (resolve the
+base path, find the sockets and send a message to each of them / read the
+shared status) and counts the processes spawned on the way. "before" asks
+tmux for the session on every call (tmux info and tmux display-message, as
+the session used to be resolved), "after" uses the memoized session.
+
+Usage: python benchmarks/bench_client_forks.py [runs] [servers]
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cybld import cybld_helpers, cybld_ipc_message                 # noqa: E402
+from cybld.cybld_ipc_client import CyBldIpcClient                  # noqa: E402
+from cybld.cybld_shared_status import CyBldSharedStatus            # noqa: E402
+from cybld.cybld_tmux_wrapper import CyBldTmuxWrapper              # noqa: E402
+
+# --------------------------------------------------------------------------
+
+spawned = 0
+
+
+def count_spawns():
+    """ Count every process started via subprocess (os.popen uses it as well) """
+    execute_child = subprocess.Popen._execute_child
+
+    def counting_execute_child(*args, **kwargs):
+        global spawned
+        spawned += 1
+        return execute_child(*args, **kwargs)
+
+    subprocess.Popen._execute_child = counting_execute_child
+
+
+session_name = None
+servers      = []
+
+
+def legacy_get_session_name():
+    """ Spawns what the session lookup used to spawn on every call """
+    if shutil.which("tmux") is not None:
+        subprocess.call("tmux info", shell=True,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.popen("tmux display-message -p '#S'").read()
+
+    # Same base path for both variants
+    return session_name
+
+
+def client_exec():
+    os.path.isdir(cybld_helpers.get_base_path())
+
+    message            = cybld_ipc_message.CyBldIpcMessage()
+    message.cmd_type   = cybld_ipc_message.CyBldIpcMessageType.exec_cmd
+    message.cmd_number = 0
+    message.codeword   = "DEFAULT"
+    CyBldIpcClient().handle_cmd(message)
+
+    # The queue of a datagram socket is short, the client would block
+    for server in servers:
+        server.recv(4096)
+
+
+def client_status():
+    CyBldSharedStatus(True)
+
+
+def measure(name, function, runs):
+    global spawned
+
+    CyBldTmuxWrapper.reset_session_name()
+    spawned = 0
+    start   = time.perf_counter()
+    for _ in range(runs):
+        # Every client invocation is a new process
+        CyBldTmuxWrapper.reset_session_name()
+        function()
+    elapsed = (time.perf_counter() - start) * 1000 / runs
+
+    print("{0:<20} {1:>5.1f} processes {2:>8.2f} ms per invocation".format(
+        name, spawned / runs, elapsed))
+
+
+def main():
+    runs         = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    server_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    global session_name
+    session_name = CyBldTmuxWrapper.get_session_name()
+
+    count_spawns()
+
+    # Fake servers (client_exec drains their sockets)
+    base_path = cybld_helpers.get_base_path()
+    os.makedirs(base_path, exist_ok=True)
+    sockets = []
+    for index in range(server_count):
+        path = os.path.join(base_path, "{0}-bench{1}".format(cybld_helpers.SOCKET_BASE_NAME, index))
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        server.bind(path)
+        sockets.append((server, path))
+        servers.append(server)
+
+    try:
+        print("{0} runs, {1} servers, session: {2}".format(runs, server_count, session_name))
+        memoized_get_session_name = CyBldTmuxWrapper.get_session_name
+
+        CyBldTmuxWrapper.get_session_name = staticmethod(legacy_get_session_name)
+        measure("exec (before)", client_exec, runs)
+        measure("status (before)", client_status, runs)
+
+        CyBldTmuxWrapper.get_session_name = staticmethod(memoized_get_session_name)
+        measure("exec (after)", client_exec, runs)
+        measure("status (after)", client_status, runs)
+    finally:
+        for server, path in sockets:
+            server.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
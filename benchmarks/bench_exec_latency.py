@@ -0,0 +1,81 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+"""
+Latency benchmark for executing short commands.
+
+Compares spawning a new shell on a new pty for every command (the "spawn"
+exec backend) with CyBldWarmShell (the "warm_shell" exec backend). The time
+from starting the command until its exit code is known is measured, the
+output is only collected.
+
+Usage: python benchmarks/bench_exec_latency.py [runs] [command]
+"""
+
+import os
+import pty
+import statistics
+import subprocess
+import sys
+import termios
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cybld.cybld_pty_reader import CyBldPtyReader  # noqa: E402
+from cybld.cybld_warm_shell import CyBldWarmShell  # noqa: E402
+
+# --------------------------------------------------------------------------
+
+def run_spawn(cmd, sinks):
+    master, slave = pty.openpty()
+
+    attr = termios.tcgetattr(slave)
+    attr[1] = attr[1] & ~termios.ONLCR
+    termios.tcsetattr(slave, termios.TCSADRAIN, attr)
+
+    proc = subprocess.Popen(cmd, shell=True, stdout=slave, stderr=slave,
+                            start_new_session=True)
+    os.close(slave)
+
+    CyBldPtyReader(master, sinks).read_until_eof()
+    os.close(master)
+    return proc.wait()
+
+
+def measure(name, run_function, cmd, runs):
+    output    = []
+    latencies = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_function(cmd, [output.append])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print("{0:<10} mean {1:>7.2f} ms  median {2:>7.2f} ms  p95 {3:>7.2f} ms".format(
+        name, statistics.mean(latencies), statistics.median(latencies),
+        latencies[int(len(latencies) * 0.95) - 1]))
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cmd  = sys.argv[2] if len(sys.argv) > 2 else "echo hello"
+
+    print("{0} runs of '{1}'".format(runs, cmd))
+    measure("spawn", run_spawn, cmd, runs)
+
+    warm_shell = CyBldWarmShell()
+    # The first command starts the shell, don't count it
+    warm_shell.run("true", [])
+    measure("warm_shell", warm_shell.run, cmd, runs)
+    warm_shell.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+"""
+Throughput benchmark for reading command output from a pty.
+
+Pushes synthetic compiler-like output through a pty and compares the old
+readline()/string concatenation loop with CyBldPtyReader. Nothing is written
+to the terminal, only the reading and collecting is measured.
+
+Note that readline() on the unbuffered pty issues one read per byte, so the
+"before" run gets very slow for big sizes. Use --after-only to measure the
+new reader with realistic log sizes.
+
+Usage: python benchmarks/bench_pty_reader.py [--after-only] [megabytes]
+"""
+
+import errno
+import os
+import pty
+import subprocess
+import sys
+import termios
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cybld.cybld_pty_reader import CyBldPtyReader  # noqa: E402
+
+# --------------------------------------------------------------------------
+
+LINE = "src/module/file.cpp:42:13: warning: unused variable 'x' [-Wunused-variable]"
+
+GENERATOR = ("import sys\n"
+             "line = ({0!r} + '\\n').encode()\n"
+             "block = line * 1024\n"
+             "for _ in range(int(sys.argv[1]) * 1024 * 1024 // len(block)):\n"
+             "    sys.stdout.buffer.write(block)\n").format(LINE)
+
+# --------------------------------------------------------------------------
+
+def spawn(megabytes):
+    master, slave = pty.openpty()
+
+    attr = termios.tcgetattr(slave)
+    attr[1] = attr[1] & ~termios.ONLCR
+    termios.tcsetattr(slave, termios.TCSADRAIN, attr)
+
+    proc = subprocess.Popen([sys.executable, "-c", GENERATOR, str(megabytes)],
+                            stdout=slave, stderr=slave)
+    os.close(slave)
+    return proc, master
+
+
+def read_legacy(proc, master):
+    """ The loop which was used by CyBldCommandHandler before """
+    read_stdout_stderr = os.fdopen(master, 'rb', buffering=0)
+    complete_output    = ""
+    total              = 0
+
+    try:
+        while proc.poll() is None:
+            output = read_stdout_stderr.readline()
+            total += len(output)
+            complete_output += output.decode()
+
+        output = read_stdout_stderr.readline()
+        total += len(output)
+        complete_output += output.decode()
+    except OSError as oserr:
+        if oserr.errno != errno.EIO:
+            raise
+
+    read_stdout_stderr.close()
+    return total
+
+
+def read_chunked(proc, master):
+    output_chunks = []
+    reader        = CyBldPtyReader(master, [output_chunks.append])
+    reader.read_until_eof()
+    "".join(chunk.decode(errors="replace") for chunk in output_chunks)
+    os.close(master)
+    return reader.bytes_read
+
+
+def run(name, read_function, megabytes):
+    proc, master = spawn(megabytes)
+
+    start = time.perf_counter()
+    total = read_function(proc, master)
+    proc.wait()
+    end   = time.perf_counter()
+
+    print("{0:<10} {1:>8.1f} MB in {2:>6.2f} s -> {3:>8.1f} MB/s".format(
+        name, total / 1024 / 1024, end - start, total / 1024 / 1024 / (end - start)))
+
+
+def main():
+    args       = sys.argv[1:]
+    after_only = "--after-only" in args
+    if after_only:
+        args.remove("--after-only")
+
+    megabytes = int(args[0]) if len(args) > 0 else 4
+
+    if not after_only:
+        run("before", read_legacy, megabytes)
+    run("after", read_chunked, megabytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+"""
+Discovery benchmark for runner params (cold and warm).
+
+Generates a monorepo-like tree (a few thousand sources and tests, the rest
+in .git, build and node_modules) in a temporary folder and finds the params
+(test_*.py) the way the runner used to (os.walk and a regex match on every
+file) and with CyBldDiscoveryIndex (cold: first run, warm: nothing changed,
+one file added) as well as in watch mode (inotify). Note that "cold" still profits from the page cache.
+
+Usage: python benchmarks/bench_runner_discovery.py [files]
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cybld.cybld_runner_discovery import CyBldDiscoveryIndex  # noqa: E402
+
+# --------------------------------------------------------------------------
+
+FILES_PER_DIR = 500
+
+# Share of the files (the remaining ones are sources and tests)
+TREE_LAYOUT = [(".git/objects", 0.2), ("build", 0.4), ("node_modules", 0.38)]
+
+
+def generate_tree(root: str, count: int):
+    def generate(folder, files, prefix):
+        for index in range(0, files, FILES_PER_DIR):
+            path = os.path.join(root, folder, "d{0:05d}".format(index // FILES_PER_DIR))
+            os.makedirs(path)
+            for file_index in range(min(FILES_PER_DIR, files - index)):
+                open(os.path.join(path, "{0}{1}.py".format(prefix, file_index)), "w").close()
+
+    remaining = count
+    for folder, share in TREE_LAYOUT:
+        generate(folder, int(count * share), "test_" if folder == "build" else "file_")
+        remaining -= int(count * share)
+
+    # Every tenth source file is a test
+    generate("src", remaining - remaining // 10, "module_")
+    generate("tests", remaining // 10, "test_")
+
+
+def legacy_find(regex):
+    params = []
+    for root, dirs, files in os.walk(os.curdir):
+        for file in files:
+            fullfile = str(os.path.join(root, file))
+            if regex.match(fullfile):
+                params.append(fullfile)
+    return params
+
+
+def measure(name, function):
+    start  = time.perf_counter()
+    params = function()
+    print("{0:<40} {1:>9.1f} ms {2:>8} params".format(name, (time.perf_counter() - start) * 1000, len(params)))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    regex = re.compile(r".*/test_.*\.py$")
+
+    root = tempfile.mkdtemp(prefix="cybld-discovery-")
+    cwd  = os.getcwd()
+    try:
+        start = time.perf_counter()
+        generate_tree(root, count)
+        print("Generated {0} files in {1:.1f} s".format(count, time.perf_counter() - start))
+        os.chdir(root)
+
+        measure("os.walk (before)", lambda: legacy_find(regex))
+
+        index = CyBldDiscoveryIndex(regex, [])
+        measure("index, no excludes (cold)", index.find)
+
+        index = CyBldDiscoveryIndex(regex)
+        measure("index, default excludes (cold)", index.find)
+
+        index = CyBldDiscoveryIndex(regex, [".git", "build", "node_modules"])
+        measure("index, build excludes (cold)", index.find)
+
+        # Trust the listings of the folders which have just been generated
+        for dirpath, dirs, files in os.walk(root):
+            os.utime(dirpath, (0, 0))
+
+        index = CyBldDiscoveryIndex(regex)
+        index.find()
+        measure("index, default excludes (warm)", index.find)
+
+        index = CyBldDiscoveryIndex(regex, [".git", "build", "node_modules"])
+        index.find()
+        measure("index, build excludes (warm)", index.find)
+
+        open(os.path.join(root, "tests", "d00000", "test_new.py"), "w").close()
+        measure("index, build excludes (one new file)", index.find)
+
+        index = CyBldDiscoveryIndex(regex, [".git", "build", "node_modules"], watch = True)
+        measure("watch, build excludes (cold)", index.find)
+        measure("watch, build excludes (warm)", index.find)
+        open(os.path.join(root, "tests", "d00000", "test_new2.py"), "w").close()
+        measure("watch, build excludes (one new file)", index.find)
+        index.close()
+
+        index = CyBldDiscoveryIndex(regex, watch = True)
+        measure("watch, default excludes (cold)", index.find)
+        measure("watch, default excludes (warm)", index.find)
+        index.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
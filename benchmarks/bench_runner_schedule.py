@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+"""
+Simulation of the runner schedule policies over recorded run times.
+
+Replays a runner history (refer to CyBldRunnerHistory, i. e.
+~/.local/share/cybld/runner_history/runner_python_tests.json) or a synthetic
+one (skewed run times, a few failures) on a pool of workers: every param is
+started on the first free worker, in the order of the policy. Assumes that
+the params behave like last time (the failed ones fail again).
+
+Prints the makespan (until all params are done) and the time until the
+first failure is known for every policy and number of jobs.
+
+Usage: python benchmarks/bench_runner_schedule.py [history.json] [jobs...]
+"""
+
+import heapq
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cybld.cybld_runner_schedule import CyBldRunnerSchedulePolicy, schedule_params  # noqa: E402
+
+# --------------------------------------------------------------------------
+
+def synthetic_history(count: int = 200, failures: int = 3, seed: int = 42):
+    """ Mostly short params, some long ones (like most test suites) """
+    rand    = random.Random(seed)
+    history = dict()
+    for index in range(count):
+        history["test_{0:03d}.py".format(index)] = {"success": True,
+                                                    "runtime": rand.lognormvariate(0, 1.2)}
+
+    for param in rand.sample(sorted(history), failures):
+        history[param]["success"] = False
+    return history
+
+
+def simulate(params, history, jobs: int):
+    """ Greedy list scheduling, returns the makespan and the first failure """
+    workers       = [0.0] * jobs
+    makespan      = 0.0
+    first_failure = None
+
+    for param in params:
+        start = heapq.heappop(workers)
+        end   = start + history[param]["runtime"]
+        heapq.heappush(workers, end)
+
+        makespan = max(makespan, end)
+        if not history[param]["success"]:
+            first_failure = end if first_failure is None else min(first_failure, end)
+
+    return makespan, first_failure
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) > 0 and not args[0].isdigit():
+        with open(args.pop(0), "r") as history_file:
+            history = json.load(history_file)
+    else:
+        history = synthetic_history()
+
+    jobs_list = [int(arg) for arg in args] or [1, 4, 8]
+
+    # The walk order is arbitrary, but stable (os.walk order of the files)
+    params = sorted(history)
+    total  = sum(entry["runtime"] for entry in history.values())
+    print("{0} params, {1} failed, {2:.1f} s in total".format(
+        len(params), sum(not entry["success"] for entry in history.values()), total))
+
+    for jobs in jobs_list:
+        print("\njobs = {0} (lower bound: {1:.1f} s)".format(
+            jobs, max(total / jobs, max(entry["runtime"] for entry in history.values()))))
+        for policy in CyBldRunnerSchedulePolicy:
+            ordered                 = schedule_params(params, policy, history.get)
+            makespan, first_failure = simulate(ordered, history, jobs)
+            print("{0:<15} makespan {1:>8.1f} s   first failure {2:>8} s".format(
+                policy.name, makespan, "-" if first_failure is None else "{0:.1f}".format(first_failure)))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ import argparse
 import logging
 import sys
 import os
+import tempfile
+import time
 
 # Need to setup logging before imports
 # Python lets a random library (neovim) eat my log output otherwise
@@ -24,8 +26,12 @@ from cybld import cybld_config                              # noqa: E402
 from cybld import cybld_helpers                             # noqa: E402
 from cybld import cybld_ipc_server                          # noqa: E402
 from cybld import cybld_templates                           # noqa: E402
+from cybld import cybld_log_archive                         # noqa: E402
+from cybld import cybld_ipc_neovim                          # noqa: E402
+from cybld import cybld_runner_store                        # noqa: E402
 from cybld.cybld_shared_status import CyBldSharedStatus     # noqa: E402
 from cybld.cybld_config_runner import CyBldConfigRunner     # noqa: E402
+from cybld.cybld_runner_results import CyBldRunnerResults, CyBldRunnerSingleResult  # noqa: E402
 
 # --------------------------------------------------------------------------
 
@@ -47,6 +53,15 @@ def main():
     parser.add_argument("-a", '--addtemplate', help='Add a template to the config file')
     parser.add_argument("-s", '--status', help='Print the status of running IPC instances (i. e. for status line)',
                         action="store_true")
+    parser.add_argument("-l", '--logs', help='List the archived logs (requires log_archive)',
+                        action="store_true")
+    parser.add_argument("-o", '--openlog', metavar="GROUP/ID",
+                        help='Load the archived log with the given id (as listed by --logs) into the quickfix '
+                             'list of neovim (when running inside neovim), print it otherwise')
+    parser.add_argument("-r", '--runs', help='List the stored runner runs (requires result_store)',
+                        action="store_true")
+    parser.add_argument("-d", '--rundiff', metavar="ID",
+                        help='Compare the latest run of a runner with the given earlier run (as listed by --runs)')
 
     clt_parser    = parser.add_argument_group("client arguments", "Arguments available only to the client. " +
                                               "One argument is required (otherwise a server session is started).")
@@ -68,6 +83,8 @@ def main():
         exit(0)
 
     handle_templates(args)
+    handle_logs(args)
+    handle_runs(args)
 
     if not os.path.isdir(cybld_helpers.get_base_path()):
         os.makedirs(cybld_helpers.get_base_path())
@@ -128,6 +145,18 @@ def handle_ipc_server():
                                                                                  config.get_command_group_cmd1(
                                                                                      command_group_section),
                                                                                  config.get_command_group_cmd2(
+                                                                                     command_group_section),
+                                                                                 config.get_command_group_queue_policy(
+                                                                                     command_group_section),
+                                                                                 config.get_command_group_preempt(
+                                                                                     command_group_section),
+                                                                                 config.get_command_group_error_regex(
+                                                                                     command_group_section),
+                                                                                 config.get_command_group_warning_regex(
+                                                                                     command_group_section),
+                                                                                 config.get_command_group_abort_on_error(
+                                                                                     command_group_section),
+                                                                                 config.get_command_group_debounce_ms(
                                                                                      command_group_section))
 
         if (command_group.env_regex_matches() and command_group.file_regex_matches() and
@@ -158,13 +187,102 @@ def handle_templates(args):
         config.add_command_group(cybld_templates.templates[args.addtemplate])
         exit(0)
 
+def handle_logs(args):
+    if not args.logs and not args.openlog:
+        return
+
+    config   = cybld_config.CyBldConfig()
+    archives = cybld_log_archive.get_archives(config.get_log_archive_dir())
+
+    if args.logs:
+        for archive in archives:
+            for entry in archive.get_entries():
+                print("{0:<24} {1} {2:>8.2f}s exit {3:>3} {4:>9}  {5}".format(
+                      "{0}/{1}".format(archive.name, entry["id"]),
+                      time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["start"])),
+                      entry["duration"], entry["exit"],
+                      cybld_helpers.format_size(entry["raw_size"]), entry["command"]))
+        exit(0)
+
+    group, _, entry_id = args.openlog.rpartition("/")
+    for archive in archives:
+        if archive.name == group and entry_id.isdigit():
+            entry = archive.get_entry(int(entry_id))
+            if entry is not None:
+                log = archive.read_log(entry)
+                if not open_log_in_neovim(log):
+                    sys.stdout.buffer.write(log)
+                exit(0)
+
+    logging.error("Archived log " + args.openlog + " does not exist (refer to --logs).")
+    exit(1)
+
+
+def open_log_in_neovim(log: bytes) -> bool:
+    """ Load the log into the quickfix list of the surrounding neovim (False if there is none) """
+    nvim_ipc = os.getenv('NVIM_LISTEN_ADDRESS', "")
+    if len(nvim_ipc) == 0 or not cybld_ipc_neovim.neovim_available:
+        return False
+
+    # neovim has parsed the file once cfile returns
+    with tempfile.NamedTemporaryFile(prefix="cybld_log_", suffix=".log") as logfile:
+        logfile.write(log)
+        logfile.flush()
+        return cybld_ipc_neovim.load_logfile(nvim_ipc, logfile.name)
+
+
+def handle_runs(args):
+    if not args.runs and not args.rundiff:
+        return
+
+    store = cybld_runner_store.CyBldRunnerStore(cybld_runner_store.get_default_store_path())
+
+    if args.runs:
+        for run in store.get_runs():
+            print("{0:<8} {1:<24} {2} {3:>6} params {4:>6} failed  {5}".format(
+                  run.run_id, run.runner, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run.start)),
+                  run.params, run.failed, run.cwd))
+        exit(0)
+
+    earlier_run = store.get_run(int(args.rundiff)) if args.rundiff.isdigit() else None
+    if earlier_run is None:
+        logging.error("Runner run " + args.rundiff + " does not exist (refer to --runs).")
+        exit(1)
+
+    latest_id = store.get_earlier_run_id(earlier_run.runner, 0, earlier_run.cwd)
+    results   = CyBldRunnerResults()
+    for param, result in sorted(store.get_results(latest_id).items()):
+        single_result = CyBldRunnerSingleResult(earlier_run.runner, param)
+        single_result.set_result(result, 0)
+        results.add_result(single_result)
+
+    results.print_results()
+    results.print_comparison(store.get_results(earlier_run.run_id),
+                             "TEST RESULTS OF RUN {0} (LATEST: {1})".format(earlier_run.run_id, latest_id))
+    exit(0)
+
+
 def transform_config_settings(config):
     return CyBldConfigSettings(config.get_notify_success(), config.get_notify_fail(),
                                config.get_bell_success(),   config.get_bell_fail(),
                                config.get_tmux_success(),   config.get_tmux_fail(),
                                config.get_allow_multiple(), config.get_print_stats(),
                                config.get_talk(),           config.get_notify_timeout(),
-                               config.get_tmux_refresh_status())
+                               config.get_tmux_refresh_status(),
+                               capture_limit_kb      = config.get_capture_limit_kb(),
+                               kill_grace_period     = config.get_kill_grace_period(),
+                               max_concurrency       = config.get_max_concurrency(),
+                               exec_backend          = config.get_exec_backend(),
+                               print_timing          = config.get_print_timing(),
+                               nvim_streaming        = config.get_nvim_streaming(),
+                               nvim_stream_interval  = config.get_nvim_stream_interval(),
+                               rate_limit            = config.get_rate_limit(),
+                               rate_limit_burst      = config.get_rate_limit_burst(),
+                               log_archive           = config.get_log_archive(),
+                               log_archive_dir       = config.get_log_archive_dir(),
+                               log_archive_max_count = config.get_log_archive_max_count(),
+                               log_archive_max_mb    = config.get_log_archive_max_mb(),
+                               tmux_backend          = config.get_tmux_backend())
 
 
 def transform_runners(config):
@@ -172,7 +290,19 @@ def transform_runners(config):
     for config_runner in config.get_runners():
         transformed_runner = CyBldConfigRunner(config_runner,
                                                config.get_runner_command(config_runner),
-                                               config.get_runner_regex_find_params(config_runner))
+                                               config.get_runner_regex_find_params(config_runner),
+                                               config.get_runner_jobs(config_runner),
+                                               config.get_runner_incremental(config_runner),
+                                               schedule     = config.get_runner_schedule(config_runner),
+                                               exclude_dirs = config.get_runner_exclude_dirs(config_runner),
+                                               watch        = config.get_runner_watch(config_runner),
+                                               batch_size   = config.get_runner_batch_size(config_runner),
+                                               fail_regex   = config.get_runner_fail_regex(config_runner),
+                                               timeout      = config.get_runner_timeout(config_runner),
+                                               hang_timeout = config.get_runner_hang_timeout(config_runner),
+                                               retries      = config.get_runner_retries(config_runner),
+                                               result_store = config.get_runner_result_store(config_runner),
+                                               compare_to   = config.get_runner_compare_to(config_runner))
         transformed_configs.append(transformed_runner)
 
     return transformed_configs
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import re
+
+# --------------------------------------------------------------------------
+
+ESC = 0x1b
+BEL = 0x07
+
+_STATE_TEXT         = 0
+_STATE_ESCAPE       = 1
+_STATE_CSI          = 2
+_STATE_STRING       = 3
+_STATE_STRING_ESC   = 4
+
+# Parameter and intermediate bytes of a CSI sequence
+_CSI_BODY      = re.compile(rb'[0-?]*[ -/]*')
+# Intermediate bytes of a plain escape sequence (i. e. ESC ( B)
+_INTERMEDIATES = re.compile(rb'[ -/]*')
+# End of an OSC/DCS/... string (BEL or the ESC of ESC \)
+_STRING_END    = re.compile(rb'[\x07\x1b]')
+
+# Bytes introducing a string sequence (OSC, DCS, SOS, PM, APC)
+_STRING_INTRODUCERS = b']PX^_'
+
+# --------------------------------------------------------------------------
+
+class CyBldAnsiStripper:
+    """
+    Stateful stripper for ANSI escape sequences (CSI, OSC and friends).
+
+    Sequences may be split across chunk boundaries, the stripper simply
+    remembers in which part of a sequence the previous chunk ended. Nothing
+    is buffered, so the memory usage does not depend on the output size.
+
+    Works on bytes: ESC can't be part of a multibyte UTF-8 character, so the
+    output does not have to be decoded.
+    """
+
+    def __init__(self):
+        self._state = _STATE_TEXT
+
+    def feed(self, chunk: bytes) -> bytes:
+        """
+        Strip all escape sequences from the given chunk.
+
+        :param chunk: The next chunk of the output.
+        :type chunk:  bytes
+
+        :rtype: bytes
+        :return: The text of the chunk without escape sequences.
+        """
+        # Fast path: most chunks of a build log don't contain any colors
+        if self._state == _STATE_TEXT and ESC not in chunk:
+            return chunk
+
+        text  = bytearray()
+        index = 0
+        end   = len(chunk)
+
+        while index < end:
+            if self._state == _STATE_TEXT:
+                esc_index = chunk.find(b'\x1b', index)
+                if esc_index < 0:
+                    text += chunk[index:]
+                    break
+
+                text += chunk[index:esc_index]
+                index = esc_index + 1
+                self._state = _STATE_ESCAPE
+
+            elif self._state == _STATE_ESCAPE:
+                introducer = chunk[index]
+                index += 1
+                if introducer == ord('['):
+                    self._state = _STATE_CSI
+                elif introducer in _STRING_INTRODUCERS:
+                    self._state = _STATE_STRING
+                else:
+                    # i. e. ESC ( B, the final byte ends the sequence
+                    index = _INTERMEDIATES.match(chunk, index - 1).end()
+                    if index < end:
+                        index += 1
+                        self._state = _STATE_TEXT
+
+            elif self._state == _STATE_CSI:
+                index = _CSI_BODY.match(chunk, index).end()
+                if index < end:
+                    # Swallow the final byte (or drop a malformed sequence)
+                    if 0x40 <= chunk[index] <= 0x7e:
+                        index += 1
+                    self._state = _STATE_TEXT
+
+            elif self._state == _STATE_STRING:
+                match = _STRING_END.search(chunk, index)
+                if match is None:
+                    break
+
+                index = match.end()
+                if chunk[match.start()] == BEL:
+                    self._state = _STATE_TEXT
+                else:
+                    self._state = _STATE_STRING_ESC
+
+            elif self._state == _STATE_STRING_ESC:
+                # ESC \ terminates the string, any other ESC starts a new sequence
+                if chunk[index] == ord('\\'):
+                    index += 1
+                    self._state = _STATE_TEXT
+                else:
+                    self._state = _STATE_ESCAPE
+
+        return bytes(text)
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from collections import deque
+
+from cybld import cybld_helpers
+
+# --------------------------------------------------------------------------
+
+class CyBldCaptureBuffer:
+    """
+    Keeps the most recent output of a command in memory (i. e. for the
+    summary in the fail notification, refer to last_line).
+
+    Only the last `limit` bytes are kept. Everything older is only available
+    in the log file, which gets the complete output anyway (CyBldLogWriter).
+
+    :param limit: How many bytes should be kept in memory at most.
+    :type limit:  int
+    """
+
+    def __init__(self, limit: int):
+        self.limit           = max(0, limit)
+        self.total_bytes     = 0
+        self.high_water_mark = 0
+
+        self._chunks = deque()
+        self._size   = 0
+
+    def write(self, chunk: bytes):
+        """ Sink which appends the chunk and drops the oldest output if needed """
+        self.total_bytes += len(chunk)
+
+        if self.limit == 0 or len(chunk) == 0:
+            return
+
+        if len(chunk) > self.limit:
+            chunk = chunk[-self.limit:]
+
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+
+        # Drop whole chunks first and only cut the oldest remaining one
+        while self._size - len(self._chunks[0]) >= self.limit:
+            self._size -= len(self._chunks.popleft())
+
+        excess = self._size - self.limit
+        if excess > 0:
+            self._chunks[0] = self._chunks[0][excess:]
+            self._size     -= excess
+
+        self.high_water_mark = max(self.high_water_mark, self._size)
+
+    def tail(self) -> bytes:
+        """ Returns the output which is still kept in memory """
+        return b"".join(self._chunks)
+
+    def last_line(self) -> str:
+        """
+        Returns the last non-empty line which is still kept in memory (i. e.
+        the summary of a failed command), empty if there is none.
+        """
+        lines = self.tail().split(b"\n")
+
+        # The first line is incomplete if older output has been dropped
+        if self.spilled_bytes > 0 and len(lines) > 1:
+            lines = lines[1:]
+
+        for line in reversed(lines):
+            line = line.strip()
+            if len(line) > 0:
+                return line.decode(errors="replace")
+        return ""
+
+    @property
+    def spilled_bytes(self) -> int:
+        """ How many bytes are only available in the log file """
+        return self.total_bytes - self._size
+
+    def get_usage_str(self) -> str:
+        """ Returns a printable representation of the memory usage """
+        return "output: {0} (in memory peak: {1} of {2})".format(
+            cybld_helpers.format_size(self.total_bytes), cybld_helpers.format_size(self.high_water_mark),
+            cybld_helpers.format_size(self.limit))
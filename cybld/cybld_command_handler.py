@@ -6,26 +6,42 @@
 #
 # --------------------------------------------------------------------------
 
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import atexit
 import logging
 import os
 import pty
 import subprocess
-import tempfile
 import threading
 import time
 import termios
-import errno
-import re
 
-from cybld import cybld_command_stats, cybld_talker, cybld_ipc_message, cybld_helpers
+from cybld import cybld_command_stats, cybld_talker, cybld_ipc_message, cybld_helpers, cybld_pty_reader
+from cybld import cybld_rusage, cybld_ipc_neovim, cybld_log_archive, cybld_terminal
+from cybld.cybld_capture_buffer import CyBldCaptureBuffer
+from cybld.cybld_command_slot import CyBldCommandSlot
 from cybld.cybld_config_command_group import CyBldConfigCommandGroup
 from cybld.cybld_config_runner import CyBldConfigRunner
 from cybld.cybld_config_settings import CyBldConfigSettings
+from cybld.cybld_exec_queue import CyBldExecQueue, CyBldExecRequest
 from cybld.cybld_ipc_message import CyBldIpcMessage
-from cybld.cybld_ipc_neovim import CyBldIpcNeovim
+from cybld.cybld_ipc_neovim import CyBldIpcNeovim, CyBldIpcNeovimStream
+from cybld.cybld_line_prefixer import CyBldLinePrefixer
+from cybld.cybld_log_archive import CyBldLogArchive
+from cybld.cybld_log_writer import CyBldLogWriter
+from cybld.cybld_output_matcher import CyBldOutputMatcher
+from cybld.cybld_phase_timer import CyBldPhase, CyBldPhaseTimer
+from cybld.cybld_pty_reader import CyBldPtyReader
+from cybld.cybld_rate_limit import CyBldDebouncer, CyBldTokenBucket
 from cybld.cybld_runner import CyBldRunner
 from cybld.cybld_shared_status import CyBldSharedStatus
+from cybld.cybld_warm_shell import CyBldExecBackend, CyBldWarmShell
+
+# --------------------------------------------------------------------------
+
+# How long the footer waits for the notifications if print_timing is set (seconds)
+NOTIFY_TIMING_TIMEOUT = 2.0
 
 # --------------------------------------------------------------------------
 
@@ -34,10 +50,23 @@ class CyBldCommandHandler:
     Helper class to set and execute commands.
 
     Some notes:
-        - Commands are executed in a seperate thread and only
-          one command can be executed at any given time (busy flag)
+        - Commands are executed by a pool of worker threads (one per slot).
+          Every command slot (cmd0, cmd1, cmd2) can execute one command at
+          any given time and at most max_concurrency slots can be busy at
+          the same time.
+        - Updates of the shared status and notifications are handed to a
+          single background thread, so they never block a command and are
+          applied in order.
+        - Commands which are triggered while their slot is busy are queued
+          (refer to CyBldExecQueue). With preempt enabled, the running
+          command of the slot is cancelled in addition.
+        - If commands may run at the same time, their output lines are
+          prefixed with the slot name
         - Commands can be changed while a command is running (not protected
           by busy flag)
+        - Bursts of exec requests for the same command can be debounced, all
+          set/exec messages can be rate limited (refer to CyBldDebouncer and
+          CyBldTokenBucket)
 
     :param command_group:    Refer to CyBldConfigCommandGroup.
 
@@ -48,20 +77,23 @@ class CyBldCommandHandler:
     :param success_callback: Which function (i. e. notify success) to call
                              when the command returned 0.
     :param fail_callback:    Which function (i. e. notify fail) to call
-                             when the command returned not 0 or if we
-                             are busy.
+                             when the command returned not 0.
+    :param early_fail_callback: Which function (i. e. notify early fail) to
+                                call when the first error shows up in the
+                                output (optional).
     """
 
     def __init__(self, command_group: CyBldConfigCommandGroup,
                  runner_configs, settings: CyBldConfigSettings,
-                 success_callback, fail_callback):
+                 success_callback, fail_callback, early_fail_callback = None):
         assert success_callback is not None
         assert fail_callback is not None
 
-        self.command_group    = command_group
-        self.success_callback = success_callback
-        self.fail_callback    = fail_callback
-        self.settings         = settings
+        self.command_group       = command_group
+        self.success_callback    = success_callback
+        self.fail_callback       = fail_callback
+        self.early_fail_callback = early_fail_callback
+        self.settings            = settings
 
         self.runner_configs  = runner_configs
         self.runners         = []
@@ -70,7 +102,26 @@ class CyBldCommandHandler:
         self.stats            = cybld_command_stats.CyBldCommandStatsList()
         self.talker           = cybld_talker.CyBldTalker(settings.talk)
 
-        self.busy             = False
+        self.slots            = [CyBldCommandSlot(0), CyBldCommandSlot(1), CyBldCommandSlot(2)]
+        self.exec_queue       = CyBldExecQueue(command_group.queue_policy)
+        self._busy_lock       = threading.Lock()
+        self._output_lock     = threading.Lock()
+        self._status_running  = False
+        self._status_failed   = False
+
+        self._exec_executor   = ThreadPoolExecutor(max_workers = len(self.slots))
+        self._side_executor   = ThreadPoolExecutor(max_workers = 1)
+
+        self.debouncer        = CyBldDebouncer(command_group.debounce_ms / 1000, self._exec_cmd)
+        self.rate_limiter     = CyBldTokenBucket(settings.rate_limit, settings.rate_limit_burst)
+        self._rate_limited    = False
+
+        self.log_archive      = None
+        if settings.log_archive:
+            archive_dir       = settings.log_archive_dir or cybld_log_archive.get_default_archive_dir()
+            self.log_archive  = CyBldLogArchive(archive_dir, command_group.name,
+                                                settings.log_archive_max_count,
+                                                settings.log_archive_max_mb * 1024 * 1024)
 
         self.shared_status = CyBldSharedStatus(False, self.command_group.name,
                                                settings.tmux_refresh_status)
@@ -112,20 +163,51 @@ class CyBldCommandHandler:
         runner = CyBldRunner(valid_runner_config)
         self.runners.append(runner)
 
-    def handle_incoming_ipc_message(self, ipc_message: CyBldIpcMessage):
+    def _release_unused_runners(self):
+        """
+        Close the runners which are not used by any command anymore (i. e.
+        after changing a command). Runners which are still running are kept.
+        """
+        commands = [self.command_group.cmd0, self.command_group.cmd1, self.command_group.cmd2]
+        with self._busy_lock:
+            running = [slot.command for slot in self.slots if slot.busy]
+
+        unused = [runner for runner in self.runners
+                  if runner.config.name not in commands and runner.config.name not in running]
+
+        # Replace the list instead of modifying it (workers iterate over it)
+        self.runners = [runner for runner in self.runners if runner not in unused]
+        for runner in unused:
+            runner.close()
+
+    def handle_incoming_ipc_message(self, ipc_message: CyBldIpcMessage, timer: CyBldPhaseTimer = None):
         """
         Handle the incoming message by calling exec_cmd.
         Note that this quits immediately in case the codeword is invalid.
 
         :param ipc_message: The incoming command.
+        :param timer:       Timer which has been started when the message was
+                            received (a new one is started if not given).
         """
+        if timer is None:
+            timer = CyBldPhaseTimer()
+
         if not self.command_group.codeword_regex_matches(ipc_message.codeword):
             return
 
+        if not self.rate_limiter.try_acquire():
+            # Only log the first message of a flood
+            if not self._rate_limited:
+                logging.warning("Rate limit exceeded, dropping messages")
+            self._rate_limited = True
+            return
+        self._rate_limited = False
+
         if ipc_message.cmd_type == cybld_ipc_message.CyBldIpcMessageType.set_cmd:
             self._change_cmd(ipc_message.cmd_number, ipc_message.setcmd_param)
         elif ipc_message.cmd_type == cybld_ipc_message.CyBldIpcMessageType.exec_cmd:
-            self._exec_cmd(ipc_message.cmd_number, ipc_message.nvim_ipc)
+            self.debouncer.trigger(ipc_message.cmd_number, ipc_message.cmd_number,
+                                   ipc_message.nvim_ipc, timer)
         else:
             assert False
 
@@ -147,146 +229,527 @@ class CyBldCommandHandler:
 
         if self.command_group.is_cmd_runner_command(new_cmd):
             self._initialize_runner(new_cmd)
+        self._release_unused_runners()
 
         logging.info("Setting {0} to {1}".format(str(cmd_number), str(new_cmd)))
         cybld_helpers.print_seperator_lines()
 
-    def _exec_cmd(self, cmd_number: int, nvim_ipc: str):
+    def _exec_cmd(self, cmd_number: int, nvim_ipc: str, timer: CyBldPhaseTimer):
         """
-        Execute the given command in a new thread (if we aren't busy)
+        Execute the given command in a new thread. If its slot is busy (or the
+        max. concurrency is reached), the request is queued instead (refer to
+        CyBldExecQueue).
 
         :param cmd_number: The command number which should be executed
         :param nvim_ipc:   The NVIM IPC name, if available
+        :param timer:      The timer of the request (refer to CyBldPhaseTimer)
         """
-        # TODO: give the option to kill the existing task instead
-        if self.busy is True:
-            self.fail_callback("currently busy")
+        request = CyBldExecRequest(cmd_number, nvim_ipc, timer)
+        slot    = self.slots[cmd_number]
+
+        with self._busy_lock:
+            if self._is_ready(request):
+                self._claim_slot(request)
+                queued = None
+            else:
+                self.exec_queue.push(request)
+                queued = len(self.exec_queue)
+
+                # While holding the lock, so that the run which is cancelled
+                # is the one which is running (and not the next one)
+                if self.command_group.preempt and slot.busy:
+                    logging.info("Cancelling the running {0} (preempt)".format(slot.name))
+                    slot.cancel(self.settings.kill_grace_period)
+
+        if queued is None:
+            self._start_worker(request)
             return
 
-        cmd_translated = None
-        if cmd_number is 0:
-            cmd_translated = self.command_group.cmd0
-        elif cmd_number is 1:
-            cmd_translated = self.command_group.cmd1
-        elif cmd_number is 2:
-            cmd_translated = self.command_group.cmd2
+        logging.info("Busy, queued cmd{0} ({1} pending)".format(str(cmd_number), str(queued)))
+        self._dispatch(self.shared_status.set_queue_depth, queued)
 
-        if cmd_translated is not None:
-            task = threading.Thread(target = self._exec_cmd_helper, args = (cmd_translated,
-                                                                            nvim_ipc,))
-            task.start()
-        else:
-            assert False
+    @property
+    def busy(self) -> bool:
+        """ Whether any command is running at the moment """
+        return any(slot.busy for slot in self.slots)
+
+    def _is_ready(self, request: CyBldExecRequest) -> bool:
+        """
+        Check whether the request can be started right away: its slot is free,
+        the max. concurrency is not reached and the same command is not
+        running in another slot. Needs to be called with the busy lock held.
+        """
+        if self.slots[request.cmd_number].busy:
+            return False
+
+        running = [slot for slot in self.slots if slot.busy]
+        if len(running) >= self.settings.max_concurrency:
+            return False
+
+        cmd = self._translate_cmd(request.cmd_number)
+        for slot in running:
+            if slot.command == cmd:
+                return False
+
+        return True
+
+    def _claim_slot(self, request: CyBldExecRequest):
+        """
+        Mark the slot of the request busy and reset its state for the new run.
+        Needs to be called with the busy lock held, so that a cancel always
+        refers to the run which currently owns the slot.
+        """
+        slot      = self.slots[request.cmd_number]
+        slot.busy = True
+        slot.start(self._translate_cmd(request.cmd_number))
 
-    def _exec_cmd_helper(self, cmd: str, nvim_ipc: str):
+    def _start_worker(self, request: CyBldExecRequest):
+        """ Execute the given request (its slot has to be claimed) in a worker thread """
+        future = self._exec_executor.submit(self._exec_cmd_worker, request)
+        future.add_done_callback(_log_exception)
+
+    def _exec_cmd_worker(self, request: CyBldExecRequest):
+        """
+        Execute the given request. Afterwards, start every queued request
+        which is ready now.
+
+        :param request: The request which should be executed
+        """
+        slot = self.slots[request.cmd_number]
+
+        try:
+            self._exec_cmd_helper(slot, slot.command, request.nvim_ipc, request.timer)
+        finally:
+            next_requests = []
+            with self._busy_lock:
+                slot.busy = False
+
+                next_request = self.exec_queue.pop(self._is_ready)
+                while next_request is not None:
+                    self._claim_slot(next_request)
+                    next_requests.append(next_request)
+                    next_request = self.exec_queue.pop(self._is_ready)
+
+                queued = len(self.exec_queue)
+
+            self._dispatch(self.shared_status.set_queue_depth, queued)
+            for next_request in next_requests:
+                self._start_worker(next_request)
+
+    def cancel(self):
+        """
+        Cancel all running commands: the whole process groups get a SIGTERM
+        (and a SIGKILL after the configured grace period). Queued requests
+        are not affected.
+        """
+        with self._busy_lock:
+            for slot in self.slots:
+                if slot.busy:
+                    slot.cancel(self.settings.kill_grace_period)
+
+    def shutdown(self):
+        """
+        Cancel all running commands, drop the queued requests and wait until
+        the workers and all pending status updates/notifications are done.
+        Afterwards, the runners are closed.
+        """
+        self.debouncer.cancel_all()
+        with self._busy_lock:
+            while self.exec_queue.pop() is not None:
+                pass
+
+        self.cancel()
+        self._exec_executor.shutdown(wait = True)
+        self._side_executor.shutdown(wait = True)
+
+        for runner in self.runners:
+            runner.close()
+
+    def _dispatch(self, function, *args):
+        """
+        Run the given function (status update, notification or archiving a
+        log) in the background thread. The functions are executed in order.
+
+        :return: The future of the function.
+        """
+        future = self._side_executor.submit(function, *args)
+        future.add_done_callback(_log_exception)
+        return future
+
+    def _translate_cmd(self, cmd_number: int) -> str:
+        """
+        Get the current command string for the given command number.
+
+        :param cmd_number: The command number (0, 1 or 2)
+        """
+        if cmd_number == 0:
+            return self.command_group.cmd0
+        elif cmd_number == 1:
+            return self.command_group.cmd1
+        elif cmd_number == 2:
+            return self.command_group.cmd2
+
+        assert False
+
+    def _exec_cmd_helper(self, slot: CyBldCommandSlot, cmd: str, nvim_ipc: str,
+                         timer: CyBldPhaseTimer):
         """
         Helper function to execute the given command and call the success/fail callbacks
 
+        :param slot:        The slot in which the command is executed
         :param cmd:         The command (full string) which should be executed
         :param nvim_ipc:    The NVIM IPC name, if available
+        :param timer:       The timer of the request (refer to CyBldPhaseTimer)
         """
-        assert self.busy is False
+        assert slot.busy is True
+
+        timer.mark(CyBldPhase.dispatched)
+
+        self._set_status_running()
 
-        self.shared_status.set_running()
-        self.busy = True
-        os.system("clear")
+        with self._output_lock:
+            if not self._is_concurrent():
+                cybld_terminal.clear_screen()
         logging.info("Executing cmd {0}".format(cmd))
 
-        start = time.time()
+        start = time.monotonic()
 
-        success = False
+        capture = None
+        matcher = None
         if self.command_group.is_cmd_runner_command(cmd):
-            for runner in self.runners:
-                if runner.config.name == cmd:
-                    success = runner.run_all()
-                    break
+            success, usage = self._exec_runner(slot, cmd, timer)
         else:
-            # The code block below essentially just "tees" the stdout and
-            # stderr to a log file, while still preserving the terminal
-            # output (inclusive colors).
-            # Using subprocess.PIPE does not seem possible under Darwin,
-            # since the pipe does not have the isatty flag set (the isatty
-            # flag affects the color output).
-            # Note that the file is only written at the end and not streamed.
-            master, slave = pty.openpty()
-
-            # This prevents LF from being converted to CRLF
-            attr = termios.tcgetattr(slave)
-            attr[1] = attr[1] & ~termios.ONLCR
-            termios.tcsetattr(slave, termios.TCSADRAIN, attr)
-
-            proc = subprocess.Popen(cmd, shell=True, stdout=slave, stderr=slave, close_fds=False)
-
-            # Close the write end of the pipe in this process, since we don't need it.
-            # Otherwise we would not get EOF etc.
-            os.close(slave)
-
-            read_stdout_stderr = os.fdopen(master, 'rb', buffering=0)
-            complete_output    = ""
-
-            try:
-                while proc.poll() is None:
-                    output = read_stdout_stderr.readline()
-                    os.write(1, output)
-                    complete_output += output.decode()
-
-                # Read the last line
-                output = read_stdout_stderr.readline()
-                os.write(1, output)
-                complete_output += output.decode()
-            # This error is "expected" under Linux systems.
-            # readline() doesn't seem to behave properly there.
-            # The exception does not occur on MacOS.
-            except OSError as oserr:
-                if oserr.errno != errno.EIO or proc.poll() is None:
-                    logging.critical("Unexpected OS error: {0}".format(oserr))
-            except:
-                logging.critical("Unexpected error while reading from process")
-
-            os.close(master)
-            proc.wait()
-
-            if proc.returncode == 0:
-                success = True
-
-            logfile, logfilename = tempfile.mkstemp(dir=cybld_helpers.get_base_path(),
-                                                    prefix=cybld_helpers.NVIM_LOG_PREFIX)
-
-            # strip color codes from logfile
-            # complete_output = re.sub(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]', '', complete_output)
-            complete_output = re.sub(r'\x1b(\[.*?[@-~]|\].*?(\x07|\x1b\\))', '', complete_output)
-
-            with open(logfile, 'w+') as logfile_opened:
-                logfile_opened.write(complete_output)
-
-            CyBldIpcNeovim(True, nvim_ipc, logfilename, cmd)
-
-        end = time.time()
-
-        self.busy = False
-        cybld_helpers.print_seperator_lines()
-
-        timediff_in_seconds = str(int(end - start))
-
+            success, capture, usage, matcher = self._exec_shell_cmd(slot, cmd, nvim_ipc, timer)
+
+        end = time.monotonic()
+
+        # Killed after the first error, but might have exited with 0 anyway
+        success = success and not slot.aborted
+
+        timediff_in_seconds = "{0:.2f}".format(end - start)
+
+        # Notify first (in the background), the footer only has to wait for the output lock
+        if not slot.cancelled:
+            self._set_status_finished(slot, success)
+            summary = capture.last_line() if capture is not None and not success else ""
+            notified = self._dispatch(self._notify, cmd, success, timer, summary)
+
+            # The timing line should include the notifications, but never wait forever
+            if self.settings.print_timing:
+                wait([notified], timeout = NOTIFY_TIMING_TIMEOUT)
+
+        with self._output_lock, cybld_terminal.buffered():
+            cybld_helpers.print_seperator_lines()
+
+            if slot.cancelled:
+                cybld_helpers.print_centered_text("CANCELLED: {0} ({1} seconds)".format(cmd, timediff_in_seconds),
+                                                  None)
+            elif success:
+                cybld_helpers.print_centered_text("SUCCESS: {0} ({1} seconds)".format(cmd, timediff_in_seconds),
+                                                  True)
+            elif slot.aborted:
+                cybld_helpers.print_centered_text("ABORTED: {0} ({1} seconds)".format(cmd, timediff_in_seconds),
+                                                  False)
+            else:
+                cybld_helpers.print_centered_text("FAIL: {0} ({1} seconds)".format(cmd, timediff_in_seconds),
+                                                  False)
+
+            if self.settings.print_stats:
+                cybld_helpers.print_centered_text(self.stats.get_command_stats(cmd), None)
+                if usage is not None:
+                    cybld_helpers.print_centered_text(usage.get_usage_str(end - start), None)
+                if capture is not None:
+                    cybld_helpers.print_centered_text(capture.get_usage_str(), None)
+                if matcher is not None:
+                    cybld_helpers.print_centered_text(matcher.get_matches_str(), None)
+                if self.debouncer.suppressed > 0 or self.rate_limiter.dropped > 0:
+                    cybld_helpers.print_centered_text(self.get_suppressed_str(), None)
+            elif capture is not None and capture.spilled_bytes > 0:
+                # Mention that the output was cut, even without the stats
+                cybld_helpers.print_centered_text(capture.get_usage_str(), None)
+
+            if self.settings.print_timing:
+                cybld_helpers.print_centered_text(timer.get_timing_str(), None)
+
+            if not slot.cancelled:
+                if success:
+                    self.talker.say_success()
+                else:
+                    self.talker.say_fail()
+
+            cybld_helpers.print_seperator_lines()
+
+        self.stats.update_command_stats(cmd, success, end - start, cancelled = slot.cancelled,
+                                        usage = usage, timing = timer)
+
+    def _notify(self, cmd: str, success: bool, timer: CyBldPhaseTimer, summary: str = ""):
+        """
+        Call the success/fail callback (runs in the background thread). The
+        fail callback gets the summary (last line of the output) as well.
+        """
         if success:
-            cybld_helpers.print_centered_text("SUCCESS: {0} ({1} seconds)".format(cmd, timediff_in_seconds), True)
-            self.shared_status.set_success()
+            self.success_callback(cmd)
+        elif len(summary) > 0:
+            self.fail_callback("{0}: {1}".format(cmd, summary))
         else:
-            cybld_helpers.print_centered_text("FAIL: {0} ({1} seconds)".format(cmd, timediff_in_seconds), False)
-            self.shared_status.set_fail()
+            self.fail_callback(cmd)
 
-        if self.settings.print_stats:
-            cybld_helpers.print_centered_text(self.stats.get_command_stats(cmd), None)
+        timer.mark(CyBldPhase.notified)
 
-        if success:
-            self.talker.say_success()
+    def get_suppressed_str(self) -> str:
+        """ Returns a printable representation of the suppressed triggers """
+        return "suppressed triggers: {0} debounced, {1} rate limited, {2} collapsed in queue".format(
+            self.debouncer.suppressed, self.rate_limiter.dropped, self.exec_queue.coalesced)
+
+    def _is_concurrent(self) -> bool:
+        """ Whether commands may be running at the same time (output gets prefixed) """
+        return self.settings.max_concurrency > 1
+
+    def _create_line_prefixer(self, slot: CyBldCommandSlot):
+        """ Sink which prefixes the output with the slot name (None if not concurrent) """
+        if not self._is_concurrent():
+            return None
+
+        prefix = "{0}[{1}]{2} ".format(cybld_helpers.SEPERATOR_COLOR, slot.name, cybld_helpers.COLOR_END)
+        return CyBldLinePrefixer(prefix.encode(), cybld_pty_reader.write_to_stdout, self._output_lock)
+
+    def _set_status_running(self):
+        """ Set the shared status to running (if it isn't already) """
+        with self._busy_lock:
+            if self._status_running:
+                return
+            self._status_running = True
+            self._status_failed  = False
+
+        self._dispatch(self.shared_status.set_running)
+
+    def _set_status_finished(self, slot: CyBldCommandSlot, success: bool):
+        """
+        Set the shared status to success/fail once no other command is
+        running anymore. A fail of any of the concurrent commands wins.
+        """
+        with self._busy_lock:
+            self._status_failed = self._status_failed or not success
+
+            for other_slot in self.slots:
+                if other_slot is not slot and other_slot.busy:
+                    return
+
+            self._status_running = False
+            failed               = self._status_failed
+
+        if failed:
+            self._dispatch(self.shared_status.set_fail)
         else:
-            self.talker.say_fail()
+            self._dispatch(self.shared_status.set_success)
 
-        cybld_helpers.print_seperator_lines()
-        self.stats.update_command_stats(cmd, success, int(timediff_in_seconds))
+    def _exec_runner(self, slot: CyBldCommandSlot, cmd: str, timer: CyBldPhaseTimer):
+        """
+        Run all params of the runner with the given name.
 
-        if success:
-            self.success_callback(cmd)
+        :param slot:  The slot in which the runner is executed
+        :param cmd:   The runner name
+        :param timer: The timer of the request (refer to CyBldPhaseTimer)
+        :return:     Tuple of success (True if every param succeeded) and the
+                     total CyBldResourceUsage of all params
+        """
+        for runner in self.runners:
+            if runner.config.name == cmd:
+                terminal = self._create_line_prefixer(slot)
+                if terminal is not None:
+                    runner.output = terminal.write
+
+                runner.reset_cancel()
+                slot.set_running_runner(runner, self.settings.kill_grace_period)
+                try:
+                    success = runner.run_all()
+                finally:
+                    slot.set_running_runner(None, self.settings.kill_grace_period)
+                    if terminal is not None:
+                        terminal.flush()
+                        runner.output = cybld_pty_reader.write_to_stdout
+                    timer.mark(CyBldPhase.exited)
+
+                return success, runner.results.get_total_usage()
+
+        return False, None
+
+    def _exec_shell_cmd(self, slot: CyBldCommandSlot, cmd: str, nvim_ipc: str,
+                        timer: CyBldPhaseTimer):
+        """
+        Execute the given shell command on a pty and tee the output to the
+        terminal and a log file (which is then forwarded to neovim).
+
+        :param slot:     The slot in which the command is executed
+        :param cmd:      The command (full string) which should be executed
+        :param nvim_ipc: The NVIM IPC name, if available
+        :param timer:    The timer of the request (refer to CyBldPhaseTimer)
+        :return:         Tuple of success (bool), the CyBldCaptureBuffer, the
+                         CyBldResourceUsage and the CyBldOutputMatcher (both
+                         None if not available)
+        """
+        # The code block below essentially just "tees" the stdout and
+        # stderr to a log file, while still preserving the terminal
+        # output (inclusive colors). The log file is written while the
+        # command is running (without colors).
+        # Using subprocess.PIPE does not seem possible under Darwin,
+        # since the pipe does not have the isatty flag set (the isatty
+        # flag affects the color output).
+        capture    = CyBldCaptureBuffer(self.settings.capture_limit_kb * 1024)
+        text_sinks = [capture.write]
+
+        matcher = None
+        if self.command_group.output_regex is not None:
+            matcher = CyBldOutputMatcher(self.command_group.output_regex,
+                                         lambda line: self._handle_first_error(slot, cmd, line))
+            text_sinks.append(matcher.write)
+
+        nvim_stream = None
+        if self.settings.nvim_streaming and cybld_ipc_neovim.should_do_ipc(True, nvim_ipc, cmd):
+            nvim_stream = CyBldIpcNeovimStream(nvim_ipc, cmd, self.settings.nvim_stream_interval,
+                                               self.command_group.output_regex)
+            if nvim_stream.start():
+                text_sinks.append(nvim_stream.write)
+            else:
+                nvim_stream = None
+
+        archive_record = None
+        if self.log_archive is not None:
+            archive_record = self.log_archive.start(cmd)
+            text_sinks.append(archive_record.write)
+
+        log_writer = CyBldLogWriter(text_sinks)
+
+        terminal = self._create_line_prefixer(slot)
+        if terminal is not None:
+            stdout_sinks = [terminal.write]
         else:
-            self.fail_callback(cmd)
+            stdout_sinks = [cybld_pty_reader.write_to_stdout]
+
+        sinks = [timer.on_output] + stdout_sinks + [log_writer.write]
+        returncode = -1
+        try:
+            if self.settings.exec_backend == CyBldExecBackend.warm_shell:
+                returncode = self._run_in_warm_shell(slot, cmd, sinks, timer)
+                # The commands are children of the warm shell, not of cybld
+                usage      = None
+            else:
+                returncode, usage = self._run_in_new_shell(slot, cmd, sinks, timer)
+        finally:
+            if archive_record is not None:
+                self._dispatch(archive_record.finish, returncode)
+
+        if terminal is not None:
+            terminal.flush()
+        if matcher is not None:
+            matcher.flush()
+
+        log_writer.close()
+        timer.mark(CyBldPhase.log_written)
+
+        # Load the whole log instead if streaming failed
+        if nvim_stream is not None and nvim_stream.finish():
+            timer.mark(CyBldPhase.neovim)
+        elif not slot.cancelled:
+            CyBldIpcNeovim(True, nvim_ipc, log_writer.path, cmd)
+            timer.mark(CyBldPhase.neovim)
+
+        # Neovim has already loaded it, the archive keeps the history
+        if self.log_archive is not None:
+            log_writer.remove()
+
+        return returncode == 0, capture, usage, matcher
+
+    def _handle_first_error(self, slot: CyBldCommandSlot, cmd: str, line: str):
+        """
+        Called (from the reading thread) as soon as the first error shows up
+        in the output of the given command.
+
+        :param slot: The slot in which the command is executed
+        :param cmd:  The command (full string)
+        :param line: The output line containing the error
+        """
+        if self.early_fail_callback is not None and not slot.cancelled:
+            # Don't block the output while notify-send & co are running
+            self._dispatch(self.early_fail_callback, "{0}: {1}".format(cmd, line))
+
+        if self.command_group.abort_on_error:
+            slot.abort(self.settings.kill_grace_period)
+
+    def _run_in_new_shell(self, slot: CyBldCommandSlot, cmd: str, sinks, timer: CyBldPhaseTimer):
+        """
+        Spawn a new shell on a new pty for the given command and forward its
+        output to the sinks until EOF.
+
+        :return: Tuple of the exit code and the CyBldResourceUsage of the command
+        """
+        master, slave = pty.openpty()
+
+        # This prevents LF from being converted to CRLF
+        attr = termios.tcgetattr(slave)
+        attr[1] = attr[1] & ~termios.ONLCR
+        termios.tcsetattr(slave, termios.TCSADRAIN, attr)
+
+        # Own process group, so that cancel() reaches all children
+        proc = subprocess.Popen(cmd, shell=True, stdout=slave, stderr=slave,
+                                start_new_session=True)
+        timer.mark(CyBldPhase.spawned)
+        slot.set_running_proc(proc, self.settings.kill_grace_period)
+
+        # Close the write end of the pipe in this process, since we don't need it.
+        # Otherwise we would not get EOF etc.
+        os.close(slave)
+
+        reader = CyBldPtyReader(master, sinks)
+
+        try:
+            reader.read_until_eof()
+        except OSError as oserr:
+            logging.critical("Unexpected OS error: {0}".format(oserr))
+        except:
+            logging.critical("Unexpected error while reading from process")
+
+        os.close(master)
+        returncode, usage = cybld_rusage.wait_for_process(proc)
+        timer.mark(CyBldPhase.exited)
+
+        slot.set_running_proc(None, self.settings.kill_grace_period)
+        return returncode, usage
+
+    def _run_in_warm_shell(self, slot: CyBldCommandSlot, cmd: str, sinks, timer: CyBldPhaseTimer) -> int:
+        """
+        Execute the given command in the warm shell of the slot (refer to
+        CyBldWarmShell) and forward its output to the sinks.
+
+        :return: The exit code of the command
+        """
+        if slot.warm_shell is None:
+            slot.warm_shell = CyBldWarmShell()
+
+        returncode = 1
+        try:
+            proc = slot.warm_shell.submit(cmd)
+            timer.mark(CyBldPhase.spawned)
+            slot.set_running_proc(proc, self.settings.kill_grace_period)
+            returncode = slot.warm_shell.wait(sinks)
+            timer.mark(CyBldPhase.exited)
+        except OSError as oserr:
+            logging.critical("Unexpected OS error: {0}".format(oserr))
+            slot.warm_shell.close()
+        except:
+            logging.critical("Unexpected error while reading from process")
+            slot.warm_shell.close()
+
+        slot.set_running_proc(None, self.settings.kill_grace_period)
+        return returncode
+
+# --------------------------------------------------------------------------
+
+def _log_exception(future):
+    """ Done callback which logs exceptions of background tasks (they would be lost otherwise) """
+    if future.cancelled():
+        return
+
+    exception = future.exception()
+    if exception is not None:
+        logging.critical("Unexpected error in background task: {0}".format(exception))
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import threading
+
+from cybld import cybld_process
+
+# --------------------------------------------------------------------------
+
+class CyBldCommandSlot:
+    """
+    Execution state of one command slot (cmd0, cmd1 or cmd2).
+
+    Every slot can run one command at a time, independent of the other slots.
+    Note that the busy flag is protected by the lock of CyBldCommandHandler,
+    the rest of the state by the lock of the slot itself.
+
+    :param number: The command number of the slot (0, 1 or 2)
+    :type number:  int
+    """
+
+    def __init__(self, number: int):
+        self.number    = number
+        self.busy      = False
+        self.command   = None
+        self.cancelled = False
+        self.aborted   = False
+
+        # Only used with the warm_shell exec backend (created on first use)
+        self.warm_shell = None
+
+        self._running_proc   = None
+        self._running_runner = None
+        self._lock           = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return "cmd" + str(self.number)
+
+    def start(self, command: str):
+        """ Reset the state for a new run of the given command """
+        with self._lock:
+            self.command   = command
+            self.cancelled = False
+            self.aborted   = False
+
+    def set_running_proc(self, proc, grace_period: float):
+        """
+        Remember the process (group) which is currently running, so that it
+        can be cancelled. Pass None once the process has finished.
+        """
+        with self._lock:
+            self._running_proc = proc
+            cancelled          = self.cancelled
+
+        # cancel() was called before the process existed
+        if proc is not None and cancelled:
+            cybld_process.terminate_process_group(proc.pid, grace_period)
+
+    def set_running_runner(self, runner, grace_period: float):
+        """ Remember the runner which is currently running (or None) """
+        with self._lock:
+            self._running_runner = runner
+            cancelled            = self.cancelled
+
+        # cancel() was called before the runner was started
+        if runner is not None and cancelled:
+            runner.cancel(grace_period)
+
+    def cancel(self, grace_period: float):
+        """
+        Cancel the running command: the whole process group gets a SIGTERM
+        (and a SIGKILL after the grace period).
+
+        :param grace_period: Seconds until SIGTERM is escalated to SIGKILL.
+        """
+        with self._lock:
+            self.cancelled = True
+            proc           = self._running_proc
+            runner         = self._running_runner
+
+        if proc is not None:
+            cybld_process.terminate_process_group(proc.pid, grace_period)
+        if runner is not None:
+            runner.cancel(grace_period)
+
+    def abort(self, grace_period: float):
+        """
+        Abort the running process (group), i. e. after the first error. In
+        contrast to cancel, the run counts as failed.
+
+        :param grace_period: Seconds until SIGTERM is escalated to SIGKILL.
+        """
+        with self._lock:
+            if self.aborted:
+                return
+            self.aborted = True
+            proc         = self._running_proc
+
+        if proc is not None:
+            cybld_process.terminate_process_group(proc.pid, grace_period)
@@ -6,10 +6,19 @@
 #
 # --------------------------------------------------------------------------
 
+from enum import Enum
+
 from cybld import cybld_helpers
 
 # --------------------------------------------------------------------------
 
+class CyBldCommandOutcome(Enum):
+    success   = 1
+    fail      = 2
+    cancelled = 3
+
+# --------------------------------------------------------------------------
+
 
 class CyBldCommandStatsList:
     """
@@ -19,7 +28,8 @@ class CyBldCommandStatsList:
     def __init__(self):
         self._command_stats = []
 
-    def update_command_stats(self, command: str, success_or_fail: bool, run_time: int):
+    def update_command_stats(self, command: str, success_or_fail: bool, run_time: float,
+                             cancelled: bool = False, usage = None, timing = None):
         """
         Update the statistics of the given command.
 
@@ -27,6 +37,12 @@ class CyBldCommandStatsList:
         :param success_or_fail: Whether the command was successful or not (ret 0
                                 means success)
         :param run_time:        How long the command took (in seconds)
+        :param cancelled:       Whether the command has been cancelled (i. e.
+                                preempted by a newer request)
+        :param usage:           The resource usage of the run (refer to
+                                CyBldResourceUsage), if available
+        :param timing:          The CyBldPhaseTimer of the run, if available
+                                (may still be running, i. e. notifications)
         """
         target_command = None
         for stored_command in self._command_stats:
@@ -37,7 +53,7 @@ class CyBldCommandStatsList:
             target_command = CyBldCommandStats(command)
             self._command_stats.append(target_command)
 
-        target_command.update_stats(success_or_fail, run_time)
+        target_command.update_stats(success_or_fail, run_time, cancelled, usage, timing)
 
     def get_command_stats(self, command: str) -> str:
         """
@@ -51,6 +67,33 @@ class CyBldCommandStatsList:
 
         return 'No previous runs recorded'
 
+    def get_last_timing(self, command: str):
+        """
+        Getter for the phase durations of the most recent run of the command.
+
+        :param command: The command as string
+        :return:        List of tuples of phase name and duration (ns) or None
+        """
+        for stored_command in self._command_stats:
+            if stored_command.command == command and len(stored_command.timings) > 0:
+                timer = stored_command.timings[-1]
+                return timer.get_phases() if timer is not None else None
+
+        return None
+
+    def get_last_usage(self, command: str):
+        """
+        Getter for the resource usage of the most recent run of the command.
+
+        :param command: The command as string
+        :return:        The CyBldResourceUsage or None if not available
+        """
+        for stored_command in self._command_stats:
+            if stored_command.command == command and len(stored_command.usages) > 0:
+                return stored_command.usages[-1]
+
+        return None
+
 # --------------------------------------------------------------------------
 
 
@@ -63,41 +106,72 @@ class CyBldCommandStats:
     """
 
     def __init__(self, command: str):
-        self._command    = command
-        self._exit_codes = []
-        self._run_times  = []
+        self._command   = command
+        self._outcomes  = []
+        self._run_times = []
+        self._usages    = []
+        self._timings   = []
 
     @property
     def command(self) -> str:
         return self._command
 
-    def update_stats(self, success_or_fail: bool, run_time: int):
+    @property
+    def usages(self):
+        """ The resource usages of the stored runs (None if not available) """
+        return self._usages
+
+    @property
+    def timings(self):
+        """ The phase timers of the stored runs (None if not available) """
+        return self._timings
+
+    def update_stats(self, success_or_fail: bool, run_time: float, cancelled: bool = False,
+                     usage = None, timing = None):
         """
-        Update the statistics by appending the exit code and the run time.
+        Update the statistics by appending the outcome and the run time.
         In case we already have stored > 5 runs, the first run is removed.
 
         :param success_or_fail: Whether the command was successful or not
-        :param run_time:        How long the command took (in seconds)
+        :param run_time:        How long the command took (in seconds, whole
+                                seconds, i. e. int, are fine as well)
+        :param cancelled:       Whether the command has been cancelled
+        :param usage:           The resource usage of the run (or None)
+        :param timing:          The phase timer of the run (or None)
         """
         # Store max of 5 runs
-        if len(self._exit_codes) >= 5:
-            self._exit_codes.pop(0)
+        if len(self._outcomes) >= 5:
+            self._outcomes.pop(0)
         if len(self._run_times) >= 5:
             self._run_times.pop(0)
-
-        self._exit_codes.append(success_or_fail)
-        self._run_times.append(int(run_time))
+        if len(self._usages) >= 5:
+            self._usages.pop(0)
+        if len(self._timings) >= 5:
+            self._timings.pop(0)
+
+        if cancelled:
+            self._outcomes.append(CyBldCommandOutcome.cancelled)
+        elif success_or_fail:
+            self._outcomes.append(CyBldCommandOutcome.success)
+        else:
+            self._outcomes.append(CyBldCommandOutcome.fail)
+
+        self._run_times.append(float(run_time))
+        self._usages.append(usage)
+        self._timings.append(timing)
 
     def get_stats_str(self):
         """ Returns a printable representation of the stats """
         ret            = 'previous runs: '
         ret_exit_codes = ""
 
-        for exit_code in self._exit_codes:
-            if exit_code:
+        for outcome in self._outcomes:
+            if outcome == CyBldCommandOutcome.success:
                 ret_exit_codes = ret_exit_codes + cybld_helpers.ICON_SUCCESS
-            else:
+            elif outcome == CyBldCommandOutcome.fail:
                 ret_exit_codes = ret_exit_codes + cybld_helpers.ICON_FAIL
+            else:
+                ret_exit_codes = ret_exit_codes + cybld_helpers.ICON_CANCELLED
 
             ret_exit_codes += " "
 
@@ -105,13 +179,22 @@ class CyBldCommandStats:
             ret_exit_codes = ret_exit_codes + cybld_helpers.ICON_UNKNOWN + " "
 
         ret = "{0}{1} ".format(ret, ret_exit_codes)
-        ret = "{0}(avg. {1} seconds)".format(ret, str(self._get_avg_runtime()))
+        ret = "{0}(avg. {1:.2f} seconds)".format(ret, self._get_avg_runtime())
         return ret
 
     def _get_avg_runtime(self):
-        """ Calculate a simple arithmetic average of the run time """
-        run_time_total = 0
-        for run_time in self._run_times:
-            run_time_total = run_time_total + run_time
+        """
+        Calculate a simple arithmetic average of the run time (cancelled runs
+        are not taken into account)
+        """
+        run_time_total = 0.0
+        run_count      = 0
+        for outcome, run_time in zip(self._outcomes, self._run_times):
+            if outcome != CyBldCommandOutcome.cancelled:
+                run_time_total = run_time_total + run_time
+                run_count      = run_count + 1
+
+        if run_count == 0:
+            return 0.0
 
-        return int(run_time_total / len(self._run_times))
+        return run_time_total / run_count
@@ -10,7 +10,11 @@ import configparser
 import logging
 import os
 
-from cybld import cybld_helpers
+from cybld import cybld_helpers, cybld_log_archive, cybld_runner_discovery
+from cybld.cybld_exec_queue import CyBldExecQueuePolicy
+from cybld.cybld_runner_schedule import CyBldRunnerSchedulePolicy
+from cybld.cybld_tmux_wrapper import CyBldTmuxBackend
+from cybld.cybld_warm_shell import CyBldExecBackend
 
 # --------------------------------------------------------------------------
 
@@ -27,7 +31,21 @@ class CyBldConfigKeys:
     CONFIG_VAR_PRINT_STATS    = "print_stats"
     CONFIG_VAR_TALK           = "talk"
 
-    CONFIG_VAR_TMUX_REFRESH_STATUS = "tmux_refresh_status"
+    CONFIG_VAR_TMUX_REFRESH_STATUS   = "tmux_refresh_status"
+    CONFIG_VAR_CAPTURE_LIMIT_KB      = "capture_limit_kb"
+    CONFIG_VAR_KILL_GRACE_PERIOD     = "kill_grace_period"
+    CONFIG_VAR_MAX_CONCURRENCY       = "max_concurrency"
+    CONFIG_VAR_EXEC_BACKEND          = "exec_backend"
+    CONFIG_VAR_PRINT_TIMING          = "print_timing"
+    CONFIG_VAR_NVIM_STREAMING        = "nvim_streaming"
+    CONFIG_VAR_NVIM_STREAM_INTERVAL  = "nvim_stream_interval"
+    CONFIG_VAR_RATE_LIMIT            = "rate_limit"
+    CONFIG_VAR_RATE_LIMIT_BURST      = "rate_limit_burst"
+    CONFIG_VAR_LOG_ARCHIVE           = "log_archive"
+    CONFIG_VAR_LOG_ARCHIVE_DIR       = "log_archive_dir"
+    CONFIG_VAR_LOG_ARCHIVE_MAX_COUNT = "log_archive_max_count"
+    CONFIG_VAR_LOG_ARCHIVE_MAX_MB    = "log_archive_max_mb"
+    CONFIG_VAR_TMUX_BACKEND          = "tmux_backend"
 
     CONFIG_VAR_CODEWORD_REGEX = "codeword_regex"
     CONFIG_VAR_ENV_REGEX      = "env_regex"
@@ -37,9 +55,27 @@ class CyBldConfigKeys:
     CONFIG_VAR_CMD0           = "cmd0"
     CONFIG_VAR_CMD1           = "cmd1"
     CONFIG_VAR_CMD2           = "cmd2"
+    CONFIG_VAR_QUEUE_POLICY   = "queue_policy"
+    CONFIG_VAR_PREEMPT        = "preempt"
+    CONFIG_VAR_ERROR_REGEX    = "error_regex"
+    CONFIG_VAR_WARNING_REGEX  = "warning_regex"
+    CONFIG_VAR_ABORT_ON_ERROR = "abort_on_error"
+    CONFIG_VAR_DEBOUNCE_MS    = "debounce_ms"
 
     CONFIG_VAR_RUNNER_CMD          = "cmd"
     CONFIG_VAR_RUNNER_PARAM_REGEX  = "param_regex"
+    CONFIG_VAR_RUNNER_JOBS         = "jobs"
+    CONFIG_VAR_RUNNER_INCREMENTAL  = "incremental"
+    CONFIG_VAR_RUNNER_SCHEDULE     = "schedule"
+    CONFIG_VAR_RUNNER_EXCLUDE_DIRS = "exclude_dirs"
+    CONFIG_VAR_RUNNER_WATCH        = "watch"
+    CONFIG_VAR_RUNNER_BATCH_SIZE   = "batch_size"
+    CONFIG_VAR_RUNNER_FAIL_REGEX   = "fail_regex"
+    CONFIG_VAR_RUNNER_TIMEOUT      = "timeout"
+    CONFIG_VAR_RUNNER_HANG_TIMEOUT = "hang_timeout"
+    CONFIG_VAR_RUNNER_RETRIES      = "retries"
+    CONFIG_VAR_RUNNER_RESULT_STORE = "result_store"
+    CONFIG_VAR_RUNNER_COMPARE_TO   = "compare_to"
 
 # --------------------------------------------------------------------------
 
@@ -85,7 +121,20 @@ class CyBldConfig:
             CyBldConfigKeys.CONFIG_VAR_PRINT_STATS     : "True",
             CyBldConfigKeys.CONFIG_VAR_TALK            : "True",
             CyBldConfigKeys.CONFIG_VAR_NOTIFY_TIMEOUT  : "3000",
-            CyBldConfigKeys.CONFIG_VAR_TMUX_REFRESH_STATUS : "False"}
+            CyBldConfigKeys.CONFIG_VAR_TMUX_REFRESH_STATUS   : "False",
+            CyBldConfigKeys.CONFIG_VAR_CAPTURE_LIMIT_KB      : "64",
+            CyBldConfigKeys.CONFIG_VAR_KILL_GRACE_PERIOD     : "2.0",
+            CyBldConfigKeys.CONFIG_VAR_MAX_CONCURRENCY       : "1",
+            CyBldConfigKeys.CONFIG_VAR_EXEC_BACKEND          : "spawn",
+            CyBldConfigKeys.CONFIG_VAR_PRINT_TIMING          : "False",
+            CyBldConfigKeys.CONFIG_VAR_NVIM_STREAMING        : "False",
+            CyBldConfigKeys.CONFIG_VAR_NVIM_STREAM_INTERVAL  : "0.5",
+            CyBldConfigKeys.CONFIG_VAR_RATE_LIMIT            : "0",
+            CyBldConfigKeys.CONFIG_VAR_RATE_LIMIT_BURST      : "10",
+            CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE           : "False",
+            CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE_MAX_COUNT : "50",
+            CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE_MAX_MB    : "100",
+            CyBldConfigKeys.CONFIG_VAR_TMUX_BACKEND          : "spawn"}
 
         self.write()
 
@@ -116,6 +165,14 @@ class CyBldConfig:
         section[CyBldConfigKeys.CONFIG_VAR_CMD0]           = command_group.cmd0
         section[CyBldConfigKeys.CONFIG_VAR_CMD1]           = command_group.cmd1
         section[CyBldConfigKeys.CONFIG_VAR_CMD2]           = command_group.cmd2
+        section[CyBldConfigKeys.CONFIG_VAR_QUEUE_POLICY]   = command_group.queue_policy.name
+        section[CyBldConfigKeys.CONFIG_VAR_PREEMPT]        = str(command_group.preempt)
+        if command_group.error_regex is not None:
+            section[CyBldConfigKeys.CONFIG_VAR_ERROR_REGEX]   = command_group.error_regex
+        if command_group.warning_regex is not None:
+            section[CyBldConfigKeys.CONFIG_VAR_WARNING_REGEX] = command_group.warning_regex
+        section[CyBldConfigKeys.CONFIG_VAR_ABORT_ON_ERROR] = str(command_group.abort_on_error)
+        section[CyBldConfigKeys.CONFIG_VAR_DEBOUNCE_MS]    = str(command_group.debounce_ms)
 
         self.write()
 
@@ -168,6 +225,80 @@ class CyBldConfig:
         return self.config.getboolean(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
                                       CyBldConfigKeys.CONFIG_VAR_TMUX_REFRESH_STATUS)
 
+    def get_capture_limit_kb(self):
+        return self.config.getint(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                  CyBldConfigKeys.CONFIG_VAR_CAPTURE_LIMIT_KB, fallback=64)
+
+    def get_kill_grace_period(self):
+        return self.config.getfloat(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                    CyBldConfigKeys.CONFIG_VAR_KILL_GRACE_PERIOD, fallback=2.0)
+
+    def get_max_concurrency(self):
+        return self.config.getint(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                  CyBldConfigKeys.CONFIG_VAR_MAX_CONCURRENCY, fallback=1)
+
+    def get_print_timing(self):
+        return self.config.getboolean(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                      CyBldConfigKeys.CONFIG_VAR_PRINT_TIMING, fallback=False)
+
+    def get_nvim_streaming(self):
+        return self.config.getboolean(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                      CyBldConfigKeys.CONFIG_VAR_NVIM_STREAMING, fallback=False)
+
+    def get_nvim_stream_interval(self):
+        return self.config.getfloat(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                    CyBldConfigKeys.CONFIG_VAR_NVIM_STREAM_INTERVAL, fallback=0.5)
+
+    def get_rate_limit(self):
+        return self.config.getfloat(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                    CyBldConfigKeys.CONFIG_VAR_RATE_LIMIT, fallback=0.0)
+
+    def get_rate_limit_burst(self):
+        return self.config.getint(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                  CyBldConfigKeys.CONFIG_VAR_RATE_LIMIT_BURST, fallback=10)
+
+    def get_log_archive(self):
+        return self.config.getboolean(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                      CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE, fallback=False)
+
+    def get_log_archive_dir(self):
+        log_archive_dir = self.config.get(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                          CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE_DIR, fallback="")
+        if len(log_archive_dir) == 0:
+            return cybld_log_archive.get_default_archive_dir()
+
+        return os.path.expandvars(os.path.expanduser(log_archive_dir))
+
+    def get_log_archive_max_count(self):
+        return self.config.getint(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                  CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE_MAX_COUNT, fallback=50)
+
+    def get_log_archive_max_mb(self):
+        return self.config.getint(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                  CyBldConfigKeys.CONFIG_VAR_LOG_ARCHIVE_MAX_MB, fallback=100)
+
+    def get_exec_backend(self):
+        exec_backend = self.config.get(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                       CyBldConfigKeys.CONFIG_VAR_EXEC_BACKEND, fallback="spawn")
+        if exec_backend not in CyBldExecBackend.__members__:
+            logging.fatal("CONFIG ERROR: Variable " + CyBldConfigKeys.CONFIG_VAR_EXEC_BACKEND +
+                          " in section " + CyBldConfigKeys.CONFIG_SECTION_SETTINGS +
+                          " has to be one of " + ", ".join(CyBldExecBackend.__members__))
+            exit(1)
+
+        return exec_backend
+
+    def get_tmux_backend(self):
+        tmux_backend = self.config.get(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
+                                       CyBldConfigKeys.CONFIG_VAR_TMUX_BACKEND, fallback="spawn")
+        if tmux_backend not in CyBldTmuxBackend.__members__:
+            logging.fatal("CONFIG ERROR: Variable " + CyBldConfigKeys.CONFIG_VAR_TMUX_BACKEND +
+                          " in section " + CyBldConfigKeys.CONFIG_SECTION_SETTINGS +
+                          " has to be one of " + ", ".join(CyBldTmuxBackend.__members__))
+            exit(1)
+
+        return tmux_backend
+
     def get_allow_multiple(self):
         return self.config.getboolean(CyBldConfigKeys.CONFIG_SECTION_SETTINGS,
                                       CyBldConfigKeys.CONFIG_VAR_ALLOW_MULTIPLE)
@@ -208,6 +339,56 @@ class CyBldConfig:
     def get_runner_regex_find_params(self, runner_section):
         return self.config[runner_section][CyBldConfigKeys.CONFIG_VAR_RUNNER_PARAM_REGEX]
 
+    def get_runner_jobs(self, runner_section):
+        return self.config.getint(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_JOBS, fallback=1)
+
+    def get_runner_incremental(self, runner_section):
+        return self.config.getboolean(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_INCREMENTAL,
+                                      fallback=False)
+
+    def get_runner_schedule(self, runner_section):
+        schedule = self.config.get(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_SCHEDULE,
+                                   fallback="walk")
+        if schedule not in CyBldRunnerSchedulePolicy.__members__:
+            logging.fatal("CONFIG ERROR: Variable " + CyBldConfigKeys.CONFIG_VAR_RUNNER_SCHEDULE +
+                          " in section " + runner_section +
+                          " has to be one of " + ", ".join(CyBldRunnerSchedulePolicy.__members__))
+            exit(1)
+
+        return schedule
+
+    def get_runner_exclude_dirs(self, runner_section):
+        exclude_dirs = self.config.get(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_EXCLUDE_DIRS,
+                                       fallback=None)
+        if exclude_dirs is None:
+            return cybld_runner_discovery.DEFAULT_EXCLUDE_DIRS
+        return cybld_runner_discovery.parse_exclude_dirs(exclude_dirs)
+
+    def get_runner_watch(self, runner_section):
+        return self.config.getboolean(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_WATCH, fallback=False)
+
+    def get_runner_batch_size(self, runner_section):
+        return self.config.getint(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_BATCH_SIZE, fallback=1)
+
+    def get_runner_fail_regex(self, runner_section):
+        return self.config.get(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_FAIL_REGEX, fallback=None)
+
+    def get_runner_timeout(self, runner_section):
+        return self.config.getfloat(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_TIMEOUT, fallback=0.0)
+
+    def get_runner_hang_timeout(self, runner_section):
+        return self.config.getfloat(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_HANG_TIMEOUT, fallback=0.0)
+
+    def get_runner_retries(self, runner_section):
+        return self.config.getint(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_RETRIES, fallback=0)
+
+    def get_runner_result_store(self, runner_section):
+        return self.config.getboolean(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_RESULT_STORE,
+                                      fallback=False)
+
+    def get_runner_compare_to(self, runner_section):
+        return self.config.getint(runner_section, CyBldConfigKeys.CONFIG_VAR_RUNNER_COMPARE_TO, fallback=1)
+
     @_sanity_check_config_section_variable(CyBldConfigKeys.CONFIG_VAR_CODEWORD_REGEX)
     def get_command_group_codeword_regex(self, section):
         return self.config[section][CyBldConfigKeys.CONFIG_VAR_CODEWORD_REGEX]
@@ -239,3 +420,29 @@ class CyBldConfig:
     @_sanity_check_config_section_variable(CyBldConfigKeys.CONFIG_VAR_CMD2)
     def get_command_group_cmd2(self, section):
         return self.config[section][CyBldConfigKeys.CONFIG_VAR_CMD2]
+
+    def get_command_group_queue_policy(self, section):
+        queue_policy = self.config.get(section, CyBldConfigKeys.CONFIG_VAR_QUEUE_POLICY,
+                                       fallback="latest")
+        if queue_policy not in CyBldExecQueuePolicy.__members__:
+            logging.fatal("CONFIG ERROR: Variable " + CyBldConfigKeys.CONFIG_VAR_QUEUE_POLICY +
+                          " in section " + section + " has to be one of " +
+                          ", ".join(CyBldExecQueuePolicy.__members__))
+            exit(1)
+
+        return queue_policy
+
+    def get_command_group_preempt(self, section):
+        return self.config.getboolean(section, CyBldConfigKeys.CONFIG_VAR_PREEMPT, fallback=False)
+
+    def get_command_group_error_regex(self, section):
+        return self.config.get(section, CyBldConfigKeys.CONFIG_VAR_ERROR_REGEX, fallback=None)
+
+    def get_command_group_warning_regex(self, section):
+        return self.config.get(section, CyBldConfigKeys.CONFIG_VAR_WARNING_REGEX, fallback=None)
+
+    def get_command_group_abort_on_error(self, section):
+        return self.config.getboolean(section, CyBldConfigKeys.CONFIG_VAR_ABORT_ON_ERROR, fallback=False)
+
+    def get_command_group_debounce_ms(self, section):
+        return self.config.getint(section, CyBldConfigKeys.CONFIG_VAR_DEBOUNCE_MS, fallback=0)
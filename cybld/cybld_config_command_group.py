@@ -9,7 +9,8 @@
 import os
 import re
 
-from cybld import cybld_helpers
+from cybld import cybld_helpers, cybld_output_matcher
+from cybld.cybld_exec_queue import CyBldExecQueuePolicy
 
 # --------------------------------------------------------------------------
 
@@ -47,9 +48,33 @@ class CyBldConfigCommandGroup:
 
     :param cmd2:           cmd2 as string.
     :type cmd2:            str
+
+    :param queue_policy:   Which exec requests to keep while a command is
+                           running ("latest" or "fifo").
+    :type queue_policy:    str
+
+    :param preempt:        Whether a new exec request cancels the running
+                           command.
+    :type preempt:         bool
+
+    :param error_regex:    Regex which marks errors in the output (or None).
+    :type error_regex:     str
+
+    :param warning_regex:  Regex which marks warnings in the output (or None).
+    :type warning_regex:   str
+
+    :param abort_on_error: Whether the command is killed on the first error.
+    :type abort_on_error:  bool
+
+    :param debounce_ms:    Exec requests are only executed once no further
+                           request for the same command arrived within this
+                           window (milliseconds, 0 disables debouncing).
+    :type debounce_ms:     int
     """
     def __init__(self, name, regex_codeword, regex_env, regex_cwd, regex_hostname,
-                 regex_file, cmd0, cmd1, cmd2):
+                 regex_file, cmd0, cmd1, cmd2, queue_policy = "latest", preempt = False,
+                 error_regex = None, warning_regex = None, abort_on_error = False,
+                 debounce_ms = 0):
         self.name           = name
         self.regex_codeword = re.compile(regex_codeword)
         self.regex_env      = re.compile(regex_env)
@@ -59,6 +84,13 @@ class CyBldConfigCommandGroup:
         self.cmd0           = cmd0
         self.cmd1           = cmd1
         self.cmd2           = cmd2
+        self.queue_policy   = CyBldExecQueuePolicy[queue_policy]
+        self.preempt        = preempt
+        self.error_regex    = error_regex
+        self.warning_regex  = warning_regex
+        self.abort_on_error = abort_on_error
+        self.debounce_ms    = debounce_ms
+        self.output_regex   = cybld_output_matcher.compile_output_regex(error_regex, warning_regex)
 
     def codeword_regex_matches(self, codeword = None):
         """
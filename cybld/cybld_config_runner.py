@@ -6,16 +6,74 @@
 #
 # --------------------------------------------------------------------------
 
+import os
 import re
 
 from cybld import cybld_helpers
+from cybld.cybld_runner_schedule import CyBldRunnerSchedulePolicy
 
 # --------------------------------------------------------------------------
 
 class CyBldConfigRunner:
-    def __init__(self, name: str, command: str, regex_find_params):
+    """
+    Config of a runner section (refer to CyBldRunner).
+
+    :param jobs:         How many params are executed at the same time (0:
+                         one per CPU core).
+    :param incremental:  Skip params which did not change since they
+                         succeeded (refer to CyBldRunnerCache).
+    :param cache_path:   The cache file for the incremental mode (None: in
+                         the data folder).
+    :param schedule:     The order of the params (name of a
+                         CyBldRunnerSchedulePolicy).
+    :param history_path: The file the outcome and run time of every param
+                         are stored in for scheduling (None: in the data
+                         folder).
+    :param exclude_dirs: Folder name patterns which are not searched for
+                         params (None: only version control folders).
+    :param watch:        Keep the params up to date via inotify instead of
+                         searching them on every run (refer to
+                         CyBldDiscoveryIndex).
+    :param batch_size:   Max. number of params passed to a single invocation
+                         of the command (1: one invocation per param).
+    :param fail_regex:   Regex finding the failed params in the output of a
+                         failed batch (the group "param" or the first group,
+                         None: bisect failed batches).
+    :param timeout:      Max. run time of a param in seconds, the process
+                         group is killed afterwards (0: no limit).
+    :param hang_timeout: Max. time in seconds a param may run without any
+                         output (0: no limit).
+    :param retries:      How often a failed param is executed again (a
+                         param which passes on a retry is flaky).
+    :param result_store: Store the results of every run (refer to
+                         CyBldRunnerStore).
+    :param store_path:   The result store (None: in the data folder).
+    :param compare_to:   Compare with the run this many runs ago (requires
+                         the result store, 1: the previous run).
+    """
+    def __init__(self, name: str, command: str, regex_find_params, jobs: int = 1,
+                 incremental: bool = False, cache_path: str = None,
+                 schedule: str = "walk", history_path: str = None, exclude_dirs = None,
+                 watch: bool = False, batch_size: int = 1, fail_regex = None,
+                 timeout: float = 0.0, hang_timeout: float = 0.0, retries: int = 0,
+                 result_store: bool = False, store_path: str = None, compare_to: int = 1):
         self.name              = name
         self.command           = command
         self.regex_find_params = re.compile(regex_find_params)
+        self.jobs              = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.incremental       = incremental
+        self.cache_path        = cache_path
+        self.schedule          = CyBldRunnerSchedulePolicy[schedule]
+        self.history_path      = history_path
+        self.exclude_dirs      = exclude_dirs
+        self.watch             = watch
+        self.batch_size        = max(batch_size, 1)
+        self.fail_regex        = re.compile(fail_regex, re.MULTILINE) if fail_regex else None
+        self.timeout           = timeout
+        self.hang_timeout      = hang_timeout
+        self.retries           = max(retries, 0)
+        self.result_store      = result_store
+        self.store_path        = store_path
+        self.compare_to        = max(compare_to, 1)
 
         assert(self.name.startswith(cybld_helpers.CONFIG_RUNNER_INDICATOR))
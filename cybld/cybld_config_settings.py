@@ -6,6 +6,9 @@
 #
 # --------------------------------------------------------------------------
 
+from cybld.cybld_tmux_wrapper import CyBldTmuxBackend
+from cybld.cybld_warm_shell import CyBldExecBackend
+
 # --------------------------------------------------------------------------
 
 class CyBldConfigSettings:
@@ -13,16 +16,37 @@ class CyBldConfigSettings:
                  bell_success, bell_fail,
                  tmux_success, tmux_fail,
                  allow_multiple, print_stats, talk,
-                 notify_timeout, tmux_refresh_status):
+                 notify_timeout, tmux_refresh_status,
+                 capture_limit_kb = 64, kill_grace_period = 2.0,
+                 max_concurrency = 1, exec_backend = "spawn", print_timing = False,
+                 nvim_streaming = False, nvim_stream_interval = 0.5,
+                 rate_limit = 0.0, rate_limit_burst = 10,
+                 log_archive = False, log_archive_dir = "",
+                 log_archive_max_count = 50, log_archive_max_mb = 100,
+                 tmux_backend = "spawn"):
 
-        self.notify_success      = notify_success
-        self.notify_fail         = notify_fail
-        self.bell_success        = bell_success
-        self.bell_fail           = bell_fail
-        self.tmux_success        = tmux_success
-        self.tmux_fail           = tmux_fail
-        self.allow_multiple      = allow_multiple
-        self.print_stats         = print_stats
-        self.talk                = talk
-        self.notify_timeout      = notify_timeout
-        self.tmux_refresh_status = tmux_refresh_status
+        self.notify_success        = notify_success
+        self.notify_fail           = notify_fail
+        self.bell_success          = bell_success
+        self.bell_fail             = bell_fail
+        self.tmux_success          = tmux_success
+        self.tmux_fail             = tmux_fail
+        self.allow_multiple        = allow_multiple
+        self.print_stats           = print_stats
+        self.talk                  = talk
+        self.notify_timeout        = notify_timeout
+        self.tmux_refresh_status   = tmux_refresh_status
+        self.capture_limit_kb      = capture_limit_kb
+        self.kill_grace_period     = kill_grace_period
+        self.max_concurrency       = max_concurrency
+        self.exec_backend          = CyBldExecBackend[exec_backend]
+        self.print_timing          = print_timing
+        self.nvim_streaming        = nvim_streaming
+        self.nvim_stream_interval  = nvim_stream_interval
+        self.rate_limit            = rate_limit
+        self.rate_limit_burst      = rate_limit_burst
+        self.log_archive           = log_archive
+        self.log_archive_dir       = log_archive_dir
+        self.log_archive_max_count = log_archive_max_count
+        self.log_archive_max_mb    = log_archive_max_mb
+        self.tmux_backend          = CyBldTmuxBackend[tmux_backend]
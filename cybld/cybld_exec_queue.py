@@ -0,0 +1,105 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from collections import deque
+from enum import Enum
+
+import threading
+
+# --------------------------------------------------------------------------
+
+class CyBldExecQueuePolicy(Enum):
+    latest = 1
+    fifo   = 2
+
+# --------------------------------------------------------------------------
+
+class CyBldExecRequest:
+    """
+    A pending exec request.
+
+    :param cmd_number: The command number which should be executed
+    :param nvim_ipc:   The NVIM IPC name, if available
+    :param timer:      The timer started when the request was received
+                       (refer to CyBldPhaseTimer), not compared
+    """
+
+    def __init__(self, cmd_number: int, nvim_ipc: str, timer = None):
+        self.cmd_number = cmd_number
+        self.nvim_ipc   = nvim_ipc
+        self.timer      = timer
+
+    def __eq__(self, other):
+        return (isinstance(other, CyBldExecRequest) and
+                self.cmd_number == other.cmd_number and
+                self.nvim_ipc   == other.nvim_ipc)
+
+    def __hash__(self):
+        return hash((self.cmd_number, self.nvim_ipc))
+
+# --------------------------------------------------------------------------
+
+class CyBldExecQueue:
+    """
+    Queue of exec requests which arrived while a command was running.
+
+    Identical pending requests are always collapsed into one. With the
+    "latest" policy only the most recent request for each command is kept
+    (latest wins, requests for other commands stay pending), with the "fifo"
+    policy every distinct request is executed in order.
+
+    :param policy: Which requests to keep.
+    :type policy:  CyBldExecQueuePolicy
+    """
+
+    def __init__(self, policy: CyBldExecQueuePolicy):
+        self.policy    = policy
+        self.coalesced = 0
+
+        self._pending = deque()
+        self._lock    = threading.Lock()
+
+    def push(self, request: CyBldExecRequest):
+        """
+        Add the request to the queue (or collapse it into a pending one).
+
+        :param request: The new exec request.
+        """
+        with self._lock:
+            if self.policy == CyBldExecQueuePolicy.latest:
+                superseded = [pending for pending in self._pending
+                              if pending.cmd_number == request.cmd_number]
+                for pending in superseded:
+                    self._pending.remove(pending)
+                self.coalesced += len(superseded)
+            elif request in self._pending:
+                self.coalesced += 1
+                return
+
+            self._pending.append(request)
+
+    def pop(self, is_ready = None):
+        """
+        Remove the next request from the queue.
+
+        :param is_ready: Optional function which decides whether a request
+                         can be started. The first ready request is returned.
+
+        :rtype: CyBldExecRequest
+        :return: The next request or None if nothing (ready) is pending.
+        """
+        with self._lock:
+            for request in self._pending:
+                if is_ready is None or is_ready(request):
+                    self._pending.remove(request)
+                    return request
+
+            return None
+
+    def __len__(self):
+        return len(self._pending)
@@ -7,9 +7,8 @@
 # --------------------------------------------------------------------------
 
 import os
-import sys
 
-from cybld import cybld_tmux_wrapper
+from cybld import cybld_terminal, cybld_tmux_wrapper
 
 # --------------------------------------------------------------------------
 
@@ -43,6 +42,7 @@ COLOR_END       = '\033[0m'
 
 ICON_SUCCESS    = "\u2714"
 ICON_FAIL       = "\u2716"
+ICON_CANCELLED  = "\u2298"
 
 ICON_STATUS_START   = "\u2600"
 ICON_STATUS_RUNNING = "\u2615"
@@ -69,6 +69,16 @@ def get_base_path():
 
 # --------------------------------------------------------------------------
 
+def get_data_path():
+    """ Folder for persistent data, i. e. archived logs ($XDG_DATA_HOME/cybld) """
+    data_home = os.getenv("XDG_DATA_HOME", "")
+    if len(data_home) == 0:
+        data_home = os.path.join(os.path.expanduser("~"), ".local", "share")
+
+    return os.path.join(data_home, "cybld")
+
+# --------------------------------------------------------------------------
+
 def get_shared_status_file():
     return os.path.join(get_base_path(), SHARED_STATUS_FILE)
 
@@ -80,12 +90,34 @@ def get_shared_status_lock_file():
 # --------------------------------------------------------------------------
 
 def get_term_width():
-    if sys.stdout.isatty():
-        stty_size = os.popen('stty size', 'r').read().split()
-        # Safeguard in case .TERM is not set (i.e. py.test)
-        if len(stty_size) >= 1:
-            return int(stty_size[1])
-    return int(180)
+    """ Refer to cybld_terminal.get_width (cached, no stty process) """
+    return cybld_terminal.get_width()
+
+# --------------------------------------------------------------------------
+
+def format_size(num_bytes):
+    """ Format the given amount of bytes in a human readable way (i. e. 1.5 MB) """
+    if num_bytes < 1024:
+        return "{0} B".format(num_bytes)
+
+    size = num_bytes / 1024
+    for unit in ["KB", "MB"]:
+        if size < 1024:
+            return "{0:.1f} {1}".format(size, unit)
+        size = size / 1024
+
+    return "{0:.1f} GB".format(size)
+
+# --------------------------------------------------------------------------
+
+def format_duration(nanoseconds):
+    """ Format the given duration in a human readable way (i. e. 1.25 ms) """
+    if nanoseconds < 1000 * 1000:
+        return "{0} us".format(nanoseconds // 1000)
+    if nanoseconds < 1000 * 1000 * 1000:
+        return "{0:.2f} ms".format(nanoseconds / 1000 / 1000)
+
+    return "{0:.2f} s".format(nanoseconds / 1000 / 1000 / 1000)
 
 # --------------------------------------------------------------------------
 
@@ -103,7 +135,7 @@ def get_current_socket_names():
 def print_seperator_lines(lines=2):
     """ Print (two) seperator lines (full width of terminal) """
     width = get_term_width()
-    print((SEPERATOR_COLOR + SEPERATOR * width + COLOR_END) * lines)
+    _print_line((SEPERATOR_COLOR + SEPERATOR * width + COLOR_END) * lines)
 
 # --------------------------------------------------------------------------
 
@@ -120,7 +152,7 @@ def print_text_with_bg(text, success_or_fail):
         text = "{:{term_width}} {:>} ".format(text, ICON_UNKNOWN,
                                               term_width = get_term_width())
 
-    print(text)
+    _print_line(text)
 
 # --------------------------------------------------------------------------
 
@@ -149,8 +181,14 @@ def print_centered_text(text, success_or_fail):
     width  = get_term_width()
     spaces = int((width - len(text)) / 2)
     if success_or_fail is True:
-        print(" " * spaces + SUCCESS_COLOR + text + COLOR_END)
+        _print_line(" " * spaces + SUCCESS_COLOR + text + COLOR_END)
     elif success_or_fail is False:
-        print(" " * spaces + FAIL_COLOR + text + COLOR_END)
+        _print_line(" " * spaces + FAIL_COLOR + text + COLOR_END)
     else:
-        print(" " * spaces + text)
+        _print_line(" " * spaces + text)
+
+# --------------------------------------------------------------------------
+
+def _print_line(text):
+    """ Print the line (refer to cybld_terminal.buffered to batch lines) """
+    cybld_terminal.write(text + "\n")
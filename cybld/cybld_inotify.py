@@ -0,0 +1,124 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+
+# --------------------------------------------------------------------------
+
+# <sys/inotify.h>
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF   = 0x00000800
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ONLYDIR     = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+
+IN_NONBLOCK    = os.O_NONBLOCK
+IN_CLOEXEC     = os.O_CLOEXEC
+
+# Added, removed or renamed entries of a folder (and the folder itself)
+IN_DIR_CHANGES = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+
+EVENT_HEADER      = struct.Struct("iIII")
+READ_BUFFER_SIZE  = 64 * 1024
+
+# --------------------------------------------------------------------------
+
+_libc = None
+
+
+def _get_libc():
+    """ libc with the inotify functions (raises OSError if not available) """
+    global _libc
+
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno = True)
+            for function in (libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch):
+                function.restype = ctypes.c_int
+            libc.inotify_init1.argtypes     = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes  = [ctypes.c_int, ctypes.c_int]
+        except (OSError, AttributeError) as ex:
+            raise OSError(errno.ENOSYS, "inotify is not available: {0}".format(ex))
+        _libc = libc
+
+    return _libc
+
+
+def _check(result: int) -> int:
+    if result < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+    return result
+
+# --------------------------------------------------------------------------
+
+class CyBldInotifyEvent:
+    def __init__(self, wd: int, mask: int, cookie: int, name: str):
+        self.wd     = wd
+        self.mask   = mask
+        self.cookie = cookie
+        self.name   = name
+
+# --------------------------------------------------------------------------
+
+class CyBldInotify:
+    """
+    Minimal (non-blocking) inotify instance via ctypes, Linux only.
+
+    The constructor and add_watch raise an OSError if inotify is not
+    available or a limit is exhausted (EMFILE: max_user_instances, ENOSPC:
+    max_user_watches).
+    """
+
+    def __init__(self):
+        self.fd = _check(_get_libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """ Watch the given path, returns the watch descriptor """
+        return _check(_get_libc().inotify_add_watch(self.fd, os.fsencode(path), mask))
+
+    def rm_watch(self, wd: int):
+        """ Stop watching (errors are ignored, the kernel removes the watches of deleted paths) """
+        _get_libc().inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """ All pending events (does not block) """
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_BUFFER_SIZE)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name    = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append(CyBldInotifyEvent(wd, mask, cookie, name))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __del__(self):
+        # Not closed explicitly (refer to CyBldDiscoveryIndex.close)
+        if getattr(self, "fd", None) is not None:
+            self.close()
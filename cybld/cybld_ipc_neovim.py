@@ -7,6 +7,7 @@
 # --------------------------------------------------------------------------
 
 import logging
+import threading
 
 # We have to import neovim up here and not inline.
 # If we import it inline, the first few socket connections will fail
@@ -18,6 +19,62 @@ try:
 except ImportError:
     neovim_available = False
 
+# Commands for which the log file is forwarded to neovim
+ENABLED_FOR_COMMANDS = ["make", "gcc", "g++", "tox"]
+
+# --------------------------------------------------------------------------
+
+def should_do_ipc(enabled: bool, ipc_socket_path: str, command: str) -> bool:
+    """
+    Check whether we should do IPC based on the enabled flag,
+    the given command and the nvim IPC socket path.
+
+    :rtype: bool
+    :return: True if IPC should be done.
+    """
+    if not enabled:
+        return False
+
+    command_is_enabled = False
+    for enabled_for_command in ENABLED_FOR_COMMANDS:
+        if enabled_for_command in command:
+            command_is_enabled = True
+            break
+
+    if command_is_enabled is False:
+        return False
+
+    if ipc_socket_path is None or len(ipc_socket_path) == 0:
+        return False
+
+    return True
+
+# --------------------------------------------------------------------------
+
+def load_logfile(ipc_socket_path: str, logfile_path: str) -> bool:
+    """
+    Load the given log file into the quickfix list of neovim (vims "cfile"
+    command) and open the quickfix window.
+
+    :rtype: bool
+    :return: False if the neovim python library is not available or the
+             IPC failed.
+    """
+    if not neovim_available:
+        return False
+
+    try:
+        nvim = neovim.attach('socket', path=ipc_socket_path)
+        nvim.command('cfile ' + logfile_path)
+        nvim.command('copen')
+    except:
+        logging.warning("Failed to notify neovim")
+        return False
+
+    return True
+
+# --------------------------------------------------------------------------
+
 class CyBldIpcNeovim():
     """
     Simple IPC integration with neovim.
@@ -44,8 +101,6 @@ class CyBldIpcNeovim():
         :param command: The command that was executed.
         :type command: str
         """
-        self._ENABLED_FOR_COMMANDS = ["make", "gcc", "g++", "tox"]
-
         self._enabled         = enabled
         self._ipc_socket_path = ipc_socket_path
         self._logfile_path    = logfile_path
@@ -64,41 +119,167 @@ class CyBldIpcNeovim():
         if not self._should_do_ipc:
             return False
 
-        if not neovim_available:
-            return False
+        return load_logfile(self._ipc_socket_path, self._logfile_path)
 
-        try:
-            nvim = neovim.attach('socket', path=self._ipc_socket_path)
-            nvim.command('cfile ' + self._logfile_path)
-            nvim.command('copen')
-        except:
-            logging.warning("Failed to notify neovim")
+    @property
+    def _should_do_ipc(self) -> bool:
+        """ Refer to should_do_ipc """
+        return should_do_ipc(self._enabled, self._ipc_socket_path, self._command)
+
+# --------------------------------------------------------------------------
+
+class CyBldIpcNeovimStream():
+    """
+    Streaming IPC integration with neovim: appends the output lines to the
+    quickfix list while the command is still running.
+
+    The lines are collected by write (called from the reading thread) and
+    sent by a separate thread, which keeps the connection open for the whole
+    run. At most one update (setqflist with action 'a', parsed with the
+    errorformat of neovim) with max. MAX_LINES_PER_UPDATE lines is sent per
+    interval, so neovim isn't flooded by big builds. If neovim falls behind,
+    at most MAX_PENDING_LINES lines are kept (the oldest ones are dropped).
+
+    If the connection fails, nothing is buffered anymore. In both cases
+    finish returns False, so that the whole log can be loaded instead
+    (CyBldIpcNeovim).
+
+    Note that this is only available if the optional neovim python library
+    is installed.
+
+    :param ipc_socket_path: The path to the NVIM_LISTEN_ADDRESS socket
+    :type ipc_socket_path:  str
+
+    :param command:         The command that is executed.
+    :type command:          str
+
+    :param interval:        Min. time between two updates (seconds).
+    :type interval:         float
+
+    :param pattern:         Optional pattern (refer to compile_output_regex),
+                            only matching lines are sent if given.
+    """
+
+    MAX_LINES_PER_UPDATE = 500
+    MAX_LINE_LENGTH      = 4096
+    MAX_PENDING_LINES    = 10 * MAX_LINES_PER_UPDATE
+
+    def __init__(self, ipc_socket_path: str, command: str, interval: float, pattern = None):
+        self.ipc_socket_path = ipc_socket_path
+        self.command         = command
+        self.interval        = interval
+        self.pattern         = pattern
+        self.lines_sent      = 0
+        self.lines_dropped   = 0
+
+        self._pending_lines = []
+        self._partial_line  = b""
+        self._finished      = False
+        self._failed        = False
+        self._condition     = threading.Condition()
+        self._thread        = None
+
+    def start(self) -> bool:
+        """
+        Start the sending thread (which connects to neovim).
+
+        :rtype: bool
+        :return: False if the neovim python library is not available.
+        """
+        if not neovim_available:
             return False
 
+        self._thread = threading.Thread(target = self._send_loop)
+        self._thread.daemon = True
+        self._thread.start()
         return True
 
-    @property
-    def _should_do_ipc(self) -> bool:
+    def write(self, text: bytes):
+        """ Sink for the (colorless) output, collects all complete lines """
+        if self._failed:
+            return
+
+        last_newline = text.rfind(b"\n")
+        if last_newline < 0:
+            self._partial_line = (self._partial_line + text)[-self.MAX_LINE_LENGTH:]
+            return
+
+        lines              = (self._partial_line + text[:last_newline]).split(b"\n")
+        self._partial_line = text[last_newline + 1:][-self.MAX_LINE_LENGTH:]
+
+        if self.pattern is not None:
+            lines = [line for line in lines if self.pattern.search(line)]
+
+        if len(lines) > 0:
+            with self._condition:
+                self._pending_lines.extend(line.decode(errors="replace") for line in lines)
+
+                overflow = len(self._pending_lines) - self.MAX_PENDING_LINES
+                if overflow > 0:
+                    del self._pending_lines[:overflow]
+                    self.lines_dropped += overflow
+
+    def finish(self) -> bool:
         """
-        Check whether we should do IPC based on the enabled flag,
-        the given command and the nvim IPC socket path.
+        Send the remaining lines, open the quickfix window and disconnect.
 
         :rtype: bool
-        :return: True if IPC should be done.
+        :return: False if the quickfix list could not be updated or is
+                 incomplete (lines have been dropped).
         """
-        if not self._enabled:
-            return False
+        if len(self._partial_line) > 0:
+            self.write(b"\n")
 
-        command_is_enabled = False
-        for enabled_for_command in self._ENABLED_FOR_COMMANDS:
-            if enabled_for_command in self._command:
-                command_is_enabled = True
-                break
+        with self._condition:
+            self._finished = True
+            self._condition.notify()
 
-        if command_is_enabled is False:
-            return False
+        if self._thread is not None:
+            self._thread.join()
 
-        if self._ipc_socket_path is None or len(self._ipc_socket_path) == 0:
+        if self.lines_dropped > 0:
+            logging.warning("neovim fell behind, {0} lines were dropped, loading the whole log".format(
+                self.lines_dropped))
             return False
+        return not self._failed
 
-        return True
+    def _send_loop(self):
+        try:
+            nvim = neovim.attach('socket', path=self.ipc_socket_path)
+            nvim.call('setqflist', [], 'r', {'title': self.command, 'lines': []})
+        except:
+            logging.warning("Failed to connect to neovim")
+            self._fail()
+            return
+
+        try:
+            while self._send_pending_lines(nvim):
+                pass
+
+            nvim.command('copen')
+            nvim.close()
+        except:
+            logging.warning("Failed to update the quickfix list in neovim")
+            self._fail()
+
+    def _fail(self):
+        """ Stop buffering, the lines would never be sent """
+        with self._condition:
+            self._failed        = True
+            self._pending_lines = []
+
+    def _send_pending_lines(self, nvim) -> bool:
+        """ Wait for the next interval, then send the pending lines (if any) """
+        with self._condition:
+            if not self._finished:
+                self._condition.wait(self.interval)
+
+            lines               = self._pending_lines[:self.MAX_LINES_PER_UPDATE]
+            self._pending_lines = self._pending_lines[self.MAX_LINES_PER_UPDATE:]
+            more_to_send        = not self._finished or len(self._pending_lines) > 0
+
+        if len(lines) > 0:
+            nvim.call('setqflist', [], 'a', {'lines': lines})
+            self.lines_sent += len(lines)
+
+        return more_to_send
@@ -6,19 +6,23 @@
 #
 # --------------------------------------------------------------------------
 
+import asyncio
 import atexit
 import sys
 
 import logging
 import os
 import pickle
+import signal
 import socket
 import string
-from cybld import cybld_helpers
+from cybld import cybld_helpers, cybld_terminal
 from cybld.cybld_command_handler import CyBldCommandHandler
 from cybld.cybld_config_command_group import CyBldConfigCommandGroup
 from cybld.cybld_config_settings import CyBldConfigSettings
 from cybld.cybld_notifier import CyBldNotifier
+from cybld.cybld_phase_timer import CyBldPhaseTimer
+from cybld.cybld_tmux_wrapper import CyBldTmuxBackend, CyBldTmuxWrapper
 
 # --------------------------------------------------------------------------
 
@@ -72,11 +76,18 @@ class CyBldIpcServer():
         # the base directory in case no cybld session is left
         atexit.register(self._close_socket)
 
+        # Every result line needs the terminal width, don't query it each time
+        cybld_terminal.install_resize_handler()
+
         self.settings        = settings
+        if settings.tmux_backend == CyBldTmuxBackend.control and self._uses_tmux():
+            CyBldTmuxWrapper.start_control_client()
+
         self.notifier        = CyBldNotifier(settings)
         self.command_handler = CyBldCommandHandler(command_group, runner_configs, settings,
                                                    self.notifier.notify_success,
-                                                   self.notifier.notify_fail)
+                                                   self.notifier.notify_fail,
+                                                   self.notifier.notify_early_fail)
 
         self.server          = None
         self.socket_name     = self._generate_new_random_socket_name()
@@ -124,27 +135,62 @@ class CyBldIpcServer():
 
     def _start_main_loop(self):
         """
-        Start the main loop.
+        Start the main loop (asyncio event loop).
 
         Wait for incoming messages on the socket, "parse" them via pickle and
-        then forward the command to the command handler.
+        then forward the command to the command handler (which executes the
+        commands in its worker threads, so the loop is never blocked).
+        SIGINT and SIGTERM stop the loop.
+
+        Note that the loop only handles IPC and signals: the output of the
+        commands (pty), reaping them (wait4), status updates and
+        notifications are handled by the threads of the command handler.
         """
         assert(self.server is not None)
 
+        loop = asyncio.new_event_loop()
+        self.server.setblocking(False)
+        loop.add_reader(self.server.fileno(), self._receive_messages)
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(signum, loop.stop)
+
         try:
-            while True:
+            loop.run_forever()
+        finally:
+            loop.remove_reader(self.server.fileno())
+            for signum in [signal.SIGINT, signal.SIGTERM]:
+                loop.remove_signal_handler(signum)
+            loop.close()
+
+            # The commands run in their own process group and would not receive
+            # a Ctrl-C from the terminal otherwise
+            self.command_handler.shutdown()
+
+    def _receive_messages(self):
+        """ Handle all messages which are available on the socket (called by the loop) """
+        while True:
+            try:
                 data = self.server.recv(1024)
-                if not data:
-                    break
-                else:
-                    cmd = pickle.loads(data)
-                    self.command_handler.handle_incoming_ipc_message(cmd)
-        except:
-            pass
+            except (BlockingIOError, InterruptedError):
+                return
+
+            timer = CyBldPhaseTimer()
+            try:
+                cmd = pickle.loads(data)
+            except Exception as ex:
+                logging.warning("Ignoring invalid IPC message: {0}".format(ex))
+                continue
+
+            self.command_handler.handle_incoming_ipc_message(cmd, timer)
+
+    def _uses_tmux(self) -> bool:
+        """ Whether tmux messages are shown or the status line is refreshed """
+        return self.settings.tmux_success or self.settings.tmux_fail or self.settings.tmux_refresh_status
 
     def _close_socket(self):
         """ Close the IPC socket (at shutdown) """
         logging.info("Shutdown initiated for " + self.socket_name)
+        CyBldTmuxWrapper.stop_control_client()
         self.server.close()
         os.remove(os.path.join(cybld_helpers.get_base_path(), self.socket_name))
 
@@ -0,0 +1,60 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+# --------------------------------------------------------------------------
+
+class CyBldLinePrefixer:
+    """
+    Sink which prefixes every line of a command output (i. e. "[cmd0] "),
+    used when multiple commands write to the terminal at the same time.
+
+    Only complete lines are forwarded (while holding the shared output lock),
+    so lines of different commands don't get mixed up.
+
+    :param prefix: The prefix for each line.
+    :type prefix:  bytes
+
+    :param sink:   Where to write the prefixed lines to.
+
+    :param lock:   Lock shared by everyone writing to the same terminal.
+    :type lock:    threading.Lock
+    """
+
+    # Forward incomplete lines anyway once they get this long
+    MAX_PARTIAL_LINE = 64 * 1024
+
+    def __init__(self, prefix: bytes, sink, lock):
+        self._prefix  = prefix
+        self._sink    = sink
+        self._lock    = lock
+        self._partial = b""
+
+    def write(self, chunk: bytes):
+        """ Prefix and forward all complete lines of the chunk """
+        data     = self._partial + chunk
+        line_end = data.rfind(b"\n")
+
+        if line_end < 0 and len(data) < self.MAX_PARTIAL_LINE:
+            self._partial = data
+            return
+
+        if line_end < 0:
+            lines         = data
+            self._partial = b""
+        else:
+            lines         = data[:line_end]
+            self._partial = data[line_end + 1:]
+
+        prefixed = self._prefix + lines.replace(b"\n", b"\n" + self._prefix) + b"\n"
+        with self._lock:
+            self._sink(prefixed)
+
+    def flush(self):
+        """ Forward the last line, even if it is incomplete """
+        if len(self._partial) > 0:
+            self.write(b"\n")
@@ -0,0 +1,212 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from contextlib import contextmanager
+
+import fcntl
+import gzip
+import json
+import logging
+import os
+import re
+import time
+
+from cybld import cybld_helpers
+
+# --------------------------------------------------------------------------
+
+INDEX_FILE_NAME      = "index.json"
+INDEX_LOCK_FILE_NAME = "index.lock"
+LOG_FILE_SUFFIX      = ".log.gz"
+
+# zlib's default trade-off between speed and ratio (build logs compress well)
+COMPRESS_LEVEL = 6
+
+# --------------------------------------------------------------------------
+
+def get_default_archive_dir() -> str:
+    """ The default archive folder ($XDG_DATA_HOME/cybld/logs) """
+    return os.path.join(cybld_helpers.get_data_path(), "logs")
+
+# --------------------------------------------------------------------------
+
+def get_group_dir_name(command_group_name: str) -> str:
+    """ Folder name of the given command group (safe for the filesystem) """
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", command_group_name)
+
+# --------------------------------------------------------------------------
+
+class CyBldLogArchiveRecord:
+    """
+    Sink which compresses the (colorless) output of a single run into the
+    archive while the command is running (refer to CyBldLogArchive.start).
+
+    Nothing is added to the index until finish() is called.
+    """
+
+    def __init__(self, archive, entry_id: int, command: str):
+        self.archive  = archive
+        self.entry_id = entry_id
+        self.command  = command
+        self.path     = os.path.join(archive.path, "{0:06d}{1}".format(entry_id, LOG_FILE_SUFFIX))
+        self.raw_size = 0
+
+        self._start_time = time.time()
+        self._start      = time.monotonic()
+        self._logfile    = gzip.open(self.path, "wb", compresslevel = COMPRESS_LEVEL)
+
+    def write(self, text: bytes):
+        """ Compress the given text into the archived log """
+        self._logfile.write(text)
+        self.raw_size += len(text)
+
+    def finish(self, returncode: int):
+        """
+        Close the archived log, add it to the index and apply the retention
+        policy.
+
+        :param returncode: The exit code of the command (negative if killed)
+        """
+        self._logfile.close()
+
+        entry = {"id":       self.entry_id,
+                 "file":     os.path.basename(self.path),
+                 "command":  self.command,
+                 "start":    self._start_time,
+                 "duration": time.monotonic() - self._start,
+                 "exit":     returncode,
+                 "size":     os.path.getsize(self.path),
+                 "raw_size": self.raw_size}
+        self.archive.add_entry(entry)
+
+# --------------------------------------------------------------------------
+
+class CyBldLogArchive:
+    """
+    Persistent archive of the (gzip compressed) logs of one command group.
+
+    Every command group gets its own folder, containing the compressed logs
+    and a small JSON index (command, start, duration, exit code, size). The
+    index is only touched once per run, while holding an flock, since
+    several servers may use the same command group.
+
+    The oldest logs are removed as soon as there are more than max_count
+    logs or the logs take more than max_bytes.
+
+    :param base_dir:           The archive folder (one subfolder per group).
+    :param command_group_name: The name of the command group.
+    :param max_count:          Max. number of archived logs (<= 0: no limit).
+    :param max_bytes:          Max. total (compressed) size (<= 0: no limit).
+    """
+
+    def __init__(self, base_dir: str, command_group_name: str,
+                 max_count: int = 50, max_bytes: int = 100 * 1024 * 1024):
+        self.name      = get_group_dir_name(command_group_name)
+        self.path      = os.path.join(base_dir, self.name)
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.path, exist_ok = True)
+
+    def start(self, command: str) -> CyBldLogArchiveRecord:
+        """ Start archiving a new run of the given command """
+        with self._lock():
+            index    = self.read_index()
+            entry_id = index["next_id"]
+
+            index["next_id"] = entry_id + 1
+            self._write_index(index)
+
+        return CyBldLogArchiveRecord(self, entry_id, command)
+
+    def add_entry(self, entry):
+        """ Add the given entry to the index and apply the retention policy """
+        with self._lock():
+            index = self.read_index()
+            index["entries"].append(entry)
+
+            for removed in self._apply_retention(index["entries"]):
+                try:
+                    os.remove(os.path.join(self.path, removed["file"]))
+                except FileNotFoundError:
+                    pass
+
+            self._write_index(index)
+
+    def get_entries(self):
+        """ All archived runs (oldest first) """
+        return self.read_index()["entries"]
+
+    def get_entry(self, entry_id: int):
+        """ The archived run with the given id (or None) """
+        for entry in self.get_entries():
+            if entry["id"] == entry_id:
+                return entry
+        return None
+
+    def read_log(self, entry) -> bytes:
+        """ The decompressed log of the given entry """
+        with gzip.open(os.path.join(self.path, entry["file"]), "rb") as logfile:
+            return logfile.read()
+
+    def read_index(self):
+        try:
+            with open(os.path.join(self.path, INDEX_FILE_NAME), "r") as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {"next_id": 1, "entries": []}
+        except ValueError as ex:
+            logging.warning("Ignoring corrupt log index {0}: {1}".format(self.path, ex))
+            return {"next_id": 1, "entries": []}
+
+    def _apply_retention(self, entries):
+        """ Remove the oldest entries (in place), returns the removed ones """
+        removed    = []
+        total_size = sum(entry["size"] for entry in entries)
+
+        # The latest run is always kept
+        while len(entries) > 1:
+            too_many  = self.max_count > 0 and len(entries) > self.max_count
+            too_large = self.max_bytes > 0 and total_size > self.max_bytes
+            if not too_many and not too_large:
+                break
+
+            entry       = entries.pop(0)
+            total_size -= entry["size"]
+            removed.append(entry)
+
+        return removed
+
+    def _write_index(self, index):
+        # Readers never see a partially written index
+        index_path = os.path.join(self.path, INDEX_FILE_NAME)
+        with open(index_path + ".tmp", "w") as index_file:
+            json.dump(index, index_file, indent = 1)
+        os.replace(index_path + ".tmp", index_path)
+
+    @contextmanager
+    def _lock(self):
+        with open(os.path.join(self.path, INDEX_LOCK_FILE_NAME), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# --------------------------------------------------------------------------
+
+def get_archives(base_dir: str):
+    """ All archives (one per command group) in the given folder """
+    if not os.path.isdir(base_dir):
+        return []
+
+    ret = []
+    for group_dir in sorted(os.listdir(base_dir)):
+        if os.path.isfile(os.path.join(base_dir, group_dir, INDEX_FILE_NAME)):
+            ret.append(CyBldLogArchive(base_dir, group_dir))
+    return ret
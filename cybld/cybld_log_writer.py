@@ -0,0 +1,57 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+import tempfile
+
+from cybld import cybld_helpers
+from cybld.cybld_ansi_stripper import CyBldAnsiStripper
+
+# --------------------------------------------------------------------------
+
+class CyBldLogWriter:
+    """
+    Streams the output of a command (without colors) into a new log file.
+
+    The log file is created right away and every chunk is written (and
+    flushed) as soon as it arrives, so the log can be followed (tail,
+    NeoVim) while the command is still running.
+
+    :param text_sinks: Optional callables which get the stripped output as
+                       well (i. e. CyBldCaptureBuffer.write).
+    :type text_sinks:  list
+    """
+
+    def __init__(self, text_sinks = None):
+        self._stripper   = CyBldAnsiStripper()
+        self._text_sinks = text_sinks if text_sinks is not None else []
+
+        logfile, self.path = tempfile.mkstemp(dir=cybld_helpers.get_base_path(),
+                                              prefix=cybld_helpers.NVIM_LOG_PREFIX)
+        self._logfile = os.fdopen(logfile, 'wb')
+
+    def write(self, chunk: bytes):
+        """ Sink which strips the colors and appends the chunk to the log file """
+        text = self._stripper.feed(chunk)
+        if len(text) > 0:
+            self._logfile.write(text)
+            self._logfile.flush()
+
+            for sink in self._text_sinks:
+                sink(text)
+
+    def close(self):
+        """ Close the log file (the file itself is kept) """
+        self._logfile.close()
+
+    def remove(self):
+        """ Remove the (closed) log file, i. e. once it has been archived """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -7,9 +7,9 @@
 # --------------------------------------------------------------------------
 
 import sys
-import os
 import shutil
 import logging
+import subprocess
 from sys import platform as _platform_
 
 from cybld.cybld_config_settings import CyBldConfigSettings
@@ -48,36 +48,49 @@ class CyBldNotifier:
         if self.settings.tmux_fail is True:
             self._notify_tmux_fail(msg)
 
+    def notify_early_fail(self, msg):
+        """
+        If so configured, send a fail message for the first error of a
+        command which is still running (no bell, the command is not done yet)
+        """
+        # The message is an arbitrary line of the output, which is never
+        # passed through a shell (nor expanded by tmux)
+        if self.settings.notify_fail is True:
+            self._notify_system_fail(msg)
+
+        if self.settings.tmux_fail is True:
+            self._notify_tmux_fail(msg)
+
     def _ring_bell(self):
         print("\a")
 
     def _notify_system_success(self, msg):
-        if _platform_ == "linux":
-            notify_cmd = "notify-send -a cybld -t " + str(self.settings.notify_timeout) + \
-                         " 'cybld - success' " + "'" + msg + "'"
-        elif _platform_ == "darwin":
-            notify_cmd = "osascript -e 'display notification \"" + msg + "\"" + \
-                         " with title \"cybld - success\"'"
-
-        os.system(notify_cmd)
+        self._notify_system("cybld - success", msg, "normal")
 
     def _notify_system_fail(self, msg):
+        self._notify_system("cybld - fail", msg, "critical")
+
+    def _notify_system(self, title, msg, urgency):
+        """ Arguments are passed as a list, the message is never interpreted by a shell """
         if _platform_ == "linux":
-            notify_cmd = "notify-send -a cybld -u critical -t " + str(self.settings.notify_timeout) + \
-                         " 'cybld - fail' " + "'" + msg + "'"
+            notify_cmd = ["notify-send", "-a", "cybld", "-u", urgency,
+                          "-t", str(self.settings.notify_timeout), title, msg]
         elif _platform_ == "darwin":
-            notify_cmd = "osascript -e 'display notification \"" + msg + "\"" + \
-                         " with title \"cybld - fail\"'"
+            notify_cmd = ["osascript", "-e", "display notification " + _quote_applescript(msg) +
+                          " with title " + _quote_applescript(title)]
+        else:
+            return
 
-        os.system(notify_cmd)
+        try:
+            subprocess.call(notify_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as ex:
+            logging.warning("Could not send notification: {0}".format(ex))
 
     def _notify_tmux_success(self, msg):
-        full_msg = "\"cybld - success: " + msg + "\""
-        cybld_tmux_wrapper.CyBldTmuxWrapper.display_message(full_msg)
+        cybld_tmux_wrapper.CyBldTmuxWrapper.display_message("cybld - success: " + msg)
 
     def _notify_tmux_fail(self, msg):
-        full_msg = "\"cybld - fail: " + msg + "\""
-        cybld_tmux_wrapper.CyBldTmuxWrapper.display_message(full_msg)
+        cybld_tmux_wrapper.CyBldTmuxWrapper.display_message("cybld - fail: " + msg)
 
     def _check_notify(self):
         """ If notifications are enabled, notify-send needs to be available """
@@ -86,3 +99,9 @@ class CyBldNotifier:
                 logging.critical("Notifications enabled, but notify-send not available")
                 sys.exit(1)
             # Assume that apples "display notification" is available
+
+# --------------------------------------------------------------------------
+
+def _quote_applescript(text: str) -> str:
+    """ AppleScript string literal """
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
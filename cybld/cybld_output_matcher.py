@@ -0,0 +1,107 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import re
+
+# --------------------------------------------------------------------------
+
+# Lines longer than this are only matched partially
+MAX_LINE_LENGTH = 4096
+
+# --------------------------------------------------------------------------
+
+def compile_output_regex(error_regex: str, warning_regex: str):
+    """
+    Combine the error and the warning regex into one pattern (with the named
+    groups "error" and "warning"), so that every chunk is only scanned once.
+    The pattern works on bytes and ^/$ match at every line.
+
+    :param error_regex:   Regex for errors (or None).
+    :param warning_regex: Regex for warnings (or None).
+
+    :return: The compiled pattern or None if neither regex is given.
+    """
+    alternatives = []
+    if error_regex:
+        alternatives.append("(?P<error>{0})".format(error_regex))
+    if warning_regex:
+        alternatives.append("(?P<warning>{0})".format(warning_regex))
+
+    if len(alternatives) == 0:
+        return None
+
+    return re.compile("|".join(alternatives).encode(), re.MULTILINE)
+
+# --------------------------------------------------------------------------
+
+class CyBldOutputMatcher:
+    """
+    Sink which scans the (colorless) output of a command for errors and
+    warnings while the command is running.
+
+    Only complete lines are scanned (the rest of a chunk is kept until the
+    next chunk arrives), so matches can't be split across chunks.
+
+    :param pattern:  The combined pattern (refer to compile_output_regex).
+    :type pattern:   re.Pattern
+
+    :param on_error: Function which is called with the first error line (str)
+                     as soon as it shows up (or None).
+    """
+
+    def __init__(self, pattern, on_error = None):
+        self.pattern     = pattern
+        self.on_error    = on_error
+        self.errors      = 0
+        self.warnings    = 0
+        self.first_error = None
+
+        self._partial_line = b""
+
+    def write(self, text: bytes):
+        """ Scan all complete lines of the given text """
+        last_newline = text.rfind(b"\n")
+        if last_newline < 0:
+            self._partial_line = (self._partial_line + text)[-MAX_LINE_LENGTH:]
+            return
+
+        lines              = self._partial_line + text[:last_newline + 1]
+        self._partial_line = text[last_newline + 1:][-MAX_LINE_LENGTH:]
+        self._scan(lines)
+
+    def flush(self):
+        """ Scan the last line (if the output did not end with a newline) """
+        lines              = self._partial_line
+        self._partial_line = b""
+        if len(lines) > 0:
+            self._scan(lines)
+
+    def get_matches_str(self) -> str:
+        """ Returns a printable representation of the matches """
+        ret = "errors: {0}, warnings: {1}".format(self.errors, self.warnings)
+        if self.first_error is not None:
+            ret = "{0} (first error: {1})".format(ret, self.first_error)
+        return ret
+
+    def _scan(self, lines: bytes):
+        for match in self.pattern.finditer(lines):
+            # Not lastgroup, the regexes may contain (named) groups themselves
+            if match.groupdict().get("warning") is not None:
+                self.warnings += 1
+                continue
+
+            self.errors += 1
+            if self.first_error is None:
+                line_start = lines.rfind(b"\n", 0, match.start()) + 1
+                line_end   = lines.find(b"\n", match.start())
+                if line_end < 0:
+                    line_end = len(lines)
+                self.first_error = lines[line_start:line_end].decode(errors="replace").strip()
+
+                if self.on_error is not None:
+                    self.on_error(self.first_error)
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import time
+
+from cybld import cybld_helpers
+
+# --------------------------------------------------------------------------
+
+# monotonic_ns is only available since Python 3.7
+try:
+    _now_ns = time.monotonic_ns
+except AttributeError:
+    def _now_ns():
+        return int(time.monotonic() * 1000 * 1000 * 1000)
+
+# --------------------------------------------------------------------------
+
+class CyBldPhase:
+    """ The points in time which are recorded during an exec (in order) """
+    received     = "received"
+    dispatched   = "dispatched"
+    spawned      = "spawned"
+    first_output = "first_output"
+    exited       = "exited"
+    log_written  = "log_written"
+    neovim       = "neovim"
+    notified     = "notified"
+
+    ALL = [received, dispatched, spawned, first_output, exited,
+           log_written, neovim, notified]
+
+    # Name of the phase which ends with the given point in time
+    NAMES = {dispatched:   "dispatch",
+             spawned:      "spawn",
+             first_output: "first output",
+             exited:       "run",
+             log_written:  "log",
+             neovim:       "neovim",
+             notified:     "notify"}
+
+# --------------------------------------------------------------------------
+
+class CyBldPhaseTimer:
+    """
+    Records when an exec reached each phase (refer to CyBldPhase), from
+    receiving the IPC message until all notifications have been sent.
+
+    Uses a monotonic clock with nanosecond resolution. Only the first time
+    a point is reached is recorded, points which are never reached (i. e.
+    no output at all or a runner instead of a shell command) are skipped.
+    """
+
+    def __init__(self):
+        self._marks = dict()
+        self.mark(CyBldPhase.received)
+
+    def mark(self, phase: str):
+        """ Record that the given point in time has been reached (now) """
+        if phase not in self._marks:
+            self._marks[phase] = _now_ns()
+
+    def on_output(self, chunk: bytes):
+        """ Sink which records the first output byte """
+        if CyBldPhase.first_output not in self._marks:
+            self._marks[CyBldPhase.first_output] = _now_ns()
+
+    def get_phases(self):
+        """
+        Get the duration of every phase, i. e. from the previous recorded
+        point in time until the given one.
+
+        :rtype: list
+        :return: List of tuples of phase name and duration (nanoseconds).
+        """
+        phases   = []
+        previous = self._marks[CyBldPhase.received]
+
+        for phase in CyBldPhase.ALL[1:]:
+            if phase in self._marks:
+                phases.append((CyBldPhase.NAMES[phase], self._marks[phase] - previous))
+                previous = self._marks[phase]
+
+        return phases
+
+    def get_total(self) -> int:
+        """ Nanoseconds from receiving the request until the last recorded point """
+        return max(self._marks.values()) - self._marks[CyBldPhase.received]
+
+    def get_timing_str(self) -> str:
+        """ Returns a printable representation of all phases """
+        phases = ", ".join("{0} {1}".format(name, cybld_helpers.format_duration(duration))
+                           for name, duration in self.get_phases())
+        return "timing: {0} (total {1})".format(phases, cybld_helpers.format_duration(self.get_total()))
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import logging
+import os
+import signal
+import threading
+import time
+
+# --------------------------------------------------------------------------
+
+def terminate_process_group(pgid: int, grace_period: float):
+    """
+    Send SIGTERM to every process of the given process group. Processes
+    which are still alive after the grace period get a SIGKILL (this happens
+    in the background, the function returns immediately).
+
+    :param pgid:         The process group id (the pid of a process started
+                         with start_new_session).
+    :type pgid:          int
+
+    :param grace_period: Seconds to wait before escalating to SIGKILL.
+    :type grace_period:  float
+    """
+    if not _signal_process_group(pgid, signal.SIGTERM):
+        return
+
+    timer = threading.Timer(grace_period, _kill_process_group, args = (pgid,))
+    timer.daemon = True
+    timer.start()
+
+# --------------------------------------------------------------------------
+
+class CyBldProcessWatchdog:
+    """
+    Terminates the process group of a process which runs longer than the
+    timeout or does not write any output (passed to feed) for hang_timeout
+    seconds. expired tells why ("timeout" or "hang", None if it didn't).
+
+    :param pgid:         The process group id.
+    :param timeout:      Max. run time in seconds (<= 0: no limit).
+    :param hang_timeout: Max. time without output in seconds (<= 0: no
+                         limit).
+    :param grace_period: Seconds until SIGTERM is escalated to SIGKILL.
+    """
+
+    def __init__(self, pgid: int, timeout: float, hang_timeout: float, grace_period: float):
+        self.pgid         = pgid
+        self.timeout      = timeout
+        self.hang_timeout = hang_timeout
+        self.grace_period = grace_period
+        self.expired      = None
+
+        self._start       = time.monotonic()
+        self._last_output = self._start
+        self._stopped     = threading.Event()
+
+        self._thread = threading.Thread(target = self._watch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def feed(self, chunk: bytes):
+        """ Sink for the output of the process """
+        self._last_output = time.monotonic()
+
+    def stop(self):
+        """ The process is done """
+        self._stopped.set()
+
+    def _watch(self):
+        while True:
+            deadlines = []
+            if self.timeout > 0:
+                deadlines.append((self._start + self.timeout, "timeout"))
+            if self.hang_timeout > 0:
+                deadlines.append((self._last_output + self.hang_timeout, "hang"))
+            if len(deadlines) == 0:
+                return
+
+            deadline, reason = min(deadlines)
+            remaining        = deadline - time.monotonic()
+            if remaining <= 0:
+                self.expired = reason
+                terminate_process_group(self.pgid, self.grace_period)
+                return
+
+            if self._stopped.wait(remaining):
+                return
+
+# --------------------------------------------------------------------------
+
+def _kill_process_group(pgid: int):
+    # Signal 0 only checks whether any process of the group is still alive
+    if _signal_process_group(pgid, 0):
+        logging.warning("Processes ignored SIGTERM, sending SIGKILL")
+        _signal_process_group(pgid, signal.SIGKILL)
+
+# --------------------------------------------------------------------------
+
+def _signal_process_group(pgid: int, signum: int) -> bool:
+    try:
+        os.killpg(pgid, signum)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        logging.critical("Not allowed to signal process group {0}".format(pgid))
+        return False
+
+    return True
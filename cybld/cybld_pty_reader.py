@@ -0,0 +1,87 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import errno
+import os
+import selectors
+
+# --------------------------------------------------------------------------
+
+class CyBldPtyReader:
+    """
+    Event driven reader for the master side of a pty.
+
+    Waits until the master file descriptor is readable (epoll/kqueue via
+    selectors), reads big chunks and forwards them as they are (no line
+    splitting) to all sinks. Reading only stops at EOF, i. e. once every
+    process closed the slave side, so the last lines can't get lost.
+
+    :param master_fd: The master file descriptor of the pty.
+    :type master_fd:  int
+
+    :param sinks:     Callables which get every chunk (bytes) passed.
+    :type sinks:      list
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, master_fd: int, sinks):
+        self.master_fd  = master_fd
+        self.sinks      = sinks
+        self.bytes_read = 0
+
+    def read_until_eof(self):
+        """ Forward all output to the sinks until the slave side is closed """
+        self.read_until(lambda: False)
+
+    def read_until(self, done) -> bool:
+        """
+        Forward all output to the sinks until done() returns True (checked
+        after every chunk) or the slave side is closed.
+
+        :param done: Callable which returns True once reading should stop.
+
+        :rtype: bool
+        :return: False if reading stopped because of EOF.
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.master_fd, selectors.EVENT_READ)
+
+            while True:
+                selector.select()
+
+                chunk = self._read_chunk()
+                if not chunk:
+                    return False
+
+                self.bytes_read += len(chunk)
+                for sink in self.sinks:
+                    sink(chunk)
+
+                if done():
+                    return True
+
+    def _read_chunk(self) -> bytes:
+        """ Read the next chunk, returns an empty chunk on EOF """
+        try:
+            return os.read(self.master_fd, self.CHUNK_SIZE)
+        except OSError as oserr:
+            # Linux signals a hung up pty (all slaves closed) with EIO
+            # instead of an empty read.
+            if oserr.errno == errno.EIO:
+                return b""
+            raise
+
+# --------------------------------------------------------------------------
+
+def write_to_stdout(chunk: bytes):
+    """ Sink which writes the chunk to stdout (handles partial writes) """
+    view = memoryview(chunk)
+    while len(view) > 0:
+        written = os.write(1, view)
+        view    = view[written:]
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import threading
+import time
+
+# --------------------------------------------------------------------------
+
+class CyBldTokenBucket:
+    """
+    Token bucket rate limiter: every message takes one token, the bucket is
+    refilled with rate tokens per second up to burst tokens.
+
+    :param rate:  Tokens per second (<= 0 disables the limit).
+    :type rate:   float
+
+    :param burst: Max. number of tokens, i. e. how many messages may arrive
+                  at once.
+    :type burst:  int
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate    = rate
+        self.burst   = max(1, burst)
+        self.dropped = 0
+
+        self._tokens  = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token.
+
+        :rtype: bool
+        :return: False if the bucket is empty (the message should be dropped).
+        """
+        if self.rate <= 0:
+            return True
+
+        with self._lock:
+            now           = time.monotonic()
+            self._tokens  = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens < 1:
+                self.dropped += 1
+                return False
+
+            self._tokens -= 1
+            return True
+
+# --------------------------------------------------------------------------
+
+class CyBldDebouncer:
+    """
+    Calls the callback once a burst of triggers (with the same key) settled,
+    i. e. no further trigger arrived within the window. Only the arguments
+    of the last trigger of a burst are passed.
+
+    :param window:   The debounce window in seconds (<= 0 calls the callback
+                     immediately).
+    :type window:    float
+
+    :param callback: Function which is called with the arguments of the last
+                     trigger (from a timer thread).
+    """
+
+    def __init__(self, window: float, callback):
+        self.window     = window
+        self.callback   = callback
+        self.suppressed = 0
+
+        self._timers = dict()
+        self._lock   = threading.Lock()
+
+    def trigger(self, key, *args):
+        """ Schedule the callback (restarts the window of the given key) """
+        if self.window <= 0:
+            self.callback(*args)
+            return
+
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is not None:
+                timer.cancel()
+                self.suppressed += 1
+
+            timer = threading.Timer(self.window, self._fire, args = (key, args))
+            timer.daemon = True
+            self._timers[key] = timer
+            timer.start()
+
+    def cancel_all(self):
+        """ Drop all pending triggers """
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def _fire(self, key, args):
+        with self._lock:
+            # A newer trigger replaced the timer right before it fired
+            if self._timers.get(key) is not threading.current_thread():
+                return
+            del self._timers[key]
+
+        self.callback(*args)
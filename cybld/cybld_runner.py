@@ -6,17 +6,113 @@
 #
 # --------------------------------------------------------------------------
 
+from concurrent.futures import ThreadPoolExecutor
+
 import os
+import pty
+import subprocess
+import termios
+import threading
 import time
 
+from cybld import cybld_process, cybld_pty_reader, cybld_rusage, cybld_terminal
+
+from cybld.cybld_ansi_stripper import CyBldAnsiStripper
 from cybld.cybld_config_runner import CyBldConfigRunner
+from cybld.cybld_runner_cache import CyBldRunnerCache, get_default_cache_path
+from cybld.cybld_runner_discovery import CyBldDiscoveryIndex
+from cybld.cybld_runner_schedule import CyBldRunnerHistory, CyBldRunnerSchedulePolicy, \
+    get_default_history_path, schedule_params
 from cybld.cybld_runner_results import CyBldRunnerResults, CyBldRunnerSingleResult, CyBldRunnerResultType
+from cybld.cybld_runner_store import CyBldRunnerStore, get_default_store_path
+
+# --------------------------------------------------------------------------
+
+# Seconds until a param which timed out gets a SIGKILL (after the SIGTERM)
+TIMEOUT_GRACE_PERIOD = 2.0
+
+# --------------------------------------------------------------------------
+
+class CyBldRunnerOrderedOutput:
+    """
+    Prints the output of params which ran in parallel in the order of the
+    params (as soon as the output of all previous params has been printed)
+    and adds their results in the same order.
+
+    :param results: The results the finished params are added to.
+    :type results:  CyBldRunnerResults
+
+    :param count:   The number of params (or batches).
+    :type count:    int
+
+    :param output:  Sink for the output (bytes).
+    """
+
+    def __init__(self, results: CyBldRunnerResults, count: int, output = cybld_pty_reader.write_to_stdout):
+        self.results = results
+        self.output  = output
 
+        self._finished = [None] * count
+        self._next     = 0
+        self._lock     = threading.Lock()
+
+    def add(self, index: int, result: CyBldRunnerSingleResult, output: bytes):
+        """
+        Add the finished param with the given index (result is None if the
+        param has been skipped).
+        """
+        self.add_all(index, [] if result is None else [result], output)
+
+    def add_all(self, index: int, results, output: bytes):
+        """ Add the results of the finished batch of params with the given index """
+        with self._lock:
+            self._finished[index] = (results, output)
+
+            while self._next < len(self._finished) and self._finished[self._next] is not None:
+                results, output = self._finished[self._next]
+                self._finished[self._next] = False
+                self._next += 1
+
+                if len(output) > 0:
+                    self.output(output)
+                for result in results:
+                    self.results.add_result(result)
+
+# --------------------------------------------------------------------------
 
 class CyBldRunner:
     """
     Provides the possibility to run a command multiple times with found files as parameter.
 
+    In incremental mode, params which did not change since they succeeded
+    are not executed (refer to CyBldRunnerCache), they are reported as
+    cached passes.
+
+    With more than one job (refer to CyBldConfigRunner), the params are
+    executed by a pool of worker threads. The output of every param is
+    captured (on its own pty, so colors are kept) and printed in the order
+    of the params.
+
+    With a batch size (refer to CyBldConfigRunner), several params are
+    passed to a single invocation of the command. If a batch fails, the
+    failed params are taken from its output (fail_regex) or the batch is
+    bisected until the failed params are known.
+
+    A param which runs longer than the timeout or does not print anything
+    for hang_timeout seconds is killed (its whole process group) and
+    reported as timeout. Failed params can be retried, params which pass on
+    a retry are reported as flaky.
+
+    With the result store, every run is stored and compared with an
+    earlier run (compare_to), even after a restart of the server.
+
+    By default, the params are executed in the order they are found. The
+    schedule policies (refer to schedule_params) order them by the outcome
+    or the run time of their last run instead (refer to CyBldRunnerHistory).
+
+    The output of the params and the results are written to stdout, unless
+    another sink is set as output (i. e. to prefix every line).
+
     :param config:     the configuration of the runner
     :type config:      cybld_config_runner.CyBldConfigRunner
     """
@@ -25,6 +121,29 @@ class CyBldRunner:
         self.config  = config
         self.results = CyBldRunnerResults()
         self.params  = []
+        self.output  = cybld_pty_reader.write_to_stdout
+
+        self._proc         = None
+        self._procs        = set()
+        self._procs_lock   = threading.Lock()
+        self._cancelled    = False
+        self._last_usage   = None
+        self._last_expired = None
+
+        self.cache = None
+        if config.incremental:
+            self.cache = CyBldRunnerCache(config.cache_path or get_default_cache_path(config.name),
+                                          config.command)
+
+        self.discovery = CyBldDiscoveryIndex(config.regex_find_params, config.exclude_dirs, config.watch)
+
+        self.history = None
+        if config.schedule != CyBldRunnerSchedulePolicy.walk:
+            self.history = CyBldRunnerHistory(config.history_path or get_default_history_path(config.name))
+
+        self.store = None
+        if config.result_store:
+            self.store = CyBldRunnerStore(config.store_path or get_default_store_path())
 
         self._populate_params()
 
@@ -35,54 +154,398 @@ class CyBldRunner:
 
         Also prints the results in a pretty way.
 
-        :return:    Returns True if every command succeeded, False otherwise.
+        Note that a cancel before the run is kept (refer to reset_cancel).
+
+        :return:    Returns True if every command succeeded, False otherwise
+                    (or if the run has been cancelled).
         """
         self.results.finish()
         self._populate_params()
 
+        if self.history is not None:
+            self.params = schedule_params(self.params, self.config.schedule, self.history.get)
+
+        if self.config.batch_size > 1:
+            success = self._run_batched()
+        elif self.config.jobs > 1 and len(self.params) > 1:
+            success = self._run_parallel()
+        else:
+            success = self._run_sequential()
+
+        if self.cache is not None:
+            self.cache.write()
+        if self.history is not None:
+            self.history.write()
+
+        if self.store is not None and not self._cancelled:
+            self._store_and_compare()
+        else:
+            self._to_string()
+        return success
+
+    def _run_sequential(self) -> bool:
+        """ Run one param after another (the output goes to the terminal) """
         success = True
         for param in self.params:
-            if not self._run_single(param):
+            if self._cancelled:
+                success = False
+                break
+
+            cached_result = self._get_cached_result(param)
+            if cached_result is not None:
+                self.results.add_result(cached_result)
+            elif not self._run_single(param):
                 success = False
 
-        self._to_string()
         return success
 
-    def _to_string(self):
+    def _run_parallel(self) -> bool:
+        """ Run the params on a pool of config.jobs workers """
+        ordered_output = CyBldRunnerOrderedOutput(self.results, len(self.params), self.output)
+
+        with ThreadPoolExecutor(max_workers = self.config.jobs) as executor:
+            futures = [executor.submit(self._run_single_captured, index, param, ordered_output)
+                       for index, param in enumerate(self.params)]
+            success = all([future.result() for future in futures])
+
+        return success and not self._cancelled
+
+    def _run_batched(self) -> bool:
+        """ Run the params in batches of config.batch_size (on a pool of config.jobs workers) """
+        params = []
+        for param in self.params:
+            cached_result = self._get_cached_result(param)
+            if cached_result is not None:
+                self.results.add_result(cached_result)
+            else:
+                params.append(param)
+
+        batches        = [params[index:index + self.config.batch_size]
+                          for index in range(0, len(params), self.config.batch_size)]
+        ordered_output = CyBldRunnerOrderedOutput(self.results, len(batches), self.output)
+
+        with ThreadPoolExecutor(max_workers = self.config.jobs) as executor:
+            futures = [executor.submit(self._run_batch_captured, index, batch, ordered_output)
+                       for index, batch in enumerate(batches)]
+            success = all([future.result() for future in futures])
+
+        return success and not self._cancelled
+
+    def _run_batch_captured(self, index: int, batch, ordered_output: CyBldRunnerOrderedOutput):
+        """ Run a batch of params in a worker thread (refer to _run_batch) """
+        results = []
+        output  = []
+        try:
+            self._run_batch(batch, results, output)
+        finally:
+            ordered_output.add_all(index, results, b"".join(output))
+
+        return len(results) == len(batch) and all([result.is_success() for result in results])
+
+    def _run_batch(self, batch, results, output):
+        """
+        Run the command once with all params of the batch and add a result
+        for every param. A failed batch is split in halves and both halves
+        are run again, unless the fail_regex names the failed params.
+
+        :param batch:   The params
+        :param results: The list the results are added to
+        :param output:  The list the output (bytes) of every run is added to
+        """
+        if self._cancelled:
+            return
+
+        start = time.time()
+        returncode, batch_output, usage, expired = \
+            self._execute_captured_system_command(self.config.command + " " + " ".join(batch),
+                                                  timeout_factor = len(batch))
+        end = time.time()
+
+        failed = None
+        if returncode == 0:
+            failed = set()
+        elif len(batch) == 1:
+            failed = set(batch)
+        elif self.config.fail_regex is not None and expired is None:
+            failed = self._find_failed_params(batch, batch_output) or None
+
+        if failed is None:
+            # Every param runs again as part of a half
+            half = len(batch) // 2
+            self._run_batch(batch[:half], results, output)
+            self._run_batch(batch[half:], results, output)
+            return
+
+        output.append(batch_output)
+
+        def execute(command):
+            returncode, retry_output, usage, expired = self._execute_captured_system_command(command)
+            output.append(retry_output)
+            return returncode, usage, expired
+
+        runtime = (end - start) / len(batch)
+        for param in batch:
+            success = param not in failed
+            if not success and self.config.retries > 0 and not self._cancelled:
+                results.append(self._run_attempts(param, execute, first_attempt = 2))
+                continue
+
+            single_result = CyBldRunnerSingleResult(self.config.command, param)
+            if success:
+                single_result.set_result(CyBldRunnerResultType.success, int(runtime))
+            elif expired is not None:
+                single_result.set_result(CyBldRunnerResultType.timeout, int(runtime))
+            else:
+                single_result.set_result(CyBldRunnerResultType.fail, int(runtime))
+
+            # The resource usage of the batch is only counted once
+            if param == batch[0]:
+                single_result.usage = usage
+
+            self._record(param, success, runtime)
+            results.append(single_result)
+
+    def _find_failed_params(self, batch, batch_output: bytes):
+        """ The params of the batch named by the fail_regex in the (colorless) output """
+        text = CyBldAnsiStripper().feed(batch_output).decode(errors = "replace")
+
+        by_path = {os.path.abspath(param): param for param in batch}
+        failed  = set()
+        for match in self.config.fail_regex.finditer(text):
+            if "param" in self.config.fail_regex.groupindex:
+                name = match.group("param")
+            else:
+                name = match.group(1) if self.config.fail_regex.groups > 0 else match.group(0)
+
+            param = by_path.get(os.path.abspath(name.strip())) if name else None
+            if param is not None:
+                failed.add(param)
+
+        return failed
+
+    def _to_string(self, baseline = None, title: str = "PREVIOUS TEST RESULTS"):
         """ Simple helper method printing both the results and te comparion """
-        self.results.print_results()
-        self.results.print_comparison()
+        # One write for all result lines (there might be thousands of params)
+        sink = None if self.output is cybld_pty_reader.write_to_stdout else self.output
+        with cybld_terminal.buffered(sink):
+            self.results.print_results()
+            self.results.print_comparison(baseline, title)
+
+    def _store_and_compare(self):
+        """ Store the current results and compare them with the configured earlier run """
+        self.store.add_run(self.config.name, self.results.current_results)
+
+        baseline    = dict()
+        baseline_id = self.store.get_earlier_run_id(self.config.name, self.config.compare_to)
+        if baseline_id is not None:
+            baseline = self.store.get_results(baseline_id)
+
+        if self.config.compare_to == 1:
+            title = "PREVIOUS TEST RESULTS (RUN {0})".format(baseline_id)
+        else:
+            title = "TEST RESULTS OF RUN {0} ({1} RUNS AGO)".format(baseline_id, self.config.compare_to)
+        self._to_string(baseline, title)
 
     def _populate_params(self):
-        """ Recursively find all files matching the configured regex and add them to self.params """
-        self.params = []
-        for root, dirs, files in os.walk(os.curdir):
-            for file in files:
-                fullfile = str(os.path.join(root, file))
-                if self.config.regex_find_params.match(fullfile):
-                    self.params.append(fullfile)
+        """ Find all files matching the configured regex (refer to CyBldDiscoveryIndex) """
+        self.params = self.discovery.find()
 
     def _run_single(self, param: str):
         """ Run the command (while timing it) and store the result """
+        single_result = self._run_attempts(param, self._execute_single)
+
+        self.results.add_result(single_result)
+        return single_result.is_success()
+
+    def _run_single_captured(self, index: int, param: str, ordered_output: CyBldRunnerOrderedOutput):
+        """ Run the command in a worker thread (refer to _run_single) """
+        if self._cancelled:
+            ordered_output.add(index, None, b"")
+            return False
+
+        cached_result = self._get_cached_result(param)
+        if cached_result is not None:
+            ordered_output.add(index, cached_result, b"")
+            return True
+
+        output = []
+
+        def execute(command):
+            returncode, attempt_output, usage, expired = self._execute_captured_system_command(command)
+            output.append(attempt_output)
+            return returncode, usage, expired
+
+        try:
+            single_result = self._run_attempts(param, execute)
+        except:
+            # Don't hold back the output of the following params
+            ordered_output.add(index, None, b"".join(output))
+            raise
+
+        ordered_output.add(index, single_result, b"".join(output))
+        return single_result.is_success()
+
+    def _run_attempts(self, param: str, execute, first_attempt: int = 1):
+        """
+        Run the command with the given param (again, up to config.retries
+        times, as long as it fails) and record the result.
+
+        :param param:         The param
+        :param execute:       Executes the given command, returns the
+                              returncode, the CyBldResourceUsage and why it
+                              has been killed (refer to CyBldProcessWatchdog)
+        :param first_attempt: The number of the first attempt (> 1 if the
+                              param already failed in a batch)
+        :rtype:               CyBldRunnerSingleResult
+        """
         single_result = CyBldRunnerSingleResult(self.config.command, param)
 
-        start = time.time()
+        for attempt in range(first_attempt, self.config.retries + 2):
+            start = time.time()
+            returncode, usage, expired = execute(self.config.command + " " + param)
+            end = time.time()
 
-        success = False
-        if self._execute_single_system_command(self.config.command + " " + param) == 0:
-            success = True
+            single_result.attempts = attempt
+            if usage is not None:
+                single_result.usage = usage if single_result.usage is None else single_result.usage + usage
 
-        end = time.time()
+            if returncode == 0:
+                single_result.set_result(CyBldRunnerResultType.success, int(end - start))
+                break
 
-        if success:
-            single_result.set_result(CyBldRunnerResultType.success,
-                                     int(end - start))
-        else:
-            single_result.set_result(CyBldRunnerResultType.fail,
-                                     int(end - start))
+            if expired is not None:
+                single_result.set_result(CyBldRunnerResultType.timeout, int(end - start))
+            else:
+                single_result.set_result(CyBldRunnerResultType.fail, int(end - start))
 
-        self.results.add_result(single_result)
-        return success
+            if self._cancelled:
+                break
+
+        self._record(param, single_result.is_success(), end - start)
+        return single_result
+
+    def _record(self, param: str, success: bool, runtime: float):
+        """ Update the cache and the history with the outcome of an executed param """
+        if self.cache is not None:
+            self.cache.update(param, success)
+        if self.history is not None:
+            self.history.update(param, success, runtime)
+
+    def _get_cached_result(self, param: str):
+        """ A cached pass if the param can be skipped (incremental mode), otherwise None """
+        if self.cache is None or not self.cache.is_unchanged(param):
+            return None
+
+        cached_result = CyBldRunnerSingleResult(self.config.command, param)
+        cached_result.set_result(CyBldRunnerResultType.cached, 0)
+        return cached_result
+
+    def cancel(self, grace_period: float):
+        """
+        Cancel the current run_all: kill the process group of the running
+        command and skip all remaining params.
+
+        :param grace_period: Seconds until SIGTERM is escalated to SIGKILL.
+        """
+        self._cancelled = True
+
+        proc = self._proc
+        if proc is not None:
+            cybld_process.terminate_process_group(proc.pid, grace_period)
+
+        with self._procs_lock:
+            procs = list(self._procs)
+        for proc in procs:
+            cybld_process.terminate_process_group(proc.pid, grace_period)
+
+    def close(self):
+        """ Release the resources of the runner (i. e. the inotify watches) """
+        self.discovery.close()
+
+    def reset_cancel(self):
+        """ Forget the cancel of the previous run (before the next run_all) """
+        self._cancelled = False
+
+    def _execute_single(self, command: str):
+        """ Execute the command in the foreground (refer to _run_attempts) """
+        self._last_usage   = None
+        self._last_expired = None
+        returncode         = self._execute_single_system_command(command)
+        return returncode, self._last_usage, self._last_expired
 
     def _execute_single_system_command(self, command: str):
-        return os.system(command)
+        if self.config.hang_timeout > 0 or self.output is not cybld_pty_reader.write_to_stdout:
+            # The output has to be watched or redirected (but is still printed right away)
+            returncode, _, self._last_usage, self._last_expired = \
+                self._execute_captured_system_command(command, live = True)
+            return returncode
+
+        # Own process group, so that cancel() reaches all children
+        self._proc = subprocess.Popen(command, shell=True, start_new_session=True)
+        if self._cancelled:
+            cybld_process.terminate_process_group(self._proc.pid, 0)
+
+        watchdog = self._start_watchdog(self._proc)
+        returncode, self._last_usage = cybld_rusage.wait_for_process(self._proc)
+        if watchdog is not None:
+            watchdog.stop()
+            self._last_expired = watchdog.expired
+
+        self._proc = None
+        return returncode
+
+    def _start_watchdog(self, proc, timeout_factor: int = 1):
+        """ Watchdog enforcing the timeouts of the config (None if there are none) """
+        if self.config.timeout <= 0 and self.config.hang_timeout <= 0:
+            return None
+
+        return cybld_process.CyBldProcessWatchdog(proc.pid, self.config.timeout * timeout_factor,
+                                                  self.config.hang_timeout, TIMEOUT_GRACE_PERIOD)
+
+    def _execute_captured_system_command(self, command: str, live: bool = False, timeout_factor: int = 1):
+        """
+        Execute the command on its own pty and collect its output.
+
+        :param live:           Write the output to the output sink right away
+                               instead of collecting it.
+        :param timeout_factor: The timeout is multiplied by this (i. e. the
+                               number of params of a batch).
+        :return:               Tuple of the returncode, the output (bytes),
+                               the CyBldResourceUsage and why the command
+                               has been killed (refer to
+                               CyBldProcessWatchdog, None if it wasn't)
+        """
+        master, slave = pty.openpty()
+
+        # This prevents LF from being converted to CRLF
+        attr = termios.tcgetattr(slave)
+        attr[1] = attr[1] & ~termios.ONLCR
+        termios.tcsetattr(slave, termios.TCSADRAIN, attr)
+
+        proc = subprocess.Popen(command, shell=True, stdout=slave, stderr=slave,
+                                start_new_session=True)
+        os.close(slave)
+
+        with self._procs_lock:
+            self._procs.add(proc)
+        if self._cancelled:
+            cybld_process.terminate_process_group(proc.pid, 0)
+
+        output   = []
+        sinks    = [self.output] if live else [output.append]
+        watchdog = self._start_watchdog(proc, timeout_factor)
+        if watchdog is not None:
+            sinks.append(watchdog.feed)
+
+        try:
+            cybld_pty_reader.CyBldPtyReader(master, sinks).read_until_eof()
+        finally:
+            os.close(master)
+            returncode, usage = cybld_rusage.wait_for_process(proc)
+            if watchdog is not None:
+                watchdog.stop()
+
+            with self._procs_lock:
+                self._procs.discard(proc)
+
+        return returncode, b"".join(output), usage, watchdog.expired if watchdog is not None else None
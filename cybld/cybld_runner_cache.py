@@ -0,0 +1,144 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from cybld import cybld_helpers
+
+# --------------------------------------------------------------------------
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+# --------------------------------------------------------------------------
+
+def get_default_cache_path(runner_name: str) -> str:
+    """ The default cache file of the given runner ($XDG_DATA_HOME/cybld/runner_cache) """
+    return os.path.join(cybld_helpers.get_data_path(), "runner_cache", runner_name + ".json")
+
+# --------------------------------------------------------------------------
+
+def hash_file(path: str) -> str:
+    """ The sha1 of the content of the given file """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as param_file:
+        for chunk in iter(lambda: param_file.read(HASH_CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+# --------------------------------------------------------------------------
+
+class CyBldRunnerCache:
+    """
+    Remembers the params (files) of a runner which succeeded, so that they
+    can be skipped as long as they don't change (incremental mode).
+
+    A param is unchanged if its mtime and size match the last success. If
+    only the mtime changed (i. e. touched or checked out again), the content
+    hash decides. Params which failed are forgotten, so they are always
+    executed again.
+
+    The cache is bound to the runner command (changing it drops the cache)
+    and stored as JSON, so it survives restarts of the server.
+
+    :param path:    The cache file.
+    :type path:     str
+
+    :param command: The command of the runner.
+    :type command:  str
+    """
+
+    def __init__(self, path: str, command: str):
+        self.path    = path
+        self.command = command
+
+        self._entries = dict()
+        self._lock    = threading.Lock()
+        self._dirty   = False
+
+        self.read()
+
+    def is_unchanged(self, param: str) -> bool:
+        """ Whether the param succeeded and did not change since then """
+        key = os.path.abspath(param)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return False
+
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return False
+
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+
+        try:
+            unchanged = hash_file(key) == entry["sha1"]
+        except OSError:
+            return False
+
+        if unchanged:
+            # Don't hash it again next time
+            with self._lock:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                self._dirty       = True
+        return unchanged
+
+    def update(self, param: str, success: bool):
+        """ Remember the current state of the param (forget it on failure) """
+        key = os.path.abspath(param)
+
+        entry = None
+        if success:
+            try:
+                stat  = os.stat(key)
+                entry = {"mtime_ns": stat.st_mtime_ns,
+                         "size":     stat.st_size,
+                         "sha1":     hash_file(key)}
+            except OSError:
+                pass
+
+        with self._lock:
+            if entry is not None:
+                self._entries[key] = entry
+                self._dirty        = True
+            elif self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def read(self):
+        try:
+            with open(self.path, "r") as cache_file:
+                cache = json.load(cache_file)
+        except FileNotFoundError:
+            return
+        except ValueError as ex:
+            logging.warning("Ignoring corrupt runner cache {0}: {1}".format(self.path, ex))
+            return
+
+        if cache.get("command") == self.command:
+            self._entries = cache.get("params", dict())
+
+    def write(self):
+        """ Store the cache (only if anything changed) """
+        with self._lock:
+            if not self._dirty:
+                return
+            cache       = {"command": self.command, "params": dict(self._entries)}
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        with open(self.path + ".tmp", "w") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(self.path + ".tmp", self.path)
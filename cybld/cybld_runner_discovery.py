@@ -0,0 +1,259 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import errno
+import fnmatch
+import logging
+import os
+import stat
+import time
+
+from cybld import cybld_inotify
+
+# --------------------------------------------------------------------------
+
+# Version control folders never contain params
+DEFAULT_EXCLUDE_DIRS = [".git", ".hg", ".svn"]
+
+# Listings of folders modified less than this ago are not trusted, since
+# another change within the same mtime tick would go unnoticed
+MTIME_GRANULARITY_NS = 2 * 1000 * 1000 * 1000
+
+# --------------------------------------------------------------------------
+
+def parse_exclude_dirs(exclude_dirs: str):
+    """ The folder patterns of a comma and/or whitespace separated list """
+    return [pattern for pattern in exclude_dirs.replace(",", " ").split() if len(pattern) > 0]
+
+# --------------------------------------------------------------------------
+
+def _list_dir(path: str):
+    """
+    Tuples of name, is_dir (follows links) and is_link of all entries of the
+    folder. Uses os.scandir (no stat per entry on most filesystems), falls
+    back to os.listdir and os.stat on Python 3.4. Raises an OSError if the
+    folder can't be listed.
+    """
+    entries = []
+    if hasattr(os, "scandir"):
+        for dir_entry in list(os.scandir(path)):
+            try:
+                entries.append((dir_entry.name, dir_entry.is_dir(), dir_entry.is_symlink()))
+            except OSError:
+                entries.append((dir_entry.name, False, False))
+        return entries
+
+    for name in os.listdir(path):
+        fullpath = os.path.join(path, name)
+        try:
+            entries.append((name, stat.S_ISDIR(os.stat(fullpath).st_mode), os.path.islink(fullpath)))
+        except OSError:
+            entries.append((name, False, os.path.islink(fullpath)))
+    return entries
+
+# --------------------------------------------------------------------------
+
+class CyBldDiscoveryIndex:
+    """
+    Finds the params of a runner (all files below the current folder whose
+    path matches the regex), skipping excluded folders.
+
+    The matching files and the subfolders of every folder are kept together
+    with the mtime of the folder. A folder is only listed again if its
+    mtime changed (a file has been added, removed or renamed), so finding
+    the params again only costs one stat per folder. The index is dropped
+    if the current folder changes.
+
+    In watch mode (Linux only), every folder is watched via inotify instead
+    and only the folders with pending events are listed again. Without any
+    event, finding the params costs nothing. Falls back to the mtimes if
+    inotify is not available or the watch limit is exhausted.
+
+    :param regex:        The compiled regex the params have to match (the
+                         path, relative to the current folder, i. e.
+                         ./tests/test_a.py).
+    :param exclude_dirs: Folder name patterns (fnmatch) which are skipped
+                         (anywhere in the tree).
+    :param watch:        Watch the folders via inotify.
+    """
+
+    def __init__(self, regex, exclude_dirs = None, watch: bool = False):
+        self.regex        = regex
+        self.exclude_dirs = DEFAULT_EXCLUDE_DIRS if exclude_dirs is None else list(exclude_dirs)
+        self.watch        = watch
+
+        self._root    = None
+        self._entries = dict()
+        self._params  = None
+
+        self._inotify = None
+        self._watches = dict()
+        self._watched = dict()
+
+    def is_watching(self) -> bool:
+        return self._inotify is not None
+
+    def find(self):
+        """ All params (same order as os.walk, top-down) """
+        root = os.getcwd()
+        if root != self._root:
+            self._stop_watching()
+            self._root = root
+
+            if self.watch:
+                self._start_watching()
+
+        if self._inotify is not None:
+            self._apply_events()
+            if self._params is not None:
+                return list(self._params)
+
+        try:
+            params = self._scan()
+        except _CyBldWatchLimitError as ex:
+            logging.warning("Can't watch {0} ({1}), falling back to scanning".format(ex.path, ex))
+            self._stop_watching()
+            params = self._scan()
+
+        if self._inotify is not None:
+            self._params = params
+        return list(params)
+
+    def close(self):
+        """ Stop watching """
+        self._stop_watching()
+
+    def _scan(self):
+        untrusted_since = int(time.time() * 1e9) - MTIME_GRANULARITY_NS
+
+        params  = []
+        visited = dict()
+        stack   = [os.curdir]
+        while len(stack) > 0:
+            path  = stack.pop()
+            entry = self._get_entry(path, untrusted_since)
+            if entry is None:
+                continue
+
+            visited[path] = entry
+            params.extend(entry[1])
+            stack.extend(reversed(entry[2]))
+
+        # Forget removed (or excluded) folders
+        for path in set(self._entries) - set(visited):
+            self._unwatch(path)
+        self._entries = visited
+        return params
+
+    def _get_entry(self, path: str, untrusted_since: int):
+        """ Tuple of mtime, matching files and subfolders (None if gone) """
+        if self._inotify is not None:
+            entry = self._entries.get(path)
+            if entry is not None:
+                return entry
+
+            # Before listing it, so that no change gets lost
+            if not self._add_watch(path):
+                return None
+            mtime_ns = None
+        else:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime_ns:
+                return entry
+
+        files   = []
+        subdirs = []
+        try:
+            dir_entries = _list_dir(path)
+        except OSError:
+            return None
+
+        for name, is_dir, is_link in dir_entries:
+            # Like os.walk: links to folders are neither files nor followed
+            if is_dir:
+                if not is_link and not self._is_excluded(name):
+                    subdirs.append(os.path.join(path, name))
+            else:
+                fullfile = os.path.join(path, name)
+                if self.regex.match(fullfile):
+                    files.append(fullfile)
+
+        # Don't keep the listing if the folder might change within the same tick
+        if mtime_ns is not None and mtime_ns >= untrusted_since:
+            mtime_ns = None
+        return (mtime_ns, files, subdirs)
+
+    def _is_excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.exclude_dirs)
+
+    def _start_watching(self):
+        try:
+            self._inotify = cybld_inotify.CyBldInotify()
+        except OSError as ex:
+            logging.warning("Can't use inotify ({0}), falling back to scanning".format(ex))
+
+    def _stop_watching(self):
+        if self._inotify is not None:
+            self._inotify.close()
+
+        self._inotify = None
+        self._watches = dict()
+        self._watched = dict()
+        self._params  = None
+        self._entries = dict()
+
+    def _add_watch(self, path: str) -> bool:
+        """ Watch the given folder (False if it is gone) """
+        try:
+            wd = self._inotify.add_watch(path, cybld_inotify.IN_DIR_CHANGES |
+                                         cybld_inotify.IN_ONLYDIR | cybld_inotify.IN_DONT_FOLLOW)
+        except OSError as ex:
+            if ex.errno in (errno.ENOSPC, errno.ENOMEM):
+                raise _CyBldWatchLimitError(path, ex)
+            return False
+
+        # A renamed folder keeps its watch
+        self._watched.pop(self._watches.get(wd), None)
+        self._watches[wd]   = path
+        self._watched[path] = wd
+        return True
+
+    def _unwatch(self, path: str):
+        wd = self._watched.pop(path, None)
+        if wd is not None and self._watches.get(wd) == path:
+            self._inotify.rm_watch(wd)
+            del self._watches[wd]
+
+    def _apply_events(self):
+        """ Drop the listings of all folders with pending events """
+        for event in self._inotify.read_events():
+            if event.mask & cybld_inotify.IN_Q_OVERFLOW:
+                # Events got lost: list everything again (the watches stay)
+                self._entries = dict()
+                self._params  = None
+                continue
+
+            path = self._watches.get(event.wd)
+            if event.mask & cybld_inotify.IN_IGNORED:
+                self._watches.pop(event.wd, None)
+                self._watched.pop(path, None)
+            if path is not None:
+                self._entries.pop(path, None)
+                self._params = None
+
+# --------------------------------------------------------------------------
+
+class _CyBldWatchLimitError(OSError):
+    def __init__(self, path: str, ex: OSError):
+        super().__init__(ex.errno, ex.strerror)
+        self.path = path
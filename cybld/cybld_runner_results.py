@@ -8,7 +8,10 @@
 
 from enum import Enum
 
+import threading
+
 from cybld import cybld_helpers
+from cybld.cybld_rusage import CyBldResourceUsage
 
 # --------------------------------------------------------------------------
 
@@ -16,6 +19,18 @@ class CyBldRunnerResultType(Enum):
     unknown = 1
     success = 2
     fail    = 3
+    cached  = 4
+    timeout = 5
+
+# --------------------------------------------------------------------------
+
+def get_outcome(result: CyBldRunnerResultType) -> CyBldRunnerResultType:
+    """ success (also cached), fail (also timeout) or unknown """
+    if result in [CyBldRunnerResultType.success, CyBldRunnerResultType.cached]:
+        return CyBldRunnerResultType.success
+    if result in [CyBldRunnerResultType.fail, CyBldRunnerResultType.timeout]:
+        return CyBldRunnerResultType.fail
+    return CyBldRunnerResultType.unknown
 
 # --------------------------------------------------------------------------
 
@@ -25,7 +40,9 @@ class CyBldRunnerSingleResult:
         self.result  = CyBldRunnerResultType.unknown
         self.command = command
         self.param   = param
-        self.runtime = 0
+        self.runtime  = 0
+        self.usage    = None
+        self.attempts = 1
 
     def set_result(self, result: CyBldRunnerResultType, runtime: int):
         self.result  = result
@@ -35,19 +52,37 @@ class CyBldRunnerSingleResult:
         return self.param
 
     def is_success(self):
-        return self.result == CyBldRunnerResultType.success
+        """ Succeeded (or skipped since it succeeded before, refer to is_cached) """
+        return self.result in [CyBldRunnerResultType.success, CyBldRunnerResultType.cached]
+
+    def is_cached(self):
+        return self.result == CyBldRunnerResultType.cached
 
     def is_fail(self):
-        return self.result == CyBldRunnerResultType.fail
+        """ Failed (or killed since it timed out, refer to is_timeout) """
+        return self.result in [CyBldRunnerResultType.fail, CyBldRunnerResultType.timeout]
+
+    def is_timeout(self):
+        return self.result == CyBldRunnerResultType.timeout
+
+    def is_flaky(self):
+        """ Succeeded, but only after it failed (refer to CyBldConfigRunner retries) """
+        return self.is_success() and self.attempts > 1
 
 # --------------------------------------------------------------------------
 
 class CyBldRunnerResults:
+    """
+    The results of the current and the previous run of a runner. Results
+    may be added from several threads (refer to CyBldRunner jobs).
+    """
 
     def __init__(self):
         self.previous_results = []
         self.current_results  = []
 
+        self._lock = threading.Lock()
+
     def add_result(self, result: CyBldRunnerSingleResult):
         """
         Add the result to the current_results list.
@@ -55,47 +90,87 @@ class CyBldRunnerResults:
         :param result: The result to add
         :type result: CyBldRunnerSingleResult
         """
-        self.current_results.append(result)
+        with self._lock:
+            self.current_results.append(result)
+
+    def get_total_usage(self):
+        """
+        Sum up the resource usage of all current results.
+
+        :rtype: CyBldResourceUsage
+        :return: The total usage or None if no usage has been recorded.
+        """
+        usages = [result.usage for result in self.current_results if result.usage is not None]
+        if len(usages) == 0:
+            return None
+
+        return sum(usages, CyBldResourceUsage())
 
     def finish(self):
-        self.previous_results = self.current_results
-        self.current_results  = []
+        with self._lock:
+            self.previous_results = self.current_results
+            self.current_results  = []
 
     def print_results(self):
         for result in self.current_results:
-            if result.is_success():
+            if result.is_cached():
+                cybld_helpers.print_text_with_bg(result.get_param() + " (cached pass)", True)
+            elif result.is_flaky():
+                cybld_helpers.print_text_with_bg(result.get_param() + " (flaky, attempt {0})".format(
+                    result.attempts), True)
+            elif result.is_success():
                 cybld_helpers.print_text_with_bg(result.get_param(), True)
+            elif result.is_timeout():
+                cybld_helpers.print_text_with_bg(result.get_param() + " (timeout)", False)
             elif result.is_fail():
                 cybld_helpers.print_text_with_bg(result.get_param(), False)
             else:
                 cybld_helpers.print_text_with_bg(result.get_param(), None)
 
-    def print_comparison(self):
+    def print_comparison(self, baseline = None, title: str = "PREVIOUS TEST RESULTS"):
+        """
+        Print which params went GOOD or BAD (and the flaky ones).
+
+        :param baseline: Index of the results to compare with (param ->
+                         CyBldRunnerResultType, i. e. an earlier run of
+                         CyBldRunnerStore), None: the previous results.
+        :param title:    The headline of the comparison.
+        """
         if len(self.current_results) == 0:
             return
-        if len(self.current_results) > 0 and len(self.previous_results) == 0:
+
+        # Reported even without previous results (they passed, but can't be trusted)
+        flaky_tests = [result.get_param() for result in self.current_results if result.is_flaky()]
+        if len(flaky_tests) > 0:
+            cybld_helpers.print_seperator_lines(1)
+            cybld_helpers.print_centered_text("The following tests are FLAKY (passed after a failure)", None)
+            for flaky_test in flaky_tests:
+                cybld_helpers.print_text_with_bg(flaky_test, None)
+
+        if baseline is None:
+            baseline = {result.get_param(): result.result for result in self.previous_results}
+        if len(baseline) == 0:
             return
 
         new_good_tests = []
         new_bad_tests  = []
 
         cybld_helpers.print_seperator_lines(1)
-        cybld_helpers.print_centered_text("PREVIOUS TEST RESULTS", None)
+        cybld_helpers.print_centered_text(title, None)
 
         for result_iter in self.current_results:
-            previous_result = CyBldRunnerResultType.unknown
-            for prev_result_iter in self.previous_results:
-                if prev_result_iter.get_param() == result_iter.get_param():
-                    if prev_result_iter.is_success():
-                        previous_result = CyBldRunnerResultType.success
-                    elif prev_result_iter.is_fail():
-                        previous_result = CyBldRunnerResultType.fail
+            previous_result = get_outcome(baseline.get(result_iter.get_param(), CyBldRunnerResultType.unknown))
 
             if (result_iter.is_success() and previous_result == CyBldRunnerResultType.fail):
                 new_good_tests.append(result_iter.get_param())
             elif (result_iter.is_fail() and previous_result == CyBldRunnerResultType.success):
                 new_bad_tests.append(result_iter.get_param())
 
+        cached_tests = len([result for result in self.current_results if result.is_cached()])
+        if cached_tests > 0:
+            cybld_helpers.print_centered_text("{0} cached passes (unchanged since they succeeded)".format(
+                cached_tests), None)
+
         if len(new_good_tests) == 0 and len(new_bad_tests) == 0:
             cybld_helpers.print_centered_text("No changes detected", None)
             return
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from enum import Enum
+
+import json
+import logging
+import os
+import threading
+
+from cybld import cybld_helpers
+
+# --------------------------------------------------------------------------
+
+class CyBldRunnerSchedulePolicy(Enum):
+    walk          = 1
+    failed_first  = 2
+    longest_first = 3
+
+# --------------------------------------------------------------------------
+
+def get_default_history_path(runner_name: str) -> str:
+    """ The default history file of the given runner ($XDG_DATA_HOME/cybld/runner_history) """
+    return os.path.join(cybld_helpers.get_data_path(), "runner_history", runner_name + ".json")
+
+# --------------------------------------------------------------------------
+
+class CyBldRunnerHistory:
+    """
+    The outcome and the run time of the last run of every param of a runner
+    (used for scheduling), stored as JSON, so it survives restarts of the
+    server.
+
+    :param path: The history file.
+    :type path:  str
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self._entries = dict()
+        self._lock    = threading.Lock()
+        self._dirty   = False
+
+        self.read()
+
+    def update(self, param: str, success: bool, runtime: float):
+        with self._lock:
+            self._entries[os.path.abspath(param)] = {"success": success, "runtime": runtime}
+            self._dirty = True
+
+    def get(self, param: str):
+        """ The last outcome and run time ({"success": ..., "runtime": ...}) or None """
+        with self._lock:
+            return self._entries.get(os.path.abspath(param))
+
+    def read(self):
+        try:
+            with open(self.path, "r") as history_file:
+                self._entries = json.load(history_file)
+        except FileNotFoundError:
+            pass
+        except ValueError as ex:
+            logging.warning("Ignoring corrupt runner history {0}: {1}".format(self.path, ex))
+
+    def write(self):
+        """ Store the history (only if anything changed) """
+        with self._lock:
+            if not self._dirty:
+                return
+            entries     = dict(self._entries)
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        with open(self.path + ".tmp", "w") as history_file:
+            json.dump(entries, history_file)
+        os.replace(self.path + ".tmp", self.path)
+
+# --------------------------------------------------------------------------
+
+def schedule_params(params, policy: CyBldRunnerSchedulePolicy, get_history):
+    """
+    Order the params according to the given policy. The order is stable,
+    params which are equal for the policy keep their order.
+
+    failed_first:  params which failed the last time, then new params, then
+                   the ones which succeeded (regressions show up first)
+    longest_first: descending by the last run time, new params first (with
+                   several jobs, long params don't end up running alone at
+                   the end)
+
+    :param params:      The params (in the order they were found)
+    :param policy:      The CyBldRunnerSchedulePolicy
+    :param get_history: Function returning the history entry of a param
+                        (refer to CyBldRunnerHistory.get)
+    :return:            The ordered params (new list)
+    """
+    if policy == CyBldRunnerSchedulePolicy.failed_first:
+        def key(param):
+            entry = get_history(param)
+            if entry is None:
+                return 1
+            return 2 if entry["success"] else 0
+
+        return sorted(params, key=key)
+
+    if policy == CyBldRunnerSchedulePolicy.longest_first:
+        def key(param):
+            entry = get_history(param)
+            return -entry["runtime"] if entry is not None else float("-inf")
+
+        return sorted(params, key=key)
+
+    return list(params)
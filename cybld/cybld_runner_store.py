@@ -0,0 +1,156 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from contextlib import contextmanager
+
+import os
+import sqlite3
+import time
+
+from cybld import cybld_helpers
+from cybld.cybld_runner_results import CyBldRunnerResultType
+
+# --------------------------------------------------------------------------
+
+STORE_FILE_NAME = "runner_results.sqlite"
+
+# Seconds to wait for another server writing to the store
+BUSY_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    runner TEXT    NOT NULL,
+    cwd    TEXT    NOT NULL,
+    start  REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_runner ON runs (runner, cwd, id);
+CREATE TABLE IF NOT EXISTS results (
+    run_id   INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    param    TEXT    NOT NULL,
+    result   INTEGER NOT NULL,
+    runtime  INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    PRIMARY KEY (run_id, param)
+);
+"""
+
+# --------------------------------------------------------------------------
+
+def get_default_store_path() -> str:
+    """ The default result store ($XDG_DATA_HOME/cybld/runner_results.sqlite) """
+    return os.path.join(cybld_helpers.get_data_path(), STORE_FILE_NAME)
+
+# --------------------------------------------------------------------------
+
+class CyBldRunnerRun:
+    """ A stored run of a runner (refer to CyBldRunnerStore.get_runs) """
+
+    def __init__(self, run_id: int, runner: str, cwd: str, start: float, params: int, failed: int):
+        self.run_id = run_id
+        self.runner = runner
+        self.cwd    = cwd
+        self.start  = start
+        self.params = params
+        self.failed = failed
+
+# --------------------------------------------------------------------------
+
+class CyBldRunnerStore:
+    """
+    Persistent history of the results of every run of the runners (sqlite),
+    so that runs can be compared with any earlier run, even after a restart
+    of the server. Runs are kept per runner and folder (the params are
+    relative paths), the oldest ones are removed once there are more than
+    max_runs.
+
+    :param path:     The sqlite database.
+    :type path:      str
+
+    :param max_runs: Max. number of stored runs per runner and folder (<= 0:
+                     no limit).
+    :type max_runs:  int
+    """
+
+    def __init__(self, path: str, max_runs: int = 100):
+        self.path     = path
+        self.max_runs = max_runs
+
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def add_run(self, runner: str, results) -> int:
+        """
+        Store a finished run.
+
+        :param runner:  The name of the runner.
+        :param results: The CyBldRunnerSingleResults of the run.
+        :return:        The id of the run.
+        """
+        cwd = os.getcwd()
+        with self._connect() as connection:
+            run_id = connection.execute("INSERT INTO runs (runner, cwd, start) VALUES (?, ?, ?)",
+                                        (runner, cwd, time.time())).lastrowid
+            connection.executemany("INSERT OR REPLACE INTO results (run_id, param, result, runtime, attempts) "
+                                   "VALUES (?, ?, ?, ?, ?)",
+                                   [(run_id, result.get_param(), result.result.value, result.runtime,
+                                     result.attempts) for result in results])
+
+            if self.max_runs > 0:
+                connection.execute("DELETE FROM runs WHERE runner = ? AND cwd = ? AND id NOT IN "
+                                   "(SELECT id FROM runs WHERE runner = ? AND cwd = ? ORDER BY id DESC LIMIT ?)",
+                                   (runner, cwd, runner, cwd, self.max_runs))
+        return run_id
+
+    def get_runs(self, runner: str = None, cwd: str = None):
+        """ The stored runs (newest first), optionally only of the given runner and folder """
+        query = "SELECT runs.id, runs.runner, runs.cwd, runs.start, COUNT(results.param), " \
+                "SUM(CASE WHEN results.result IN (?, ?) THEN 1 ELSE 0 END) " \
+                "FROM runs LEFT JOIN results ON results.run_id = runs.id "
+        args  = [CyBldRunnerResultType.fail.value, CyBldRunnerResultType.timeout.value]
+        if runner is not None:
+            query += "WHERE runs.runner = ? AND runs.cwd = ? "
+            args  += [runner, cwd or os.getcwd()]
+        query += "GROUP BY runs.id ORDER BY runs.id DESC"
+
+        with self._connect() as connection:
+            return [CyBldRunnerRun(row[0], row[1], row[2], row[3], row[4], row[5] or 0)
+                    for row in connection.execute(query, args)]
+
+    def get_run(self, run_id: int):
+        """ The run with the given id (or None) """
+        for run in self.get_runs():
+            if run.run_id == run_id:
+                return run
+        return None
+
+    def get_earlier_run_id(self, runner: str, runs_back: int, cwd: str = None):
+        """ The id of the run runs_back runs before the latest one (None if there is none) """
+        with self._connect() as connection:
+            row = connection.execute("SELECT id FROM runs WHERE runner = ? AND cwd = ? "
+                                     "ORDER BY id DESC LIMIT 1 OFFSET ?",
+                                     (runner, cwd or os.getcwd(), runs_back)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_results(self, run_id: int):
+        """ Index of the results of the given run: param -> CyBldRunnerResultType """
+        with self._connect() as connection:
+            return {param: CyBldRunnerResultType(result) for param, result in
+                    connection.execute("SELECT param, result FROM results WHERE run_id = ?", (run_id,))}
+
+    @contextmanager
+    def _connect(self):
+        """ Connection which commits (or rolls back) and closes at the end of the with block """
+        connection = sqlite3.connect(self.path, timeout = BUSY_TIMEOUT)
+        try:
+            with connection:
+                connection.execute("PRAGMA foreign_keys = ON")
+                yield connection
+        finally:
+            connection.close()
@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+import sys
+
+from cybld import cybld_helpers
+
+# --------------------------------------------------------------------------
+
+class CyBldResourceUsage:
+    """
+    Resources used by a command (and all children it waited for), as
+    reported by wait4.
+
+    :param user_time:       CPU time spent in user mode (seconds)
+    :param sys_time:        CPU time spent in the kernel (seconds)
+    :param max_rss_kb:      Peak resident set size (KB)
+    :param blocks_in:       Number of block input operations
+    :param blocks_out:      Number of block output operations
+    :param ctx_voluntary:   Voluntary context switches (i. e. waiting for I/O)
+    :param ctx_involuntary: Involuntary context switches (time slice exceeded)
+    """
+
+    def __init__(self, user_time = 0.0, sys_time = 0.0, max_rss_kb = 0,
+                 blocks_in = 0, blocks_out = 0, ctx_voluntary = 0, ctx_involuntary = 0):
+        self.user_time       = user_time
+        self.sys_time        = sys_time
+        self.max_rss_kb      = max_rss_kb
+        self.blocks_in       = blocks_in
+        self.blocks_out      = blocks_out
+        self.ctx_voluntary   = ctx_voluntary
+        self.ctx_involuntary = ctx_involuntary
+
+    @classmethod
+    def from_rusage(cls, rusage):
+        """ Create the usage from the struct returned by os.wait4 """
+        # Darwin reports the max. RSS in bytes, Linux in KB
+        max_rss_kb = rusage.ru_maxrss
+        if sys.platform == "darwin":
+            max_rss_kb = max_rss_kb // 1024
+
+        return cls(rusage.ru_utime, rusage.ru_stime, max_rss_kb,
+                   rusage.ru_inblock, rusage.ru_oublock,
+                   rusage.ru_nvcsw, rusage.ru_nivcsw)
+
+    def __add__(self, other):
+        """ Combine the usage of two runs (the RSS is the peak of both) """
+        return CyBldResourceUsage(self.user_time + other.user_time,
+                                  self.sys_time + other.sys_time,
+                                  max(self.max_rss_kb, other.max_rss_kb),
+                                  self.blocks_in + other.blocks_in,
+                                  self.blocks_out + other.blocks_out,
+                                  self.ctx_voluntary + other.ctx_voluntary,
+                                  self.ctx_involuntary + other.ctx_involuntary)
+
+    @property
+    def cpu_time(self) -> float:
+        return self.user_time + self.sys_time
+
+    def get_usage_str(self, wall_time: float = None) -> str:
+        """
+        Returns a printable representation of the usage.
+
+        :param wall_time: The wall clock run time (seconds). If given, the
+                          CPU utilization is included (> 100% means the
+                          command used several cores).
+        """
+        ret = "cpu: {0:.2f}s user {1:.2f}s sys".format(self.user_time, self.sys_time)
+        if wall_time is not None and wall_time > 0:
+            ret = "{0} ({1}%)".format(ret, int(self.cpu_time / wall_time * 100))
+
+        return "{0}, max rss: {1}, blocks: {2} in {3} out, ctx switches: {4} vol {5} invol".format(
+            ret, cybld_helpers.format_size(self.max_rss_kb * 1024),
+            self.blocks_in, self.blocks_out, self.ctx_voluntary, self.ctx_involuntary)
+
+# --------------------------------------------------------------------------
+
+def wait_for_process(proc):
+    """
+    Wait for the given process (subprocess.Popen) via os.wait4 and collect
+    its resource usage. The returncode of proc is set, as if proc.wait() has
+    been called.
+
+    :param proc: The process to wait for.
+
+    :rtype: tuple
+    :return: The returncode and the CyBldResourceUsage (None if the process
+             has already been waited for).
+    """
+    if proc.returncode is not None:
+        return proc.returncode, None
+
+    while True:
+        try:
+            _, status, rusage = os.wait4(proc.pid, 0)
+            break
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            # Someone else (i. e. proc.poll()) was faster
+            return proc.wait(), None
+
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+
+    return proc.returncode, CyBldResourceUsage.from_rusage(rusage)
@@ -33,6 +33,7 @@ class CyBldSharedStatus():
 
     def __init__(self, read_only, name = None, tmux_refresh_status = False):
         self.status_map = {}
+        self.queue_map  = {}
         self.read_only           = read_only
         self.tmux_refresh_status = tmux_refresh_status
 
@@ -80,19 +81,33 @@ class CyBldSharedStatus():
         with self._lock():
             self.status_map[self.name] = CyBldIpcServerStatus.fail
 
+    def set_queue_depth(self, depth):
+        """ Store how many exec requests are queued (only written on changes) """
+        if self.queue_map.get(self.name, 0) == depth:
+            return
+
+        with self._lock():
+            self.queue_map[self.name] = depth
+
     def read(self):
         if os.path.isfile(cybld_helpers.get_shared_status_file()):
             shared_status_file = open(cybld_helpers.get_shared_status_file(), "rb")
-            self.status_map = pickle.load(shared_status_file)
+            shared_status = pickle.load(shared_status_file)
             shared_status_file.close()
 
+            # Older versions only stored the status map
+            if isinstance(shared_status, tuple):
+                self.status_map, self.queue_map = shared_status
+            else:
+                self.status_map, self.queue_map = shared_status, {}
+
     def write(self):
         if self.read_only:
             logging.critical("Cannot write in read only mode. Call a code monkey.")
             sys.exit(1)
 
         shared_status_file = open(cybld_helpers.get_shared_status_file(), "wb+")
-        pickle.dump(self.status_map, shared_status_file)
+        pickle.dump((self.status_map, self.queue_map), shared_status_file)
         shared_status_file.close()
 
         if self.tmux_refresh_status:
@@ -101,7 +116,7 @@ class CyBldSharedStatus():
     # TODO DC: write the process uid in the shared status lock file to detect stale files?
     def try_lock(self):
         while os.path.isfile(cybld_helpers.get_shared_status_lock_file()):
-            time.sleep(1)
+            time.sleep(0.05)
 
         try:
             lock_file = open(cybld_helpers.get_shared_status_lock_file(), 'x')
@@ -130,6 +145,10 @@ class CyBldSharedStatus():
             else:
                 pretty_string += cybld_helpers.ICON_UNKNOWN
 
+            queue_depth = self.queue_map.get(key, 0)
+            if queue_depth > 0:
+                pretty_string += "+" + str(queue_depth)
+
         if len(pretty_string) == 0:
             pretty_string = "no cybld session running"
 
@@ -139,6 +158,7 @@ class CyBldSharedStatus():
         with self._lock(False):
             try:
                 del self.status_map[self.name]
+                self.queue_map.pop(self.name, None)
             except:
                 pass
 
@@ -13,7 +13,8 @@ import cybld.cybld_config_command_group
 template_cpp    = cybld.cybld_config_command_group.CyBldConfigCommandGroup(
         "cpp", ".*.h|.*.cpp|.*.cmake",
         ".*", ".*", ".*", "CMakeCache.txt",
-        "make", "make test", "make clean")
+        "make", "make test", "make clean",
+        error_regex = ": (fatal )?error:", warning_regex = ": warning:")
 template_python = cybld.cybld_config_command_group.CyBldConfigCommandGroup(
         "python", ".*.py|.*.ini",
         ".*", ".*", ".*", "tox.ini",
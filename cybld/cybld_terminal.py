@@ -0,0 +1,118 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from contextlib import contextmanager
+
+import os
+import signal
+import sys
+import threading
+
+# --------------------------------------------------------------------------
+
+# Used if stdout is not a terminal (i. e. py.test)
+DEFAULT_WIDTH = 180
+
+# Cursor home, clear the screen and the scrollback (same as clear(1))
+CLEAR_SCREEN  = "\033[H\033[2J\033[3J"
+
+# --------------------------------------------------------------------------
+
+_cached_width     = None
+_resize_handled   = False
+_thread_state     = threading.local()
+
+# --------------------------------------------------------------------------
+
+def get_width() -> int:
+    """
+    The width of the terminal (without spawning a process).
+
+    Once install_resize_handler() has been called, the width is only
+    queried again after the terminal has been resized.
+    """
+    global _cached_width
+
+    width = _cached_width
+    if width is not None:
+        return width
+
+    width = DEFAULT_WIDTH
+    if sys.stdout.isatty():
+        try:
+            width = os.get_terminal_size(sys.stdout.fileno()).columns or DEFAULT_WIDTH
+        except OSError:
+            pass
+
+    if _resize_handled:
+        _cached_width = width
+    return width
+
+
+def install_resize_handler():
+    """
+    Cache the terminal width and refresh it on SIGWINCH. Has to be called
+    from the main thread.
+    """
+    global _resize_handled
+
+    signal.signal(signal.SIGWINCH, _handle_resize)
+    _resize_handled = True
+
+
+def _handle_resize(signum, frame):
+    global _cached_width
+    _cached_width = None
+
+# --------------------------------------------------------------------------
+
+def write(text: str):
+    """
+    Write the given text to stdout, or append it to the current block if
+    the calling thread is inside buffered().
+    """
+    block = getattr(_thread_state, "block", None)
+    if block is not None:
+        block.append(text)
+        return
+
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+@contextmanager
+def buffered(sink = None):
+    """
+    Collect everything written (by this thread) in the with block and write
+    it to stdout at once at the end, i. e. to print a result block with a
+    single write. Nested blocks are written by the outermost one.
+
+    :param sink: Optional callable which gets the text (bytes) passed
+                 instead of writing it to stdout.
+    """
+    if getattr(_thread_state, "block", None) is not None:
+        yield
+        return
+
+    _thread_state.block = []
+    try:
+        yield
+    finally:
+        text                = "".join(_thread_state.block)
+        _thread_state.block = None
+        if len(text) > 0:
+            if sink is not None:
+                sink(text.encode())
+            else:
+                write(text)
+
+
+def clear_screen():
+    """ Clear the terminal (without spawning clear) """
+    if sys.stdout.isatty():
+        write(CLEAR_SCREEN)
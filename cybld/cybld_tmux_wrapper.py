@@ -6,9 +6,195 @@
 #
 # --------------------------------------------------------------------------
 
+from enum import Enum
+
+import logging
 import os
+import queue
 import shutil
 import subprocess
+import threading
+
+# --------------------------------------------------------------------------
+
+# Set to the session name to skip asking tmux (empty: not inside tmux)
+SESSION_ENV_KEY = "CYBLD_TMUX_SESSION"
+
+_UNRESOLVED     = object()
+_session_name   = _UNRESOLVED
+_control_client = None
+
+# --------------------------------------------------------------------------
+
+def escape_format(msg: str) -> str:
+    """ Escape # so that tmux doesn't expand formats (like #(cmd)) in a message """
+    return msg.replace("#", "##")
+
+
+def quote_argument(arg: str) -> str:
+    """ Single quote an argument of a command sent to a control client """
+    return "'" + arg.replace("'", "'\\''") + "'"
+
+# --------------------------------------------------------------------------
+
+class CyBldTmuxBackend(Enum):
+    spawn   = 1
+    control = 2
+
+# --------------------------------------------------------------------------
+
+class CyBldTmuxControlClient:
+    """
+    tmux client in control mode (tmux -C), which stays attached to the given
+    session, so that tmux commands can be sent without spawning tmux.
+
+    Commands are written to the stdin of the client, tmux answers with the
+    output of the command between %begin and %end (or %error). A reader
+    thread drains everything tmux sends (including notifications) and hands
+    the answers to the command which is waiting for them.
+
+    :param session_name: The session to attach to.
+    :type session_name:  str
+    """
+
+    # Max. time to wait for an answer before giving up (seconds)
+    TIMEOUT = 1.0
+
+    def __init__(self, session_name: str):
+        self.session_name = session_name
+        self.proc         = None
+
+        self._answers       = queue.Queue()
+        self._attach_answer = queue.Queue()
+        self._lock          = threading.Lock()
+
+    def start(self) -> bool:
+        """ Attach to the session (False if tmux isn't available) """
+        if shutil.which("tmux") is None:
+            return False
+
+        # no-output: no %output notifications for every pane output,
+        # ignore-size: the client doesn't affect the size of the windows
+        try:
+            self.proc = subprocess.Popen(["tmux", "-C", "attach-session", "-t", self.session_name,
+                                          "-f", "no-output,ignore-size"],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError:
+            return False
+
+        reader = threading.Thread(target=self._read_answers, daemon=True)
+        reader.start()
+
+        # tmux answers the attach itself as well (i. e. with an error if the
+        # session doesn't exist), commands are only sent afterwards
+        try:
+            attached, _ = self._attach_answer.get(timeout=self.TIMEOUT)
+        except queue.Empty:
+            attached = False
+
+        if not attached:
+            self.close()
+        return attached
+
+    def is_alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def command(self, cmd: str):
+        """
+        Execute the given tmux command.
+
+        :param cmd: The command (tmux syntax, a single line)
+        :return:    The output lines or None if the command failed
+        """
+        with self._lock:
+            if not self.is_alive():
+                return None
+
+            try:
+                self.proc.stdin.write((cmd.replace("\n", " ") + "\n").encode())
+                self.proc.stdin.flush()
+                success, lines = self._answers.get(timeout=self.TIMEOUT)
+            except (BrokenPipeError, queue.Empty):
+                logging.warning("tmux control client does not respond, spawning tmux instead")
+                self._kill()
+                return None
+
+        return lines if success else None
+
+    def get_client_names(self):
+        """ The (other) clients attached to the session """
+        lines = self.command("list-clients -t {0} -F '#{{client_control_mode}} #{{client_name}}'".format(
+            quote_argument(self.session_name)))
+        if lines is None:
+            return None
+        return [line[2:] for line in lines if line.startswith("0 ")]
+
+    def display_message(self, msg: str) -> bool:
+        """ Show the message (plain text) on all clients of the session """
+        client_names = self.get_client_names()
+        if client_names is None:
+            return False
+
+        for client_name in client_names:
+            if self.command("display-message -c {0} {1}".format(
+                    quote_argument(client_name), quote_argument(escape_format(msg)))) is None:
+                return False
+        return True
+
+    def refresh_client(self) -> bool:
+        """ Redraw the status line of all clients of the session """
+        client_names = self.get_client_names()
+        if client_names is None:
+            return False
+
+        for client_name in client_names:
+            if self.command("refresh-client -S -t {0}".format(quote_argument(client_name))) is None:
+                return False
+        return True
+
+    def close(self):
+        """ Detach (closing stdin lets the client exit) """
+        with self._lock:
+            if self.proc is None:
+                return
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=self.TIMEOUT)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self._kill()
+            self.proc = None
+
+    def _kill(self):
+        self.proc.kill()
+        self.proc.wait()
+
+    def _read_answers(self):
+        lines       = None
+        from_client = False
+        for line in self.proc.stdout:
+            line = line.decode(errors="replace").rstrip("\n")
+
+            if lines is None:
+                # Notifications outside of answers are ignored
+                if line.startswith("%begin "):
+                    lines       = []
+                    from_client = line.endswith(" 1")
+            elif line.startswith("%end ") or line.startswith("%error "):
+                # flags 1: the answer to a command sent by this client,
+                # otherwise the answer to the attach
+                answer = (line.startswith("%end "), lines)
+                if from_client:
+                    self._answers.put(answer)
+                else:
+                    self._attach_answer.put(answer)
+                lines = None
+            else:
+                lines.append(line)
+
+        # EOF: tmux exited, don't let anyone wait for the timeout
+        self._answers.put((False, None))
+        self._attach_answer.put((False, None))
 
 # --------------------------------------------------------------------------
 
@@ -24,18 +210,100 @@ class CyBldTmuxWrapper:
 
     @staticmethod
     def get_session_name():
-        if not CyBldTmuxWrapper.is_tmux_available():
+        """
+        The name of the current tmux session (None if tmux isn't running).
+
+        The session is resolved once per process (it is part of every socket
+        and status file path), refer to SESSION_ENV_KEY to skip tmux at all.
+        """
+        global _session_name
+
+        if _session_name is _UNRESOLVED:
+            _session_name = CyBldTmuxWrapper._resolve_session_name()
+        return _session_name
+
+    @staticmethod
+    def reset_session_name():
+        """ Forget the resolved session (i. e. after the env changed) """
+        global _session_name
+        _session_name = _UNRESOLVED
+
+    @staticmethod
+    def _resolve_session_name():
+        override = os.getenv(SESSION_ENV_KEY)
+        if override is not None:
+            return override if len(override) > 0 else None
+
+        if shutil.which("tmux") is None:
+            return None
+
+        # A single query (fails if no tmux server is running). Inside tmux,
+        # ask for the session of our own pane instead of the latest client.
+        query = ["tmux", "display-message", "-p"]
+        if os.getenv("TMUX") and os.getenv("TMUX_PANE"):
+            query += ["-t", os.getenv("TMUX_PANE")]
+
+        # check_output instead of subprocess.run (Python 3.4)
+        try:
+            output = subprocess.check_output(query + ["#S"], stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError):
             return None
-        return os.popen("tmux display-message -p '#S'").read().strip(" ").strip('\n')
+
+        session_name = output.decode(errors="replace").strip(" ").strip('\n')
+        if len(session_name) == 0:
+            return None
+        return session_name
 
     @staticmethod
-    def display_message(msg):
+    def start_control_client() -> bool:
+        """
+        Send display_message and refresh_client through a tmux client in
+        control mode (refer to CyBldTmuxControlClient) instead of spawning
+        tmux twice for each of them.
+
+        :return: False if it can't be started (tmux is spawned instead).
+        """
+        global _control_client
+
+        session_name = CyBldTmuxWrapper.get_session_name()
+        if session_name is None:
+            return False
+
+        control_client = CyBldTmuxControlClient(session_name)
+        if not control_client.start():
+            logging.warning("Could not start tmux in control mode, spawning tmux instead")
+            return False
+
+        _control_client = control_client
+        return True
+
+    @staticmethod
+    def stop_control_client():
+        global _control_client
+
+        if _control_client is not None:
+            _control_client.close()
+            _control_client = None
+
+    @staticmethod
+    def display_message(msg: str):
+        """ Show the message (plain text, neither the shell nor tmux expand anything) """
+        control_client = _control_client
+        if control_client is not None and control_client.display_message(msg):
+            return
+
         if not CyBldTmuxWrapper.is_tmux_available():
             return
-        os.system("tmux display-message " + msg)
+        subprocess.call(["tmux", "display-message", escape_format(msg)],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
     @staticmethod
     def refresh_client():
+        control_client = _control_client
+        if control_client is not None and control_client.refresh_client():
+            return
+
         if not CyBldTmuxWrapper.is_tmux_available():
             return
-        os.system("tmux refresh-client -S")
+        subprocess.call(["tmux", "refresh-client", "-S"],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
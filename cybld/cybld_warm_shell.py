@@ -0,0 +1,236 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from enum import Enum
+
+import logging
+import os
+import pty
+import shlex
+import signal
+import subprocess
+import termios
+import uuid
+
+from cybld.cybld_pty_reader import CyBldPtyReader
+
+# --------------------------------------------------------------------------
+
+class CyBldExecBackend(Enum):
+    spawn      = 1
+    warm_shell = 2
+
+# --------------------------------------------------------------------------
+
+class CyBldSentinelFilter:
+    """
+    Sink which forwards the output of a command to the given sinks until the
+    sentinel line (sentinel followed by the exit code and a newline) shows up.
+
+    The end of a chunk which could be the beginning of the sentinel is held
+    back until the next chunk arrives, so the sentinel is never forwarded,
+    even if it is split across chunks.
+
+    :param sentinel: The (unique) sentinel which precedes the exit code.
+    :type sentinel:  bytes
+
+    :param sinks:    Callables which get the output (bytes) passed.
+    :type sinks:     list
+    """
+
+    def __init__(self, sentinel: bytes, sinks):
+        self.sentinel  = sentinel
+        self.sinks     = sinks
+        self.exit_code = None
+
+        self._pending = b""
+
+    def write(self, chunk: bytes):
+        """ Forward the chunk without the sentinel line """
+        if self.exit_code is not None:
+            return
+
+        data           = self._pending + chunk
+        self._pending  = b""
+
+        index = data.find(self.sentinel)
+        if index < 0:
+            hold = self._find_partial_sentinel(data)
+            self._forward(data[:hold])
+            self._pending = data[hold:]
+            return
+
+        self._forward(data[:index])
+
+        status  = data[index + len(self.sentinel):]
+        newline = status.find(b"\n")
+        if newline < 0:
+            self._pending = data[index:]
+            return
+
+        self.exit_code = int(status[:newline])
+
+    def _find_partial_sentinel(self, data: bytes) -> int:
+        """ Index of the suffix of data which is a prefix of the sentinel """
+        first = self.sentinel[:1]
+        index = data.find(first, max(0, len(data) - len(self.sentinel) + 1))
+
+        while index >= 0:
+            if self.sentinel.startswith(data[index:]):
+                return index
+            index = data.find(first, index + 1)
+
+        return len(data)
+
+    def _forward(self, data: bytes):
+        if len(data) > 0:
+            for sink in self.sinks:
+                sink(data)
+
+# --------------------------------------------------------------------------
+
+class CyBldWarmShell:
+    """
+    Long-lived shell which executes commands on its own pty.
+
+    Spawning a new shell for every command (subprocess with shell=True) costs
+    a fork/exec and the shell startup. The warm shell is started once and
+    gets the commands written to its stdin (a pipe, so nothing is echoed and
+    the length of the commands isn't limited by the pty). Every command runs
+    in a subshell, so changes to the environment or the working directory
+    don't leak into the next command. Afterwards the shell prints a unique
+    sentinel together with the exit code, which marks the end of the output.
+
+    The shell is the leader of its own process group, so cancelling a command
+    kills the shell as well. In that case (or if the shell dies for any other
+    reason) a new shell is started for the next command.
+    """
+
+    SHELL = "/bin/sh"
+
+    # Max. time for the shell to exit after its stdin was closed (seconds)
+    CLOSE_TIMEOUT = 1.0
+
+    def __init__(self):
+        self.proc   = None
+        self.starts = 0
+
+        self._master   = None
+        self._sentinel = "__CYBLD_DONE_{0}__:".format(uuid.uuid4().hex)
+        self._filter   = None
+
+    def is_alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def submit(self, cmd: str):
+        """
+        Send the given command to the shell (restarts the shell if needed).
+        Call wait() afterwards to read the output.
+
+        :param cmd: The command (full string) which should be executed
+        :return:    The shell process (pid = process group id)
+        """
+        assert self._filter is None
+
+        script = "( eval {0} ) </dev/null; printf '%s%d\\n' '{1}' \"$?\"\n".format(
+            shlex.quote(cmd), self._sentinel).encode()
+
+        if not self.is_alive():
+            self._restart()
+
+        try:
+            self._write_script(script)
+        except BrokenPipeError:
+            # The shell died right after the check above
+            self._restart()
+            self._write_script(script)
+
+        self._filter = CyBldSentinelFilter(self._sentinel.encode(), [])
+        return self.proc
+
+    def wait(self, sinks) -> int:
+        """
+        Forward the output of the submitted command to the given sinks until
+        the command has finished.
+
+        :param sinks: Callables which get every chunk (bytes) passed.
+        :return:      The exit code of the command (negative if the shell
+                      was killed, i. e. cancelled).
+        """
+        assert self._filter is not None
+
+        sentinel_filter       = self._filter
+        sentinel_filter.sinks = sinks
+        reader                = CyBldPtyReader(self._master, [sentinel_filter.write])
+
+        try:
+            finished = reader.read_until(lambda: sentinel_filter.exit_code is not None)
+        finally:
+            self._filter = None
+
+        if finished:
+            return sentinel_filter.exit_code
+
+        # EOF: the shell died while the command was running
+        returncode = self.proc.wait()
+        logging.warning("Warm shell exited with {0}, restarting it".format(str(returncode)))
+        self.close()
+        return returncode if returncode != 0 else 1
+
+    def run(self, cmd: str, sinks) -> int:
+        """ Execute the given command (refer to submit and wait) """
+        self.submit(cmd)
+        return self.wait(sinks)
+
+    def close(self):
+        """
+        Stop the shell (closing its stdin lets it exit). If it doesn't exit
+        within CLOSE_TIMEOUT (i. e. a command is still running), its whole
+        process group is killed.
+        """
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+            try:
+                self.proc.wait(timeout = self.CLOSE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                logging.warning("Warm shell did not exit, killing it")
+                try:
+                    os.killpg(self.proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self.proc.wait()
+            self.proc = None
+
+        if self._master is not None:
+            os.close(self._master)
+            self._master = None
+
+    def _restart(self):
+        self.close()
+        self.starts += 1
+
+        master, slave = pty.openpty()
+
+        # This prevents LF from being converted to CRLF
+        attr = termios.tcgetattr(slave)
+        attr[1] = attr[1] & ~termios.ONLCR
+        termios.tcsetattr(slave, termios.TCSADRAIN, attr)
+
+        self.proc = subprocess.Popen([self.SHELL], stdin=subprocess.PIPE,
+                                     stdout=slave, stderr=slave,
+                                     start_new_session=True)
+        os.close(slave)
+        self._master = master
+
+    def _write_script(self, script: bytes):
+        self.proc.stdin.write(script)
+        self.proc.stdin.flush()
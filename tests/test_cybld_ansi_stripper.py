@@ -0,0 +1,41 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_ansi_stripper
+
+# --------------------------------------------------------------------------
+
+class TestCyBldAnsiStripper:
+
+    COLORED = (b"\x1b[1;31merror:\x1b[0m something failed\n"
+               b"\x1b]0;window title\x07plain \x1b]8;;http://x\x1b\\link\x1b]8;;\x1b\\\n"
+               b"\x1b(Bcharset \x1b[?25lhidden cursor\x1b[K\n")
+
+    PLAIN   = (b"error: something failed\n"
+               b"plain link\n"
+               b"charset hidden cursor\n")
+
+    def test_strip_complete_chunk(self):
+        sut = cybld_ansi_stripper.CyBldAnsiStripper()
+        assert(sut.feed(self.COLORED) == self.PLAIN)
+
+    def test_strip_without_escape_sequences(self):
+        sut   = cybld_ansi_stripper.CyBldAnsiStripper()
+        chunk = "plain ünïcode\n".encode()
+        assert(sut.feed(chunk) is chunk)
+
+    def test_strip_split_at_every_position(self):
+        for split in range(len(self.COLORED)):
+            sut = cybld_ansi_stripper.CyBldAnsiStripper()
+            out = sut.feed(self.COLORED[:split]) + sut.feed(self.COLORED[split:])
+            assert(out == self.PLAIN)
+
+    def test_strip_byte_by_byte(self):
+        sut = cybld_ansi_stripper.CyBldAnsiStripper()
+        out = b"".join(sut.feed(self.COLORED[i:i + 1]) for i in range(len(self.COLORED)))
+        assert(out == self.PLAIN)
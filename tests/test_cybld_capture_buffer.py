@@ -0,0 +1,62 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_capture_buffer
+
+# --------------------------------------------------------------------------
+
+class TestCyBldCaptureBuffer:
+
+    def test_capture_below_limit(self):
+        sut = cybld_capture_buffer.CyBldCaptureBuffer(100)
+        sut.write(b"hello ")
+        sut.write(b"world")
+
+        assert(sut.tail() == b"hello world")
+        assert(sut.total_bytes     == 11)
+        assert(sut.high_water_mark == 11)
+        assert(sut.spilled_bytes   == 0)
+
+    def test_capture_keeps_only_the_tail(self):
+        sut = cybld_capture_buffer.CyBldCaptureBuffer(10)
+        for number in range(100):
+            sut.write("{0:03}\n".format(number).encode())
+
+        assert(sut.tail() == b"7\n098\n099\n")
+        assert(sut.total_bytes     == 400)
+        assert(sut.high_water_mark == 10)
+        assert(sut.spilled_bytes   == 390)
+
+    def test_capture_huge_chunk(self):
+        sut = cybld_capture_buffer.CyBldCaptureBuffer(4)
+        sut.write(b"0123456789")
+
+        assert(sut.tail() == b"6789")
+        assert(sut.high_water_mark == 4)
+
+    def test_capture_disabled(self):
+        sut = cybld_capture_buffer.CyBldCaptureBuffer(0)
+        sut.write(b"0123456789")
+
+        assert(sut.tail() == b"")
+        assert(sut.total_bytes     == 10)
+        assert(sut.high_water_mark == 0)
+
+    def test_capture_last_line(self):
+        sut = cybld_capture_buffer.CyBldCaptureBuffer(12)
+        assert(sut.last_line() == "")
+
+        sut.write(b"first\nsecond\n\n")
+        assert(sut.last_line() == "second")
+
+        # The (incomplete) first line of the tail is never used
+        sut = cybld_capture_buffer.CyBldCaptureBuffer(8)
+        sut.write(b"0123456789 error\n   \n")
+        assert(sut.last_line() == "")
+        sut.write(b"last\n")
+        assert(sut.last_line() == "last")
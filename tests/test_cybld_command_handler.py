@@ -8,10 +8,18 @@
 
 import time
 import pytest
+from unittest.mock import patch
+
 from cybld import cybld_command_handler
 from cybld import cybld_config_command_group
+from cybld import cybld_config_runner
 from cybld import cybld_config_settings
 from cybld import cybld_ipc_message
+from cybld import cybld_ipc_neovim
+from cybld import cybld_helpers
+from cybld import cybld_warm_shell
+
+from tests.test_cybld_ipc_neovim import CyBldFakeNeovim
 
 # --------------------------------------------------------------------------
 
@@ -75,6 +83,33 @@ class TestCyBldCommandHandler:
                                                       mock.settings, None, None)
         assert 'AssertionError' in str(ex1)
 
+    def test_cybld_command_handler_release_runners(self, tmpdir_factory):
+        tmpdir_factory.mktemp('handler_runners').chdir()
+
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.runner_configs = [cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh",
+                                                                     watch = True)]
+        mock.command_group.cmd0 = "runner_sh"
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        runner = sut.runners[0]
+        if not runner.discovery.is_watching():
+            pytest.skip("inotify is not available")
+
+        # The runner (and its inotify instance) is released once no command uses it
+        sut._change_cmd(0, "exit 0")
+        assert(sut.runners == [])
+        assert(not runner.discovery.is_watching())
+
+        sut._change_cmd(1, "runner_sh")
+        runner = sut.runners[0]
+        assert(runner.discovery.is_watching())
+
+        sut.shutdown()
+        assert(not runner.discovery.is_watching())
+
     def test_cybld_command_handler_exec_cmd(self):
         mock = CyBldCommandHandlerMockedConfig()
         sut  = cybld_command_handler.CyBldCommandHandler(
@@ -100,3 +135,242 @@ class TestCyBldCommandHandler:
         assert(mock.fail_callback_called_counter    == 1)
         assert(mock.success_callback_last_text is mock.command_group.cmd0)
         assert(mock.fail_callback_last_text is mock.command_group.cmd1)
+
+        assert(sut.stats.get_last_usage(mock.command_group.cmd0) is not None)
+        assert(sut.stats.get_last_usage(mock.command_group.cmd1) is not None)
+
+        phases = [name for name, _ in sut.stats.get_last_timing(mock.command_group.cmd1)]
+        assert(phases == ["dispatch", "spawn", "run", "log", "neovim", "notify"])
+
+    def test_cybld_command_handler_exec_cmd_fail_summary(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd1 = "echo building; echo 'a.c:1: no such file'; echo; exit 1"
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        # The fail notification includes the last line of the output
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec_fail)
+        time.sleep(0.5)
+        assert(mock.fail_callback_called_counter == 1)
+        assert(mock.fail_callback_last_text == mock.command_group.cmd1 + ": a.c:1: no such file")
+
+    def test_cybld_command_handler_exec_cmd_timing(self, capfd):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.settings.print_timing = True
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        # The footer waits for the notifications, so they are part of the timing line
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(0.5)
+        timing = [line for line in capfd.readouterr().out.splitlines() if "timing:" in line]
+        assert(len(timing) == 1)
+        assert("notify " in timing[0])
+
+    def test_cybld_command_handler_exec_cmd_capture_usage(self, capfd):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0        = "seq 1 1000"
+        mock.settings.print_stats      = False
+        mock.settings.capture_limit_kb = 1
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        # Without the stats, the memory usage is only printed if output has been dropped
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec_fail)
+        time.sleep(0.5)
+        assert("output: " not in capfd.readouterr().out)
+
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(0.5)
+        assert("output: " in capfd.readouterr().out)
+
+    def test_cybld_command_handler_nvim_stream_fallback(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0        = "seq 1 50 # make"
+        mock.settings.nvim_streaming   = True
+        mock.ipc_message_exec.nvim_ipc = "/tmp/cybld/tstipcneovim"
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        loaded = []
+
+        def load_log(enabled, nvim_ipc, logfile_path, cmd):
+            loaded.append(cmd)
+
+        # neovim doesn't keep up, the whole log is loaded afterwards
+        with patch.object(cybld_ipc_neovim, "neovim", CyBldFakeNeovim(), create=True), \
+                patch.object(cybld_ipc_neovim, "neovim_available", True), \
+                patch.object(cybld_ipc_neovim.CyBldIpcNeovimStream, "MAX_PENDING_LINES", 10), \
+                patch.object(cybld_command_handler, "CyBldIpcNeovim", load_log):
+            sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+            time.sleep(1.0)
+
+        assert(mock.success_callback_called_counter == 1)
+        assert(loaded == [mock.command_group.cmd0])
+
+    def test_cybld_command_handler_exec_cmd_busy(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0 = "sleep 1"
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        # The first request is executed, the others collapse into one (latest wins)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        assert(sut.busy is True)
+        assert(len(sut.exec_queue) == 1)
+
+        time.sleep(2.5)
+        assert(mock.success_callback_called_counter == 2)
+        assert(mock.fail_callback_called_counter    == 0)
+        assert(sut.busy is False)
+        assert(len(sut.exec_queue) == 0)
+
+    def test_cybld_command_handler_exec_cmd_preempt(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0    = "sleep 10"
+        mock.command_group.preempt = True
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(0.5)
+
+        # Preempt the running command with a fast one
+        mock.command_group.cmd0 = "exit 0"
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(1.0)
+
+        assert(sut.busy is False)
+        assert(mock.success_callback_called_counter == 1)
+        assert(mock.fail_callback_called_counter    == 0)
+        assert(cybld_helpers.ICON_CANCELLED in sut.stats.get_command_stats("sleep 10"))
+
+    def test_cybld_command_handler_exec_cmd_concurrent(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0          = "sleep 1"
+        mock.settings.max_concurrency    = 2
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        # cmd1 does not have to wait for cmd0
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec_fail)
+        time.sleep(0.5)
+        assert(sut.slots[0].busy is True)
+        assert(mock.success_callback_called_counter == 0)
+        assert(mock.fail_callback_called_counter    == 1)
+
+        time.sleep(1.5)
+        assert(sut.busy is False)
+        assert(mock.success_callback_called_counter == 1)
+        assert(mock.fail_callback_called_counter    == 1)
+
+    def test_cybld_command_handler_exec_cmd_warm_shell(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.settings.exec_backend = cybld_warm_shell.CyBldExecBackend.warm_shell
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(0.5)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec_fail)
+        time.sleep(0.5)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(0.5)
+
+        assert(mock.success_callback_called_counter == 2)
+        assert(mock.fail_callback_called_counter    == 1)
+        # The shell of cmd0 is started once and reused
+        assert(sut.slots[0].warm_shell.starts == 1)
+        assert(sut.slots[0].warm_shell.is_alive())
+
+        sut.slots[0].warm_shell.close()
+        sut.slots[1].warm_shell.close()
+
+    def test_cybld_command_handler_exec_cmd_abort_on_error(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group = cybld_config_command_group.CyBldConfigCommandGroup(
+                "name", "codeword", "env", "cwd", "hostname", "file",
+                "echo 'x.c:1: error: first'; sleep 10", "exit 1", "cmd2",
+                error_regex = "error:", abort_on_error = True)
+        early_fails = []
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback, early_fails.append)
+
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(1.0)
+
+        assert(sut.busy is False)
+        assert(early_fails == [mock.command_group.cmd0 + ": x.c:1: error: first"])
+        assert(mock.success_callback_called_counter == 0)
+        assert(mock.fail_callback_called_counter    == 1)
+
+    def test_cybld_command_handler_shutdown(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0 = "sleep 10"
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec_fail)
+        time.sleep(0.5)
+
+        # Cancels the running command and drops the queued one
+        start = time.monotonic()
+        sut.shutdown()
+        assert(time.monotonic() - start < 5)
+        assert(sut.busy is False)
+        assert(len(sut.exec_queue) == 0)
+        assert(mock.success_callback_called_counter == 0)
+        assert(mock.fail_callback_called_counter    == 0)
+
+    def test_cybld_command_handler_exec_cmd_debounce(self):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.debounce_ms = 200
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        # A burst of triggers (i. e. on every write) only runs once
+        for _ in range(5):
+            sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+            time.sleep(0.02)
+        assert(sut.busy is False)
+
+        time.sleep(0.7)
+        assert(mock.success_callback_called_counter == 1)
+        assert(sut.debouncer.suppressed == 4)
+        assert("4 debounced" in sut.get_suppressed_str())
+
+    def test_cybld_command_handler_exec_cmd_log_archive(self, tmpdir_factory):
+        mock = CyBldCommandHandlerMockedConfig()
+        mock.command_group.cmd0       = "echo archived"
+        mock.settings.log_archive     = True
+        mock.settings.log_archive_dir = str(tmpdir_factory.mktemp('archive'))
+        sut  = cybld_command_handler.CyBldCommandHandler(
+                mock.command_group, mock.runner_configs, mock.settings,
+                mock.success_callback, mock.fail_callback)
+
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec)
+        time.sleep(0.5)
+        sut.handle_incoming_ipc_message(mock.ipc_message_exec_fail)
+        time.sleep(0.5)
+
+        entries = sut.log_archive.get_entries()
+        assert(len(entries) == 2)
+        assert(entries[0]["command"] == "echo archived")
+        assert(entries[0]["exit"]    == 0)
+        assert(entries[1]["exit"]    == 1)
+        assert(sut.log_archive.read_log(entries[0]) == b"archived\n")
@@ -29,7 +29,7 @@ class TestCyBldCommandStats:
         assert(cybld_helpers.ICON_UNKNOWN in sut.get_stats_str())
 
         sut.update_stats(False, 30)
-        assert(sut._get_avg_runtime() == 16)
+        assert(round(sut._get_avg_runtime(), 2) == 16.67)
         assert(cybld_helpers.ICON_SUCCESS in sut.get_stats_str())
         assert(cybld_helpers.ICON_FAIL in sut.get_stats_str())
         assert(cybld_helpers.ICON_UNKNOWN in sut.get_stats_str())
@@ -51,3 +51,25 @@ class TestCyBldCommandStats:
         assert(cybld_helpers.ICON_SUCCESS not in sut.get_stats_str())
         assert(cybld_helpers.ICON_FAIL in sut.get_stats_str())
         assert(cybld_helpers.ICON_UNKNOWN not in sut.get_stats_str())
+
+    def test_command_stats_cancelled(self):
+        sut  = cybld_command_stats.CyBldCommandStats("mycmd")
+
+        sut.update_stats(False, 100, True)
+        assert(sut._get_avg_runtime() == 0)
+        assert(cybld_helpers.ICON_CANCELLED in sut.get_stats_str())
+
+        sut.update_stats(True, 10)
+        assert(sut._get_avg_runtime() == 10)
+        assert(cybld_helpers.ICON_CANCELLED in sut.get_stats_str())
+        assert(cybld_helpers.ICON_SUCCESS in sut.get_stats_str())
+
+    def test_command_stats_fractions(self):
+        sut  = cybld_command_stats.CyBldCommandStats("mycmd")
+
+        # Sub-second runs are not truncated, whole seconds (int) still work
+        sut.update_stats(True, 0.25)
+        sut.update_stats(True, 0.5)
+        sut.update_stats(True, 3)
+        assert(sut._get_avg_runtime() == 1.25)
+        assert("(avg. 1.25 seconds)" in sut.get_stats_str())
@@ -0,0 +1,62 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_exec_queue
+from cybld.cybld_exec_queue import CyBldExecQueuePolicy, CyBldExecRequest
+
+# --------------------------------------------------------------------------
+
+class TestCyBldExecQueue:
+
+    def test_queue_latest(self):
+        sut = cybld_exec_queue.CyBldExecQueue(CyBldExecQueuePolicy.latest)
+        assert(sut.pop() is None)
+
+        sut.push(CyBldExecRequest(1, ""))
+        sut.push(CyBldExecRequest(1, ""))
+        sut.push(CyBldExecRequest(1, "/tmp/nvim"))
+        assert(len(sut) == 1)
+        assert(sut.coalesced == 2)
+
+        assert(sut.pop() == CyBldExecRequest(1, "/tmp/nvim"))
+        assert(sut.pop() is None)
+
+    def test_queue_latest_per_command(self):
+        sut = cybld_exec_queue.CyBldExecQueue(CyBldExecQueuePolicy.latest)
+
+        # A request for another command doesn't drop the pending ones
+        sut.push(CyBldExecRequest(0, ""))
+        sut.push(CyBldExecRequest(1, ""))
+        sut.push(CyBldExecRequest(0, "/tmp/nvim"))
+        assert(len(sut) == 2)
+        assert(sut.coalesced == 1)
+
+        assert(sut.pop() == CyBldExecRequest(1, ""))
+        assert(sut.pop() == CyBldExecRequest(0, "/tmp/nvim"))
+        assert(sut.pop() is None)
+
+    def test_queue_fifo(self):
+        sut = cybld_exec_queue.CyBldExecQueue(CyBldExecQueuePolicy.fifo)
+
+        sut.push(CyBldExecRequest(0, ""))
+        sut.push(CyBldExecRequest(1, ""))
+        sut.push(CyBldExecRequest(0, ""))
+        sut.push(CyBldExecRequest(0, "/tmp/nvim"))
+        assert(len(sut) == 3)
+        assert(sut.coalesced == 1)
+
+        assert(sut.pop() == CyBldExecRequest(0, ""))
+        assert(sut.pop() == CyBldExecRequest(1, ""))
+        assert(sut.pop() == CyBldExecRequest(0, "/tmp/nvim"))
+        assert(sut.pop() is None)
+
+    def test_request_hash(self):
+        # Equal requests (the timer isn't compared) have the same hash
+        requests = {CyBldExecRequest(0, ""), CyBldExecRequest(0, "", timer = object()),
+                    CyBldExecRequest(0, "/tmp/nvim"), CyBldExecRequest(1, "")}
+        assert(len(requests) == 3)
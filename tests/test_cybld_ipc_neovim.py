@@ -6,7 +6,13 @@
 #
 # --------------------------------------------------------------------------
 
+import os
+import time
+from unittest.mock import patch
+
+from cybld import __main__ as cybld_main
 from cybld import cybld_ipc_neovim
+from cybld import cybld_output_matcher
 
 # --------------------------------------------------------------------------
 
@@ -38,3 +44,124 @@ class TestCyBldIpcNeovim:
         sut                  = TestCyBldIpcNeovim.get_cybld_ipc_neovim_instance()
         sut._ipc_socket_path = None
         assert(sut._should_do_ipc is False)
+
+# --------------------------------------------------------------------------
+
+class CyBldFakeNeovim:
+    """ Records the calls of the neovim python library """
+
+    def __init__(self):
+        self.calls = []
+
+    def attach(self, session_type, path):
+        self.calls.append(("attach", path))
+        return self
+
+    def call(self, function, *args):
+        self.calls.append((function,) + args)
+
+    def command(self, command):
+        self.calls.append(("command", command))
+
+    def close(self):
+        self.calls.append(("close",))
+
+
+class TestCyBldIpcNeovimOpenLog:
+
+    def test_open_log_in_neovim(self, monkeypatch):
+        fake_neovim = CyBldFakeNeovim()
+        loaded      = []
+
+        def command(command):
+            fake_neovim.calls.append(("command", command))
+            if command.startswith("cfile "):
+                with open(command[len("cfile "):], "rb") as logfile:
+                    loaded.append(logfile.read())
+
+        fake_neovim.command = command
+
+        # Outside of neovim, the log is printed instead
+        monkeypatch.delenv("NVIM_LISTEN_ADDRESS", raising=False)
+        assert(cybld_main.open_log_in_neovim(b"a.c:1: error: x\n") is False)
+
+        monkeypatch.setenv("NVIM_LISTEN_ADDRESS", "/tmp/cybld/tstipcneovim")
+        with patch.object(cybld_ipc_neovim, "neovim", fake_neovim, create=True), \
+                patch.object(cybld_ipc_neovim, "neovim_available", True):
+            assert(cybld_main.open_log_in_neovim(b"a.c:1: error: x\n") is True)
+
+        assert(fake_neovim.calls[0] == ("attach", "/tmp/cybld/tstipcneovim"))
+        assert(fake_neovim.calls[-1] == ("command", "copen"))
+        assert(loaded == [b"a.c:1: error: x\n"])
+
+        # The temporary file is gone once neovim has loaded it
+        assert(not os.path.exists(fake_neovim.calls[1][1][len("cfile "):]))
+
+
+class TestCyBldIpcNeovimStream:
+
+    def test_stream(self):
+        fake_neovim = CyBldFakeNeovim()
+        pattern     = cybld_output_matcher.compile_output_regex("error:", None)
+
+        with patch.object(cybld_ipc_neovim, "neovim", fake_neovim, create=True), \
+                patch.object(cybld_ipc_neovim, "neovim_available", True):
+            sut = cybld_ipc_neovim.CyBldIpcNeovimStream("/tmp/cybld/tstipcneovim", "make", 0.05, pattern)
+            assert(sut.start())
+
+            sut.write(b"a.c:1: error: first\nnoise\nb.c:2: err")
+            time.sleep(0.2)
+            sut.write(b"or: second\nc.c:3: error: last")
+            sut.finish()
+
+        assert(fake_neovim.calls[0] == ("attach", "/tmp/cybld/tstipcneovim"))
+        assert(fake_neovim.calls[1] == ("setqflist", [], "r", {"title": "make", "lines": []}))
+        # The first error is sent while the command is still running
+        assert(fake_neovim.calls[2] == ("setqflist", [], "a", {"lines": ["a.c:1: error: first"]}))
+        last_lines = ["b.c:2: error: second", "c.c:3: error: last"]
+        assert(fake_neovim.calls[3] == ("setqflist", [], "a", {"lines": last_lines}))
+        assert(fake_neovim.calls[4:] == [("command", "copen"), ("close",)])
+        assert(sut.lines_sent == 3)
+
+    def test_stream_attach_failed(self):
+        fake_neovim = CyBldFakeNeovim()
+
+        def attach(session_type, path):
+            raise OSError("connection refused")
+        fake_neovim.attach = attach
+
+        with patch.object(cybld_ipc_neovim, "neovim", fake_neovim, create=True), \
+                patch.object(cybld_ipc_neovim, "neovim_available", True):
+            sut = cybld_ipc_neovim.CyBldIpcNeovimStream("/tmp/cybld/tstipcneovim", "make", 0.05)
+            assert(sut.start())
+            sut._thread.join()
+
+            # Nothing is buffered anymore, the caller loads the log instead
+            sut.write(b"a.c:1: error: first\n")
+            assert(sut._pending_lines == [])
+            assert(sut.finish() is False)
+
+    def test_stream_pending_lines_capped(self):
+        sut = cybld_ipc_neovim.CyBldIpcNeovimStream("/tmp/cybld/tstipcneovim", "make", 0.05)
+        sut.MAX_PENDING_LINES = 3
+
+        # Not started (neovim doesn't keep up): only the newest lines are kept
+        sut.write(b"1\n2\n3\n4\n5\n")
+        assert(sut._pending_lines == ["3", "4", "5"])
+        assert(sut.lines_dropped == 2)
+
+    def test_stream_fell_behind(self):
+        fake_neovim = CyBldFakeNeovim()
+
+        with patch.object(cybld_ipc_neovim, "neovim", fake_neovim, create=True), \
+                patch.object(cybld_ipc_neovim, "neovim_available", True), \
+                patch.object(cybld_ipc_neovim.CyBldIpcNeovimStream, "MAX_PENDING_LINES", 10):
+            sut = cybld_ipc_neovim.CyBldIpcNeovimStream("/tmp/cybld/tstipcneovim", "make", 10.0)
+            assert(sut.start())
+
+            # More lines than can be kept until the next update
+            sut.write(b"".join("a.c:{0}: error: x\n".format(line).encode() for line in range(25)))
+            assert(sut.lines_dropped == 15)
+
+            # The quickfix list misses the first errors, the log has to be loaded instead
+            assert(sut.finish() is False)
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+
+from cybld import cybld_log_archive
+
+# --------------------------------------------------------------------------
+
+class TestCyBldLogArchive:
+
+    def _archive_run(self, sut, command, output, returncode = 0):
+        record = sut.start(command)
+        record.write(output)
+        record.finish(returncode)
+        return record
+
+    def test_log_archive(self, tmpdir_factory):
+        base_dir = str(tmpdir_factory.mktemp('archive'))
+        sut      = cybld_log_archive.CyBldLogArchive(base_dir, "my group")
+
+        record = self._archive_run(sut, "make", b"line\n" * 1000, 2)
+
+        assert(sut.name == "my_group")
+        entries = sut.get_entries()
+        assert(len(entries) == 1)
+        assert(entries[0]["id"]       == 1)
+        assert(entries[0]["command"]  == "make")
+        assert(entries[0]["exit"]     == 2)
+        assert(entries[0]["raw_size"] == 5000)
+        assert(entries[0]["size"]     < 5000)
+        assert(entries[0]["size"]     == os.path.getsize(record.path))
+        assert(sut.read_log(sut.get_entry(1)) == b"line\n" * 1000)
+        assert(sut.get_entry(2) is None)
+
+        archives = cybld_log_archive.get_archives(base_dir)
+        assert([archive.name for archive in archives] == ["my_group"])
+
+    def test_log_archive_retention_count(self, tmpdir_factory):
+        sut = cybld_log_archive.CyBldLogArchive(str(tmpdir_factory.mktemp('archive')),
+                                                "group", max_count = 3)
+
+        records = [self._archive_run(sut, "make", b"output") for _ in range(5)]
+
+        assert([entry["id"] for entry in sut.get_entries()] == [3, 4, 5])
+        assert(not os.path.exists(records[0].path))
+        assert(not os.path.exists(records[1].path))
+        assert(os.path.exists(records[2].path))
+
+    def test_log_archive_retention_size(self, tmpdir_factory):
+        sut = cybld_log_archive.CyBldLogArchive(str(tmpdir_factory.mktemp('archive')),
+                                                "group", max_count = 0, max_bytes = 1)
+
+        self._archive_run(sut, "make", b"output")
+        self._archive_run(sut, "make", b"output")
+
+        # The latest run is kept, even if it exceeds the limit on its own
+        assert([entry["id"] for entry in sut.get_entries()] == [2])
+
+    def test_log_archive_corrupt_index(self, tmpdir_factory):
+        sut = cybld_log_archive.CyBldLogArchive(str(tmpdir_factory.mktemp('archive')), "group")
+        with open(os.path.join(sut.path, cybld_log_archive.INDEX_FILE_NAME), "w") as index_file:
+            index_file.write("{")
+
+        assert(sut.get_entries() == [])
+        self._archive_run(sut, "make", b"output")
+        assert(len(sut.get_entries()) == 1)
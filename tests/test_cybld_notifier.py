@@ -0,0 +1,29 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_notifier
+from cybld import cybld_config_settings
+
+# --------------------------------------------------------------------------
+
+class TestCyBldNotifier:
+
+    def test_notify_early_fail(self, monkeypatch):
+        settings = cybld_config_settings.CyBldConfigSettings(
+                False, True, False, False, False, False,
+                True, True, False, 5, False)
+        commands = []
+        monkeypatch.setattr(cybld_notifier, "_platform_", "linux")
+        monkeypatch.setattr(cybld_notifier.shutil, "which", lambda name: "/usr/bin/notify-send")
+        monkeypatch.setattr(cybld_notifier.subprocess, "call", lambda args, **kwargs: commands.append(args))
+
+        # The output line is passed as is (a single argument, no shell)
+        sut = cybld_notifier.CyBldNotifier(settings)
+        sut.notify_early_fail("make: a.c:1: 'x' `rm -rf /` $(y)")
+        assert(commands == [["notify-send", "-a", "cybld", "-u", "critical", "-t", "5",
+                             "cybld - fail", "make: a.c:1: 'x' `rm -rf /` $(y)"]])
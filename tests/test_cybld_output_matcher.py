@@ -0,0 +1,41 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_output_matcher
+
+# --------------------------------------------------------------------------
+
+class TestCyBldOutputMatcher:
+
+    def test_compile_output_regex(self):
+        assert(cybld_output_matcher.compile_output_regex(None, None) is None)
+        assert(cybld_output_matcher.compile_output_regex("", None) is None)
+
+        pattern = cybld_output_matcher.compile_output_regex("error:", "warning:")
+        assert(pattern.search(b"a.c:1: error: x").lastgroup == "error")
+        assert(pattern.search(b"a.c:1: warning: x").lastgroup == "warning")
+
+    def test_output_matcher(self):
+        errors  = []
+        pattern = cybld_output_matcher.compile_output_regex(r"\berror:", r"^.*: warning:")
+        sut     = cybld_output_matcher.CyBldOutputMatcher(pattern, errors.append)
+
+        sut.write(b"a.c:1: warning: unused\na.c:2: err")
+        assert(sut.warnings == 1)
+        assert(sut.errors   == 0)
+
+        # The error is split across chunks
+        sut.write(b"or: first\nb.c:3: error: second\nc.c:4: error: last")
+        assert(sut.errors == 2)
+        assert(errors == ["a.c:2: error: first"])
+
+        sut.flush()
+        assert(sut.errors      == 3)
+        assert(sut.first_error == "a.c:2: error: first")
+        assert(errors          == ["a.c:2: error: first"])
+        assert(sut.get_matches_str() == "errors: 3, warnings: 1 (first error: a.c:2: error: first)")
@@ -0,0 +1,36 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import time
+
+from cybld import cybld_phase_timer
+from cybld.cybld_phase_timer import CyBldPhase
+
+# --------------------------------------------------------------------------
+
+class TestCyBldPhaseTimer:
+
+    def test_phase_timer(self):
+        sut = cybld_phase_timer.CyBldPhaseTimer()
+
+        time.sleep(0.01)
+        sut.mark(CyBldPhase.dispatched)
+        sut.mark(CyBldPhase.spawned)
+        sut.on_output(b"first")
+        time.sleep(0.01)
+        sut.on_output(b"second")
+        sut.mark(CyBldPhase.exited)
+        # Only the first mark counts
+        sut.mark(CyBldPhase.dispatched)
+
+        phases = sut.get_phases()
+        assert([name for name, _ in phases] == ["dispatch", "spawn", "first output", "run"])
+        assert(phases[0][1] >= 10 * 1000 * 1000)
+        assert(phases[3][1] >= 10 * 1000 * 1000)
+        assert(sut.get_total() == sum(duration for _, duration in phases))
+        assert(sut.get_timing_str().startswith("timing: dispatch "))
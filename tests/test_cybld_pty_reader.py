@@ -0,0 +1,35 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+import pty
+import subprocess
+
+from cybld import cybld_pty_reader
+
+# --------------------------------------------------------------------------
+
+class TestCyBldPtyReader:
+
+    def test_read_until_eof(self):
+        master, slave = pty.openpty()
+        proc = subprocess.Popen("for i in $(seq 1 2000); do echo line$i; done; printf last",
+                                shell=True, stdout=slave, stderr=slave)
+        os.close(slave)
+
+        chunks = []
+        sut    = cybld_pty_reader.CyBldPtyReader(master, [chunks.append])
+        sut.read_until_eof()
+        os.close(master)
+        proc.wait()
+
+        output = b"".join(chunks).replace(b"\r\n", b"\n")
+        assert(output.startswith(b"line1\n"))
+        assert(b"line2000\n" in output)
+        assert(output.endswith(b"last"))
+        assert(sut.bytes_read == sum(len(chunk) for chunk in chunks))
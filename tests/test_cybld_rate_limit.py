@@ -0,0 +1,61 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import time
+
+from cybld import cybld_rate_limit
+
+# --------------------------------------------------------------------------
+
+class TestCyBldTokenBucket:
+
+    def test_token_bucket(self):
+        sut = cybld_rate_limit.CyBldTokenBucket(20, 3)
+
+        assert(sut.try_acquire())
+        assert(sut.try_acquire())
+        assert(sut.try_acquire())
+        assert(not sut.try_acquire())
+        assert(sut.dropped == 1)
+
+        # Refilled with 20 tokens per second
+        time.sleep(0.1)
+        assert(sut.try_acquire())
+
+    def test_token_bucket_disabled(self):
+        sut = cybld_rate_limit.CyBldTokenBucket(0, 1)
+        for _ in range(100):
+            assert(sut.try_acquire())
+        assert(sut.dropped == 0)
+
+# --------------------------------------------------------------------------
+
+class TestCyBldDebouncer:
+
+    def test_debouncer(self):
+        calls = []
+        sut   = cybld_rate_limit.CyBldDebouncer(0.1, lambda *args: calls.append(args))
+
+        sut.trigger(0, "first")
+        sut.trigger(1, "other")
+        sut.trigger(0, "second")
+        sut.trigger(0, "third")
+        assert(calls == [])
+
+        time.sleep(0.3)
+        assert(sorted(calls) == [("other",), ("third",)])
+        assert(sut.suppressed == 2)
+
+    def test_debouncer_disabled(self):
+        calls = []
+        sut   = cybld_rate_limit.CyBldDebouncer(0, lambda *args: calls.append(args))
+
+        sut.trigger(0, "first")
+        sut.trigger(0, "second")
+        assert(calls == [("first",), ("second",)])
+        assert(sut.suppressed == 0)
@@ -6,6 +6,9 @@
 #
 # --------------------------------------------------------------------------
 
+import os
+import time
+
 from unittest.mock import patch
 
 from cybld import cybld_runner
@@ -56,3 +59,227 @@ class TestCyBldRunner:
         assert(len(sut.results.previous_results) == 1)
         assert(len(sut.results.current_results)  == 2)
         assert(len(sut.params)  == 2)
+
+    def test_cybld_runner_jobs(self, tmpdir_factory, capfd):
+        config  = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh", jobs = 4)
+        testdir = tmpdir_factory.mktemp('runner_jobs')
+        testdir.chdir()
+
+        # The first params take the longest, their output is printed first anyway
+        for index in range(8):
+            testdir.join("test{0}.sh".format(index)).write(
+                "sleep 0.{0}; echo output{1}; exit {2}".format(8 - index, index, index % 2))
+
+        # 3.6 seconds one after another
+        sut   = cybld_runner.CyBldRunner(config)
+        start = time.monotonic()
+        assert(sut.run_all() is False)
+        assert(time.monotonic() - start < 2.5)
+
+        assert(len(sut.params) == 8)
+        assert([result.get_param() for result in sut.results.current_results] == sut.params)
+        assert([result.is_success() for result in sut.results.current_results] ==
+               [int(param[-4]) % 2 == 0 for param in sut.params])
+        assert(all([result.usage is not None for result in sut.results.current_results]))
+
+        out     = capfd.readouterr().out
+        outputs = [out.index("output{0}".format(param[-4])) for param in sut.params]
+        assert(outputs == sorted(outputs))
+
+    def test_cybld_runner_incremental(self, tmpdir_factory, capfd):
+        testdir = tmpdir_factory.mktemp('runner_incremental')
+        config  = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh", incremental = True,
+                                                        cache_path = str(testdir.join("cache.json")))
+        testdir.chdir()
+
+        testdir.join("test_good.sh").write("exit 0")
+        testdir.join("test_bad.sh").write("exit 1")
+
+        sut = cybld_runner.CyBldRunner(config)
+        assert(sut.run_all() is False)
+        assert(not any([result.is_cached() for result in sut.results.current_results]))
+
+        # Survives a restart: only the failed param is executed again
+        sut = cybld_runner.CyBldRunner(config)
+        assert(sut.run_all() is False)
+        results = {os.path.basename(result.get_param()): result for result in sut.results.current_results}
+        assert(results["test_good.sh"].is_cached())
+        assert(results["test_good.sh"].is_success())
+        assert(not results["test_bad.sh"].is_cached())
+        assert("test_good.sh (cached pass)" in capfd.readouterr().out)
+
+        testdir.join("test_bad.sh").write("exit 0")
+        testdir.join("test_good.sh").write("exit 1")
+        assert(sut.run_all() is False)
+        results = {os.path.basename(result.get_param()): result for result in sut.results.current_results}
+        assert(not results["test_good.sh"].is_success())
+        assert(results["test_bad.sh"].is_success())
+        assert(not results["test_bad.sh"].is_cached())
+
+    def test_cybld_runner_schedule(self, tmpdir_factory):
+        testdir = tmpdir_factory.mktemp('runner_schedule')
+        config  = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh", schedule = "failed_first",
+                                                        history_path = str(testdir.join("history.json")))
+        testdir.chdir()
+
+        for index in range(5):
+            testdir.join("test_{0}.sh".format(index)).write("exit 0")
+        testdir.join("test_3.sh").write("exit 1")
+
+        sut = cybld_runner.CyBldRunner(config)
+        assert(sut.run_all() is False)
+
+        # Survives a restart: the failed param is executed first
+        sut = cybld_runner.CyBldRunner(config)
+        assert(sut.run_all() is False)
+        assert(os.path.basename(sut.params[0]) == "test_3.sh")
+        assert(os.path.basename(sut.results.current_results[0].get_param()) == "test_3.sh")
+
+    def _write_batch_runner(self, testdir):
+        """ Runs every param (script), logs the number of params of every invocation """
+        testdir.join("batch.sh").write('echo $# >> invocations.log; rc=0\n'
+                                       'for param in "$@"; do sh $param || { echo "FAILED $param"; rc=1; }; done\n'
+                                       'exit $rc\n')
+        for index in range(5):
+            testdir.join("test_{0}.sh".format(index)).write("exit 0")
+        testdir.join("test_3.sh").write("exit 1")
+
+    def test_cybld_runner_batch_bisect(self, tmpdir_factory, capfd):
+        testdir = tmpdir_factory.mktemp('runner_batch')
+        config  = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh batch.sh", ".*test_.*.sh", batch_size = 8)
+        testdir.chdir()
+        self._write_batch_runner(testdir)
+
+        sut = cybld_runner.CyBldRunner(config)
+        assert(sut.run_all() is False)
+
+        results = {os.path.basename(result.get_param()): result for result in sut.results.current_results}
+        assert(len(results) == 5)
+        assert(results["test_3.sh"].is_fail())
+        assert(all([results[param].is_success() for param in results if param != "test_3.sh"]))
+
+        # Bisected down to the failed param, halves which succeed are not split
+        invocations = testdir.join("invocations.log").read().split()
+        assert(invocations[0] == "5")
+        assert(invocations[1] == "2")
+        assert(len(invocations) <= 7)
+
+    def test_cybld_runner_batch_fail_regex(self, tmpdir_factory):
+        testdir = tmpdir_factory.mktemp('runner_batch')
+        config  = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh batch.sh", ".*test_.*.sh", jobs = 2,
+                                                        batch_size = 2, fail_regex = "^FAILED (.*)$")
+        testdir.chdir()
+        self._write_batch_runner(testdir)
+
+        sut = cybld_runner.CyBldRunner(config)
+        assert(sut.run_all() is False)
+
+        results = {os.path.basename(result.get_param()): result for result in sut.results.current_results}
+        assert(len(results) == 5)
+        assert(results["test_3.sh"].is_fail())
+        assert(all([results[param].is_success() for param in results if param != "test_3.sh"]))
+        assert(sorted(testdir.join("invocations.log").read().split()) == ["1", "2", "2"])
+
+        testdir.join("test_3.sh").write("exit 0")
+        assert(sut.run_all() is True)
+
+    def test_cybld_runner_timeout(self, tmpdir_factory):
+        testdir = tmpdir_factory.mktemp('runner_timeout')
+        testdir.chdir()
+
+        testdir.join("test_hang.sh").write("echo started; sleep 30")
+        testdir.join("test_good.sh").write("exit 0")
+
+        for jobs in (1, 2):
+            for timeout, hang_timeout in ((0.5, 0.0), (0.0, 0.5)):
+                config = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh", jobs = jobs,
+                                                               timeout = timeout, hang_timeout = hang_timeout)
+                sut    = cybld_runner.CyBldRunner(config)
+
+                start = time.time()
+                assert(sut.run_all() is False)
+                assert(time.time() - start < 10)
+
+                results = {os.path.basename(result.get_param()): result for result in sut.results.current_results}
+                assert(results["test_hang.sh"].is_timeout())
+                assert(results["test_hang.sh"].is_fail())
+                assert(results["test_good.sh"].is_success())
+
+    def test_cybld_runner_retries(self, tmpdir_factory, capfd):
+        testdir = tmpdir_factory.mktemp('runner_retries')
+        testdir.chdir()
+
+        # Fails on every second attempt
+        testdir.join("test_flaky.sh").write("if [ -e flaky.state ]; then rm flaky.state; exit 0; fi\n"
+                                            "touch flaky.state; exit 1\n")
+        testdir.join("test_bad.sh").write("exit 1")
+
+        testdir.join("batch.sh").write('rc=0; for param in "$@"; do sh $param || { echo "FAILED $param"; rc=1; }; done\n'
+                                       'exit $rc\n')
+
+        for jobs, batch_size in ((1, 1), (2, 1), (1, 2)):
+            config = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh" if batch_size == 1 else "sh batch.sh",
+                                                           ".*test.*.sh", jobs = jobs, batch_size = batch_size,
+                                                           fail_regex = "^FAILED (.*)$", retries = 2)
+            sut    = cybld_runner.CyBldRunner(config)
+
+            assert(sut.run_all() is False)
+
+            results = {os.path.basename(result.get_param()): result for result in sut.results.current_results}
+            assert(results["test_flaky.sh"].is_success())
+            assert(results["test_flaky.sh"].is_flaky())
+            assert(results["test_bad.sh"].is_fail())
+            assert(not results["test_bad.sh"].is_flaky())
+            assert(results["test_bad.sh"].attempts == 3)
+
+            out = capfd.readouterr().out
+            assert("FLAKY" in out)
+            assert("test_flaky.sh (flaky, attempt 2)" in out)
+
+    def test_cybld_runner_result_store(self, tmpdir_factory, capfd):
+        testdir = tmpdir_factory.mktemp('runner_store')
+        testdir.chdir()
+
+        def run(compare_to = 1):
+            config = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh", result_store = True,
+                                                           store_path = str(testdir.join("results.sqlite")),
+                                                           compare_to = compare_to)
+            cybld_runner.CyBldRunner(config).run_all()
+            return capfd.readouterr().out
+
+        testdir.join("test_a.sh").write("exit 1")
+        testdir.join("test_b.sh").write("exit 0")
+        run()
+
+        # Survives a restart
+        testdir.join("test_a.sh").write("exit 0")
+        out = run()
+        assert("PREVIOUS TEST RESULTS (RUN 1)" in out)
+        assert("went GOOD" in out)
+
+        out = run()
+        assert("No changes detected" in out)
+
+        # Against an earlier run
+        out = run(compare_to = 3)
+        assert("TEST RESULTS OF RUN 1 (3 RUNS AGO)" in out)
+        assert("went GOOD" in out)
+
+    def test_cybld_runner_output(self, tmpdir_factory, capfd):
+        testdir = tmpdir_factory.mktemp('runner_output')
+        testdir.chdir()
+        testdir.join("test_a.sh").write("echo output_a")
+        testdir.join("test_b.sh").write("echo output_b; exit 1")
+
+        # Both the output of the params and the results go to the sink
+        for jobs in [1, 2]:
+            config     = cybld_config_runner.CyBldConfigRunner("runner_sh", "sh", ".*test.*.sh", jobs = jobs)
+            sut        = cybld_runner.CyBldRunner(config)
+            output     = []
+            sut.output = output.append
+            assert(sut.run_all() is False)
+
+            text = b"".join(output)
+            assert(b"output_a\n" in text and b"output_b\n" in text)
+            assert(b"test_b.sh" in text)
+            assert(capfd.readouterr().out == "")
@@ -0,0 +1,56 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+
+from cybld import cybld_runner_cache
+
+# --------------------------------------------------------------------------
+
+class TestCyBldRunnerCache:
+
+    def test_runner_cache(self, tmpdir_factory):
+        testdir    = tmpdir_factory.mktemp('runner_cache')
+        cache_path = str(testdir.join("cache", "runner.json"))
+        param      = testdir.join("test_a.py")
+        param.write("content")
+
+        sut = cybld_runner_cache.CyBldRunnerCache(cache_path, "python")
+        assert(not sut.is_unchanged(str(param)))
+
+        sut.update(str(param), True)
+        assert(sut.is_unchanged(str(param)))
+
+        # Touched, but the same content
+        stat = os.stat(str(param))
+        os.utime(str(param), ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        assert(sut.is_unchanged(str(param)))
+
+        param.write("changed")
+        assert(not sut.is_unchanged(str(param)))
+
+        param.write("content")
+        assert(sut.is_unchanged(str(param)))
+
+        # Failed params are always executed again
+        sut.update(str(param), False)
+        assert(not sut.is_unchanged(str(param)))
+
+    def test_runner_cache_persistent(self, tmpdir_factory):
+        testdir    = tmpdir_factory.mktemp('runner_cache')
+        cache_path = str(testdir.join("runner.json"))
+        param      = testdir.join("test_a.py")
+        param.write("content")
+
+        sut = cybld_runner_cache.CyBldRunnerCache(cache_path, "python")
+        sut.update(str(param), True)
+        sut.write()
+
+        assert(cybld_runner_cache.CyBldRunnerCache(cache_path, "python").is_unchanged(str(param)))
+        # Another command invalidates the cache
+        assert(not cybld_runner_cache.CyBldRunnerCache(cache_path, "python3").is_unchanged(str(param)))
@@ -0,0 +1,157 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import errno
+import os
+import re
+
+import pytest
+
+from cybld import cybld_inotify, cybld_runner_discovery
+
+# --------------------------------------------------------------------------
+
+class TestCyBldRunnerDiscovery:
+
+    def _walk(self, regex):
+        """ The params the runner used to find (os.walk) """
+        ret = []
+        for root, dirs, files in os.walk(os.curdir):
+            for file in files:
+                fullfile = str(os.path.join(root, file))
+                if regex.match(fullfile):
+                    ret.append(fullfile)
+        return ret
+
+    def test_runner_discovery(self, tmpdir_factory):
+        testdir = tmpdir_factory.mktemp('runner_discovery')
+        testdir.chdir()
+
+        testdir.join("test_a.py").write("")
+        testdir.join("other.py").write("")
+        testdir.join("sub", "test_b.py").write("", ensure = True)
+        testdir.join("sub", "deeper", "test_c.py").write("", ensure = True)
+        testdir.join("build", "test_d.py").write("", ensure = True)
+        testdir.join(".git", "test_e.py").write("", ensure = True)
+
+        regex = re.compile(r".*test_.*\.py$")
+        sut   = cybld_runner_discovery.CyBldDiscoveryIndex(regex, [".git", "buil*"])
+        assert(sut.find() == [param for param in self._walk(regex)
+                              if "build" not in param and ".git" not in param])
+
+        default = cybld_runner_discovery.CyBldDiscoveryIndex(regex)
+        assert(sorted(default.find()) == sorted(param for param in self._walk(regex) if ".git" not in param))
+
+    def test_runner_discovery_without_scandir(self, tmpdir_factory, monkeypatch):
+        testdir = tmpdir_factory.mktemp('runner_discovery')
+        testdir.chdir()
+
+        testdir.join("test_a.py").write("")
+        testdir.join("sub", "test_b.py").write("", ensure = True)
+        testdir.join("link").mksymlinkto(testdir.join("sub"))
+        testdir.join("test_link.py").mksymlinkto(testdir.join("test_a.py"))
+
+        regex    = re.compile(r".*test_.*\.py$")
+        expected = sorted(self._walk(regex))
+        assert(sorted(cybld_runner_discovery.CyBldDiscoveryIndex(regex).find()) == expected)
+
+        # Python 3.4: os.listdir and os.stat
+        monkeypatch.delattr(os, "scandir")
+        assert(sorted(cybld_runner_discovery.CyBldDiscoveryIndex(regex).find()) == expected)
+
+    def test_runner_discovery_cached(self, tmpdir_factory, monkeypatch):
+        testdir = tmpdir_factory.mktemp('runner_discovery')
+        testdir.chdir()
+
+        testdir.join("sub", "test_a.py").write("", ensure = True)
+
+        # Trust the listings right away
+        monkeypatch.setattr(cybld_runner_discovery, "MTIME_GRANULARITY_NS", 0)
+
+        sut = cybld_runner_discovery.CyBldDiscoveryIndex(re.compile(r".*test_.*\.py$"))
+        assert(sut.find() == ["./sub/test_a.py"])
+
+        scanned  = []
+        list_dir = cybld_runner_discovery._list_dir
+        monkeypatch.setattr(cybld_runner_discovery, "_list_dir", lambda path: scanned.append(path) or list_dir(path))
+
+        assert(sut.find() == ["./sub/test_a.py"])
+        assert(scanned == [])
+
+        # Only the modified folder is listed again
+        testdir.join("sub", "test_b.py").write("")
+        stat = os.stat(str(testdir.join("sub")))
+        os.utime(str(testdir.join("sub")), ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        assert(sorted(sut.find()) == ["./sub/test_a.py", "./sub/test_b.py"])
+        assert(scanned == ["./sub"])
+
+        testdir.join("sub").remove()
+        assert(sut.find() == [])
+
+    def _watching_index(self):
+        sut = cybld_runner_discovery.CyBldDiscoveryIndex(re.compile(r".*test_.*\.py$"), watch = True)
+        sut.find()
+        if not sut.is_watching():
+            pytest.skip("inotify is not available")
+        return sut
+
+    def test_runner_discovery_watch(self, tmpdir_factory, monkeypatch):
+        testdir = tmpdir_factory.mktemp('runner_discovery')
+        testdir.chdir()
+
+        testdir.join("sub", "test_a.py").write("", ensure = True)
+
+        sut = self._watching_index()
+        assert(sut.find() == ["./sub/test_a.py"])
+
+        scanned  = []
+        list_dir = cybld_runner_discovery._list_dir
+        monkeypatch.setattr(cybld_runner_discovery, "_list_dir", lambda path: scanned.append(path) or list_dir(path))
+
+        # No events: nothing is listed (and no mtime granularity issues)
+        testdir.join("sub", "test_a.py").write("modified")
+        assert(sut.find() == ["./sub/test_a.py"])
+        assert(scanned == [])
+
+        testdir.join("sub", "test_b.py").write("")
+        assert(sorted(sut.find()) == ["./sub/test_a.py", "./sub/test_b.py"])
+        assert(scanned == ["./sub"])
+
+        # New folders are watched as well
+        testdir.join("sub", "new", "test_c.py").write("", ensure = True)
+        assert("./sub/new/test_c.py" in sut.find())
+        testdir.join("sub", "new", "test_d.py").write("")
+        assert("./sub/new/test_d.py" in sut.find())
+
+        testdir.join("sub").rename(testdir.join("moved"))
+        assert(sorted(sut.find()) == ["./moved/new/test_c.py", "./moved/new/test_d.py",
+                                      "./moved/test_a.py", "./moved/test_b.py"])
+        testdir.join("moved", "new", "test_e.py").write("")
+        assert("./moved/new/test_e.py" in sut.find())
+
+        testdir.join("moved").remove()
+        assert(sut.find() == [])
+        sut.close()
+
+    def test_runner_discovery_watch_limit(self, tmpdir_factory, monkeypatch):
+        testdir = tmpdir_factory.mktemp('runner_discovery')
+        testdir.chdir()
+
+        testdir.join("sub", "test_a.py").write("", ensure = True)
+
+        def add_watch(inotify, path, mask):
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+        monkeypatch.setattr(cybld_inotify.CyBldInotify, "add_watch", add_watch)
+
+        sut = cybld_runner_discovery.CyBldDiscoveryIndex(re.compile(r".*test_.*\.py$"), watch = True)
+        assert(sut.find() == ["./sub/test_a.py"])
+        assert(not sut.is_watching())
+
+        testdir.join("sub", "test_b.py").write("")
+        assert(sorted(sut.find()) == ["./sub/test_a.py", "./sub/test_b.py"])
@@ -0,0 +1,50 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_runner_schedule
+from cybld.cybld_runner_schedule import CyBldRunnerSchedulePolicy
+
+# --------------------------------------------------------------------------
+
+class TestCyBldRunnerSchedule:
+
+    history = {"a": {"success": True,  "runtime": 1.0},
+               "b": {"success": False, "runtime": 2.0},
+               "d": {"success": True,  "runtime": 5.0},
+               "e": {"success": False, "runtime": 0.5}}
+
+    def test_runner_schedule_walk(self):
+        params = ["a", "b", "c", "d", "e"]
+        assert(cybld_runner_schedule.schedule_params(params, CyBldRunnerSchedulePolicy.walk,
+                                                     self.history.get) == params)
+
+    def test_runner_schedule_failed_first(self):
+        params = ["a", "b", "c", "d", "e"]
+        assert(cybld_runner_schedule.schedule_params(params, CyBldRunnerSchedulePolicy.failed_first,
+                                                     self.history.get) == ["b", "e", "c", "a", "d"])
+
+    def test_runner_schedule_longest_first(self):
+        params = ["a", "b", "c", "d", "e"]
+        assert(cybld_runner_schedule.schedule_params(params, CyBldRunnerSchedulePolicy.longest_first,
+                                                     self.history.get) == ["c", "d", "b", "a", "e"])
+
+    def test_runner_history(self, tmpdir_factory):
+        testdir      = tmpdir_factory.mktemp('runner_history')
+        history_path = str(testdir.join("history", "runner.json"))
+
+        sut = cybld_runner_schedule.CyBldRunnerHistory(history_path)
+        assert(sut.get("test_a.py") is None)
+
+        sut.update("test_a.py", False, 1.5)
+        sut.write()
+
+        sut = cybld_runner_schedule.CyBldRunnerHistory(history_path)
+        assert(sut.get("test_a.py") == {"success": False, "runtime": 1.5})
+
+        testdir.join("history", "runner.json").write("{corrupt")
+        assert(cybld_runner_schedule.CyBldRunnerHistory(history_path).get("test_a.py") is None)
@@ -0,0 +1,53 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+from cybld import cybld_runner_store
+from cybld.cybld_runner_results import CyBldRunnerSingleResult, CyBldRunnerResultType
+
+# --------------------------------------------------------------------------
+
+class TestCyBldRunnerStore:
+
+    def _results(self, **params):
+        results = []
+        for param, result in sorted(params.items()):
+            single_result = CyBldRunnerSingleResult("python", param)
+            single_result.set_result(result, 1)
+            results.append(single_result)
+        return results
+
+    def test_runner_store(self, tmpdir_factory):
+        testdir = tmpdir_factory.mktemp('runner_store')
+        testdir.chdir()
+
+        sut = cybld_runner_store.CyBldRunnerStore(str(testdir.join("store", "results.sqlite")), max_runs = 2)
+        assert(sut.get_runs() == [])
+        assert(sut.get_earlier_run_id("runner_py", 0) is None)
+
+        first  = sut.add_run("runner_py", self._results(a = CyBldRunnerResultType.fail,
+                                                        b = CyBldRunnerResultType.success))
+        second = sut.add_run("runner_py", self._results(a = CyBldRunnerResultType.success,
+                                                        b = CyBldRunnerResultType.timeout))
+        other  = sut.add_run("runner_sh", self._results(c = CyBldRunnerResultType.cached))
+
+        assert(sut.get_earlier_run_id("runner_py", 0) == second)
+        assert(sut.get_earlier_run_id("runner_py", 1) == first)
+        assert(sut.get_earlier_run_id("runner_py", 0, "/elsewhere") is None)
+        assert(sut.get_results(first) == {"a": CyBldRunnerResultType.fail, "b": CyBldRunnerResultType.success})
+        assert(sut.get_results(other) == {"c": CyBldRunnerResultType.cached})
+
+        runs = sut.get_runs("runner_py")
+        assert([run.run_id for run in runs] == [second, first])
+        assert([(run.params, run.failed) for run in runs] == [(2, 1), (2, 1)])
+        assert(sut.get_run(other).runner == "runner_sh")
+
+        # Only the latest max_runs runs are kept (per runner)
+        third = sut.add_run("runner_py", self._results(a = CyBldRunnerResultType.success))
+        assert([run.run_id for run in sut.get_runs("runner_py")] == [third, second])
+        assert(sut.get_results(first) == dict())
+        assert(len(sut.get_runs()) == 3)
@@ -0,0 +1,59 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import signal
+import subprocess
+import sys
+
+from cybld import cybld_rusage
+from cybld import cybld_runner_results
+
+# --------------------------------------------------------------------------
+
+class TestCyBldResourceUsage:
+
+    def test_wait_for_process(self):
+        # Burn some CPU time and allocate ~50 MB
+        proc = subprocess.Popen([sys.executable, "-c",
+                                 "x = bytearray(50 * 1024 * 1024)\n"
+                                 "sum(range(2000000))\n"
+                                 "exit(3)"])
+        returncode, usage = cybld_rusage.wait_for_process(proc)
+
+        assert(returncode      == 3)
+        assert(proc.returncode == 3)
+        assert(usage.cpu_time   > 0)
+        assert(usage.max_rss_kb > 50 * 1024)
+        assert("max rss" in usage.get_usage_str(1.0))
+
+        # Already waited for
+        assert(cybld_rusage.wait_for_process(proc) == (3, None))
+
+    def test_wait_for_process_signal(self):
+        proc = subprocess.Popen(["sleep", "10"])
+        proc.send_signal(signal.SIGTERM)
+        returncode, usage = cybld_rusage.wait_for_process(proc)
+
+        assert(returncode == -signal.SIGTERM)
+        assert(usage is not None)
+
+    def test_total_usage(self):
+        results = cybld_runner_results.CyBldRunnerResults()
+        assert(results.get_total_usage() is None)
+
+        for max_rss_kb in [100, 300, 200]:
+            result       = cybld_runner_results.CyBldRunnerSingleResult("cmd", "param")
+            result.usage = cybld_rusage.CyBldResourceUsage(1.0, 0.5, max_rss_kb, 1, 2, 3, 4)
+            results.add_result(result)
+
+        total = results.get_total_usage()
+        assert(total.user_time       == 3.0)
+        assert(total.sys_time        == 1.5)
+        assert(total.max_rss_kb      == 300)
+        assert(total.blocks_out      == 6)
+        assert(total.ctx_involuntary == 12)
@@ -0,0 +1,50 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+import signal
+
+from cybld import cybld_helpers, cybld_terminal
+
+# --------------------------------------------------------------------------
+
+class TestCyBldTerminal:
+
+    def test_terminal_buffered(self, capsys):
+        with cybld_terminal.buffered():
+            cybld_helpers.print_centered_text("SUCCESS", True)
+            with cybld_terminal.buffered():
+                cybld_helpers.print_text_with_bg("test_a.py", False)
+            assert(capsys.readouterr().out == "")
+
+        out = capsys.readouterr().out
+        assert(out.count("\n") == 2)
+        assert("SUCCESS" in out)
+        assert("test_a.py" in out)
+
+    def test_terminal_width(self):
+        # Not a terminal (py.test)
+        assert(cybld_terminal.get_width() == cybld_terminal.DEFAULT_WIDTH)
+
+        previous_handler = signal.getsignal(signal.SIGWINCH)
+        try:
+            cybld_terminal.install_resize_handler()
+            cybld_terminal.get_width()
+            assert(cybld_terminal._cached_width == cybld_terminal.DEFAULT_WIDTH)
+
+            os.kill(os.getpid(), signal.SIGWINCH)
+            assert(cybld_terminal._cached_width is None)
+        finally:
+            signal.signal(signal.SIGWINCH, previous_handler)
+            cybld_terminal._resize_handled = False
+            cybld_terminal._cached_width   = None
+
+    def test_terminal_clear_screen(self, capsys):
+        # Nothing is written if stdout is not a terminal
+        cybld_terminal.clear_screen()
+        assert(capsys.readouterr().out == "")
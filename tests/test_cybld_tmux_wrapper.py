@@ -0,0 +1,129 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import io
+
+from cybld import cybld_tmux_wrapper
+from cybld.cybld_tmux_wrapper import CyBldTmuxControlClient, CyBldTmuxWrapper
+
+# --------------------------------------------------------------------------
+
+class FakeTmuxProcess:
+    def __init__(self, output: bytes):
+        self.stdin  = io.BytesIO()
+        self.stdout = io.BytesIO(output)
+
+    def poll(self):
+        return None
+
+# --------------------------------------------------------------------------
+
+class TestCyBldTmuxWrapper:
+
+    def test_session_name_override(self, monkeypatch):
+        monkeypatch.setenv(cybld_tmux_wrapper.SESSION_ENV_KEY, "my_session")
+        CyBldTmuxWrapper.reset_session_name()
+        try:
+            assert(CyBldTmuxWrapper.get_session_name() == "my_session")
+
+            # Empty means "not inside tmux"
+            monkeypatch.setenv(cybld_tmux_wrapper.SESSION_ENV_KEY, "")
+            CyBldTmuxWrapper.reset_session_name()
+            assert(CyBldTmuxWrapper.get_session_name() is None)
+        finally:
+            CyBldTmuxWrapper.reset_session_name()
+
+    def test_session_name_memoized(self, monkeypatch):
+        resolved = []
+
+        def resolve_session_name():
+            resolved.append(True)
+            return "session"
+
+        monkeypatch.setattr(CyBldTmuxWrapper, "_resolve_session_name",
+                            staticmethod(resolve_session_name))
+        CyBldTmuxWrapper.reset_session_name()
+        try:
+            assert(CyBldTmuxWrapper.get_session_name() == "session")
+            assert(CyBldTmuxWrapper.get_session_name() == "session")
+            assert(len(resolved) == 1)
+        finally:
+            CyBldTmuxWrapper.reset_session_name()
+
+    def test_resolve_session_name(self, monkeypatch):
+        monkeypatch.delenv(cybld_tmux_wrapper.SESSION_ENV_KEY, raising=False)
+        monkeypatch.delenv("TMUX", raising=False)
+        monkeypatch.setattr(cybld_tmux_wrapper.shutil, "which", lambda name: "/usr/bin/tmux")
+
+        queries = []
+
+        def check_output(args, **kwargs):
+            queries.append(args)
+            return b"my_session\n"
+
+        monkeypatch.setattr(cybld_tmux_wrapper.subprocess, "check_output", check_output)
+        assert(CyBldTmuxWrapper._resolve_session_name() == "my_session")
+        assert(queries == [["tmux", "display-message", "-p", "#S"]])
+
+        # No tmux server running
+        def check_output_failed(args, **kwargs):
+            raise cybld_tmux_wrapper.subprocess.CalledProcessError(1, args)
+
+        monkeypatch.setattr(cybld_tmux_wrapper.subprocess, "check_output", check_output_failed)
+        assert(CyBldTmuxWrapper._resolve_session_name() is None)
+
+    def test_control_client_answers(self):
+        sut      = CyBldTmuxControlClient("session")
+        sut.proc = FakeTmuxProcess(b"%begin 1 10 1\n"
+                                   b"cybld\n"
+                                   b"%end 1 10 1\n"
+                                   b"%session-changed $0 session\n"
+                                   b"%begin 1 11 0\n"
+                                   b"%end 1 11 0\n"
+                                   b"%begin 1 12 1\n"
+                                   b"unknown command: foo\n"
+                                   b"%error 1 12 1\n")
+        sut._read_answers()
+
+        # The answer to the attach is not mixed up with the commands
+        assert(sut._attach_answer.get_nowait() == (True, []))
+        assert(sut._answers.get_nowait() == (True, ["cybld"]))
+        assert(sut._answers.get_nowait() == (False, ["unknown command: foo"]))
+        # EOF
+        assert(sut._answers.get_nowait() == (False, None))
+
+    def test_control_client_command(self):
+        sut      = CyBldTmuxControlClient("session")
+        sut.proc = FakeTmuxProcess(b"")
+        sut._answers.put((True, ["0 /dev/pts/1", "1 client-1234"]))
+        sut._answers.put((True, []))
+
+        # Only the client which isn't in control mode (cybld itself) is refreshed
+        assert(sut.refresh_client())
+        assert(sut.proc.stdin.getvalue().decode().splitlines()[-1] == "refresh-client -S -t '/dev/pts/1'")
+
+    def test_control_client_display_message_quoted(self):
+        sut      = CyBldTmuxControlClient("session")
+        sut.proc = FakeTmuxProcess(b"")
+        sut._answers.put((True, ["0 /dev/pts/1"]))
+        sut._answers.put((True, []))
+
+        # Neither a quote nor a tmux format of a compiler line gets expanded
+        assert(sut.display_message("cybld - fail: it's #(touch x) $(y)"))
+        assert(sut.proc.stdin.getvalue().decode().splitlines()[-1] ==
+               "display-message -c '/dev/pts/1' 'cybld - fail: it'\\''s ##(touch x) $(y)'")
+
+    def test_display_message_spawned_without_shell(self, monkeypatch):
+        commands = []
+        monkeypatch.setattr(cybld_tmux_wrapper, "_control_client", None)
+        monkeypatch.setattr(CyBldTmuxWrapper, "is_tmux_available", staticmethod(lambda: True))
+        monkeypatch.setattr(cybld_tmux_wrapper.subprocess, "call",
+                            lambda args, **kwargs: commands.append(args))
+
+        CyBldTmuxWrapper.display_message("fail: `x` #(y) \"z\"")
+        assert(commands == [["tmux", "display-message", "fail: `x` ##(y) \"z\""]])
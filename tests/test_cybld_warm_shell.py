@@ -0,0 +1,82 @@
+#!/usr/bin/python
+
+# --------------------------------------------------------------------------
+#
+# MIT License
+#
+# --------------------------------------------------------------------------
+
+import os
+import signal
+import time
+
+from cybld import cybld_warm_shell
+
+# --------------------------------------------------------------------------
+
+class TestCyBldSentinelFilter:
+
+    def test_sentinel_filter(self):
+        output = []
+        sut    = cybld_warm_shell.CyBldSentinelFilter(b"__DONE__:", [output.append])
+
+        sut.write(b"line1\n__DO")
+        assert(b"".join(output) == b"line1\n")
+
+        # Looked like the sentinel, but wasn't
+        sut.write(b"NT__\nline2 __D")
+        assert(b"".join(output) == b"line1\n__DONT__\nline2 ")
+        assert(sut.exit_code is None)
+
+        sut.write(b"ONE__:4")
+        assert(sut.exit_code is None)
+        sut.write(b"2\n")
+        assert(sut.exit_code == 42)
+        assert(b"".join(output) == b"line1\n__DONT__\nline2 ")
+
+# --------------------------------------------------------------------------
+
+class TestCyBldWarmShell:
+
+    def test_warm_shell_run(self):
+        sut = cybld_warm_shell.CyBldWarmShell()
+
+        output = []
+        assert(sut.run("echo out; echo err >&2; printf last", [output.append]) == 0)
+        assert(b"".join(output) == b"out\nerr\nlast")
+
+        # Every command runs in its own subshell
+        assert(sut.run("cd / && export CYBLD_TEST=1; exit 3", []) == 3)
+        output = []
+        assert(sut.run("pwd; echo ${CYBLD_TEST:-unset}", [output.append]) == 0)
+        assert(b"".join(output) == os.getcwd().encode() + b"\nunset\n")
+        assert(sut.starts == 1)
+
+        sut.close()
+
+    def test_warm_shell_restart(self):
+        sut = cybld_warm_shell.CyBldWarmShell()
+
+        proc = sut.submit("sleep 10")
+        os.killpg(proc.pid, signal.SIGTERM)
+        assert(sut.wait([]) == -signal.SIGTERM)
+        assert(not sut.is_alive())
+
+        output = []
+        assert(sut.run("echo again", [output.append]) == 0)
+        assert(b"".join(output) == b"again\n")
+        assert(sut.starts == 2)
+
+        sut.close()
+
+    def test_warm_shell_close_running(self):
+        sut = cybld_warm_shell.CyBldWarmShell()
+        sut.CLOSE_TIMEOUT = 0.2
+
+        # The command is still running (i. e. wait failed), the shell is killed
+        proc  = sut.submit("sleep 10")
+        start = time.monotonic()
+        sut.close()
+        assert(time.monotonic() - start < 5)
+        assert(proc.returncode == -signal.SIGKILL)
+        assert(not sut.is_alive())